@@ -1,65 +1,69 @@
+import time
+INICIO_PROCESSO = time.perf_counter()  # referência para o tempo até a janela ficar interativa
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import openpyxl
-from openpyxl.drawing.image import Image
-from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
-from openpyxl import load_workbook
-import shutil
+import argparse
 import os
-import zipfile
-import re
-import datetime
-import json 
-
-try:
-    import win32com.client as win32
-    PDF_SUPORTE = True
-except ImportError:
-    PDF_SUPORTE = False
-
-# Para imagens na UI (capa do app)
-try:
-    from PIL import Image, ImageTk
-    PIL_SUPORTE = True
-except ImportError:
-    PIL_SUPORTE = False
-    print("Aviso: Pillow não instalado (pip install Pillow). Imagem de capa será texto fallback.")
-
-class TextWithPlaceholder(tk.Text):
-    def __init__(self, master=None, placeholder="PLACEHOLDER", color='#7f8c8d', *args, **kwargs):
-        super().__init__(master, *args, **kwargs)
-        self.placeholder = placeholder
-        self.placeholder_color = color
-        self.default_fg_color = self.cget('fg')
-        self.bind("<FocusIn>", self._clear_placeholder)
-        self.bind("<FocusOut>", self._add_placeholder)
-        self._add_placeholder()
-
-    def _clear_placeholder(self, event=None):
-        content = self.get("1.0", tk.END).strip()
-        if content == self.placeholder and self.cget('fg') == self.placeholder_color:
-            self.delete("1.0", tk.END)
-            self.config(fg=self.default_fg_color)
-
-    def _add_placeholder(self, event=None):
-        if not self.get("1.0", tk.END).strip():
-            self.delete("1.0", tk.END)
-            self.insert("1.0", self.placeholder)
-            self.config(fg=self.placeholder_color)
-            self.update_idletasks()
-
-    def get_value(self):
-        val = self.get("1.0", tk.END).strip()
-        if val == self.placeholder and self.cget('fg') == self.placeholder_color:
-            return ""
-        return val
-
-    def set_placeholder(self, text):
-        self.placeholder = text if text else "PLACEHOLDER"
-        self.delete("1.0", tk.END)
-        self._add_placeholder()
-        self.event_generate("<FocusOut>")
-        self.update()
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+import logs
+import motor
+import numeros
+from grade_itens import GradeItens
+from logs import TRACE
+from numeracao import AlocadorNumeros
+
+import pdf
+from autocompletar import Autocompletar
+from banco import BancoOrcamentos
+from catalogo import Catalogo
+from clientes import CadastroClientes
+from perfil import ARQUIVO_METRICAS, Perfil
+
+IMPORTS_MS = (time.perf_counter() - INICIO_PROCESSO) * 1000
+
+logger = logs.obter_logger('app')
+
+# Placeholders padrão da grade de itens ({n} = número da linha)
+PLACEHOLDERS_ITENS = {'item': "Item {n}", 'desc': "Digite a descrição do item", 'quant': "0",
+                      'und': "UND", 'vlr_uni': "0,00", 'total': "0,00"}
+# Preview do total: espera a digitação parar antes de redesenhar e loga no máximo 1x/intervalo
+AGUARDO_PREVIEW_MS = 150
+INTERVALO_LOG_PREVIEW = 2.0
+# Pausa na digitação antes de consultar o catálogo (a busca roda fora da thread do Tk)
+AGUARDO_BUSCA_MS = 120
+
+# Capa e ícone: PNGs já redimensionados ficam em cache e abrem direto no Tk (sem Pillow)
+PASTA_CACHE_IMAGENS = ".cache_imagens"
+TAMANHO_LOGO = (280, 120)
+TAMANHO_ICONE = (32, 32)
+
+
+def imagem_redimensionada(caminho, tamanho):
+    """Caminho de um PNG do caminho no tamanho pedido, gerado uma vez em PASTA_CACHE_IMAGENS.
+
+    O nome leva tamanho, mtime e bytes da imagem de origem: trocar o logo gera um novo
+    arquivo (e apaga o antigo). O Pillow só é importado quando o cache precisa ser gerado;
+    sem ele, ImportError.
+    """
+    info = os.stat(caminho)
+    prefixo = f"{os.path.splitext(os.path.basename(caminho))[0]}_{tamanho[0]}x{tamanho[1]}_"
+    destino = os.path.join(PASTA_CACHE_IMAGENS, f"{prefixo}{info.st_mtime_ns:x}_{info.st_size:x}.png")
+    if os.path.exists(destino):
+        return destino
+    from PIL import Image
+    os.makedirs(PASTA_CACHE_IMAGENS, exist_ok=True)
+    for antigo in os.listdir(PASTA_CACHE_IMAGENS):
+        if antigo.startswith(prefixo):
+            os.remove(os.path.join(PASTA_CACHE_IMAGENS, antigo))
+    with Image.open(caminho) as imagem:
+        imagem.resize(tamanho, Image.Resampling.LANCZOS).save(destino + ".tmp", "PNG")
+    os.replace(destino + ".tmp", destino)
+    return destino
 
 class EntryWithPlaceholder(tk.Entry):
     def __init__(self, master=None, placeholder="PLACEHOLDER", color='#7f8c8d', *args, **kwargs):
@@ -108,6 +112,9 @@ class EntryWithPlaceholder(tk.Entry):
         self['fg'] = self.default_fg_color
         self.update_idletasks()
 
+class GeracaoCancelada(Exception):
+    """Cancelamento pedido pelo usuário durante a geração."""
+
 class Automatizador:
     def __init__(self, root):
         self.root = root
@@ -136,29 +143,31 @@ class Automatizador:
         self.logo_path = "logo.png"
         self.logo_image = None
         self.logo_label = None
-        if PIL_SUPORTE:
-            if os.path.exists(self.logo_path):
-                try:
-                    pil_image = Image.open(self.logo_path)
-                    pil_image = pil_image.resize((280, 120), Image.Resampling.LANCZOS)
-                    self.logo_image = ImageTk.PhotoImage(pil_image)
-                    self.log("Imagem de capa carregada: logo.png (redimensionada para 280x120).")
-                    # Ícone da janela
-                    root_icon = Image.open(self.logo_path)
-                    root_icon = root_icon.resize((32, 32), Image.Resampling.LANCZOS)
-                    root_icon_tk = ImageTk.PhotoImage(root_icon)
-                    self.root.iconphoto(False, root_icon_tk)
-                except Exception as img_err:
-                    self.log(f"Erro ao carregar imagem de capa: {img_err}. Usando texto fallback.")
-                    self.logo_image = None
-            else:
-                self.log(f"Imagem de capa não encontrada: {self.logo_path}. Usando texto fallback.")
+        if os.path.exists(self.logo_path):
+            try:
+                self.logo_image = tk.PhotoImage(file=imagem_redimensionada(self.logo_path, TAMANHO_LOGO))
+                self.log("Imagem de capa carregada: logo.png (redimensionada para 280x120).")
+                # Ícone da janela
+                self.root.iconphoto(False, tk.PhotoImage(file=imagem_redimensionada(self.logo_path, TAMANHO_ICONE)))
+            except ImportError:
+                self.log("Pillow não instalado (pip install Pillow). Imagem de capa será texto fallback.", nivel=logging.WARNING)
+                self.logo_image = None
+            except Exception as img_err:
+                self.log("Erro ao carregar imagem de capa: %s. Usando texto fallback.", img_err, nivel=logging.ERROR)
                 self.logo_image = None
         else:
-            self.log("Pillow não disponível. Usando texto fallback para capa.")
+            self.log("Imagem de capa não encontrada: %s. Usando texto fallback.", self.logo_path, nivel=logging.WARNING)
 
         # Persistência do número (config.json)
         self.config_file = "config.json"
+        self.arquivo_metricas = ARQUIVO_METRICAS  # tempo/CPU/alocações por etapa de cada geração
+        self.alocador = AlocadorNumeros(self.config_file)
+        # Orçamentos gerados (cabeçalho + itens) para busca/reemissão sem abrir os .xlsx
+        self.banco = BancoOrcamentos()
+        # Clientes já atendidos (aprendidos do banco) para o autocompletar de B6-B9
+        self.clientes = CadastroClientes(self.banco)
+        # Catálogo de produtos (índice já gravado em catalogo.db; nada é montado na abertura)
+        self.catalogo = Catalogo()
         self.numero_orcamento = tk.StringVar(value="1")
         self.carregar_numero_config()
 
@@ -166,20 +175,28 @@ class Automatizador:
         self.arquivo_selecionado = tk.StringVar()
 
         self.campos_fixos = [
-            {'titulo': 'Cliente', 'valor': tk.StringVar(value='Nome do Cliente'), 'celula_fixa': 'B6', 'entry': None, 'tooltip': 'Digite o nome do cliente aqui'},
-            {'titulo': 'Endereço', 'valor': tk.StringVar(value='Endereço do Cliente'), 'celula_fixa': 'B7', 'entry': None, 'tooltip': 'Digite o endereço completo'},
-            {'titulo': 'CNPJ', 'valor': tk.StringVar(value='00.000.000/0000-00'), 'celula_fixa': 'B8', 'entry': None, 'tooltip': 'Digite o CNPJ no formato XX.XXX.XXX/XXXX-XX'},
-            {'titulo': 'Telefone', 'valor': tk.StringVar(value='(00) 0000-0000'), 'celula_fixa': 'B9', 'entry': None, 'tooltip': 'Digite o telefone no formato (XX) XXXX-XXXX'}
+            {'titulo': 'Cliente', 'valor': tk.StringVar(value='Nome do Cliente'), 'chave': 'cliente', 'entry': None, 'tooltip': 'Digite o nome do cliente aqui'},
+            {'titulo': 'Endereço', 'valor': tk.StringVar(value='Endereço do Cliente'), 'chave': 'endereco', 'entry': None, 'tooltip': 'Digite o endereço completo'},
+            {'titulo': 'CNPJ', 'valor': tk.StringVar(value='00.000.000/0000-00'), 'chave': 'cnpj', 'entry': None, 'tooltip': 'Digite o CNPJ no formato XX.XXX.XXX/XXXX-XX'},
+            {'titulo': 'Telefone', 'valor': tk.StringVar(value='(00) 0000-0000'), 'chave': 'telefone', 'entry': None, 'tooltip': 'Digite o telefone no formato (XX) XXXX-XXXX'}
         ]
 
         self.campos_adicionais = [
-            {'titulo': 'Prazo de Entrega (B36)', 'celula': 'B36', 'placeholder_default': 'Prazo de entrega: ', 'entry': None, 'tooltip': 'Edite o prazo carregado do modelo (preto se presente)'},
-            {'titulo': 'Forma de Pagamento (B37)', 'celula': 'B37', 'placeholder_default': 'Forma de pagamento: ', 'entry': None, 'tooltip': 'Edite a forma de pagamento (preto se presente no modelo)'},
-            {'titulo': 'Condições (B39)', 'celula': 'B39', 'placeholder_default': 'Na entrega: ', 'entry': None, 'tooltip': 'Edite as condições (preto se presente no modelo)'}
+            {'titulo': 'Prazo de Entrega (B36)', 'chave': 'prazo', 'placeholder_default': 'Prazo de entrega: ', 'entry': None, 'tooltip': 'Edite o prazo carregado do modelo (preto se presente)'},
+            {'titulo': 'Forma de Pagamento (B37)', 'chave': 'pagamento', 'placeholder_default': 'Forma de pagamento: ', 'entry': None, 'tooltip': 'Edite a forma de pagamento (preto se presente no modelo)'},
+            {'titulo': 'Condições (B39)', 'chave': 'condicoes', 'placeholder_default': 'Na entrega: ', 'entry': None, 'tooltip': 'Edite as condições (preto se presente no modelo)'}
         ]
 
-        self.itens_widgets = []
+        self.grade_itens = None  # Tabela virtualizada dos itens (A13 em diante), montada após a 1ª pintura
+        self._frame_itens = None
+        self.fila_pdf = None  # Criada no primeiro PDF
+        self.thread_geracao = None  # Geração em andamento (fora da thread do Tk)
+        self.cancelamento = threading.Event()
+        self.eventos_geracao = queue.Queue()
         self.label_total_preview = None  # Para preview F35
+        self.soma_itens = numeros.SomaIncremental()  # F por linha + soma (ajustada pela linha editada)
+        self._preview_agendado = None  # after() pendente do preview
+        self._ultimo_log_preview = 0.0
 
         self.main_container = tk.Frame(root, bg='#f0f0f0')
         self.main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -203,56 +220,58 @@ class Automatizador:
         self.main_container.columnconfigure(0, weight=1)
 
         self.configurar_interface()
-
-        # Bind para preview total (atualiza ao digitar em totais de itens)
-        self.bind_preview_total()
+        self.interface_ms = (time.perf_counter() - INICIO_PROCESSO) * 1000 - IMPORTS_MS
+        self.ao_concluir_inicio = None  # chamado com o resumo do tempo de abertura (--medir-inicio)
+        self.root.bind('<Map>', self._ao_mostrar_janela, add='+')
+
+    def _ao_mostrar_janela(self, event):
+        if event.widget is self.root:
+            self.root.unbind('<Map>')
+            self.root.after_idle(self.concluir_inicio)  # depois da pintura pendente da janela
+
+    def concluir_inicio(self):
+        """Segunda etapa da abertura, com a janela já pintada: grade de itens e cargas em segundo plano."""
+        inicio_grade = time.perf_counter()
+        self.montar_grade_itens()
+        self.root.update_idletasks()
+        agora = time.perf_counter()
+        resumo = {'imports_ms': IMPORTS_MS, 'interface_ms': self.interface_ms,
+                  'grade_ms': (agora - inicio_grade) * 1000, 'total_ms': (agora - INICIO_PROCESSO) * 1000}
+        self.log("Janela interativa em %.0f ms (imports %.0f ms, interface %.0f ms, grade %.0f ms).",
+                 resumo['total_ms'], resumo['imports_ms'], resumo['interface_ms'], resumo['grade_ms'])
+        threading.Thread(target=self.carregar_clientes, name="carregar-clientes", daemon=True).start()
+        # Detecta Excel/LibreOffice fora da thread do Tk (o import do pywin32 é caro); o resultado fica em cache
+        threading.Thread(target=pdf.suporte_pdf, name="detectar-pdf", daemon=True).start()
+        if self.ao_concluir_inicio is not None:
+            self.ao_concluir_inicio(resumo)
 
     def carregar_numero_config(self):
         """Carrega próximo número de config.json (fallback se sem modelo)."""
         try:
             self.log("Iniciando carregamento de config.json (fallback)...")
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    proximo = int(config.get('proximo_numero', 1))
-                    self.numero_orcamento.set(str(proximo))
-                    self.log(f"Número carregado de config.json (fallback): {proximo}")
-                    print(f"DEBUG FALLBACK: Carregado {proximo} de JSON (será sobrescrito por A5 se modelo carregado)")
-            else:
-                self.log("config.json não encontrado. Fallback para 1.")
-                self.numero_orcamento.set("1")
-                print("DEBUG FALLBACK: Sem JSON, usando 1")
+            proximo = self.alocador.ler()
+            self.numero_orcamento.set(str(proximo))
+            self.log("Número carregado de config.json (fallback): %s", proximo)
         except Exception as e:
-            self.log(f"Erro config.json (fallback): {e}. Usando 1.")
+            self.log("Erro config.json (fallback): %s. Usando 1.", e, nivel=logging.ERROR)
             self.numero_orcamento.set("1")
         
         # Force update
         self.root.after(0, lambda: self.entry_numero.update_idletasks())
 
     def salvar_numero_config(self, novo_numero):
-        """Salva próximo número em config.json."""
+        """Garante proximo_numero >= novo_numero em config.json (trava + escrita atômica)."""
         try:
-            self.log(f"Tentando salvar {novo_numero} em config.json...")
-            config = {'proximo_numero': novo_numero}
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-            self.log(f"Número salvo em config.json: {novo_numero}")
-            print(f"DEBUG JSON: Salvo {novo_numero} em {self.config_file} (conteúdo: {config})")  # Debug extra
-            
-            # Verifica se salvou
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    verificado = json.load(f)
-                    print(f"DEBUG JSON: Verificação pós-save: {verificado}")
-            else:
-                print("DEBUG JSON: ERRO - Arquivo não criado após save!")
+            atual = self.alocador.garantir_minimo(novo_numero)
+            self.log("Número salvo em config.json: %s", atual)
+            return atual
         except Exception as e:
-            self.log(f"Erro ao salvar config.json: {e}. Número não persistido (verifique permissões/pasta).")
-            print(f"DEBUG JSON: Exceção save: {e} (pasta atual: {os.getcwd()})")
+            self.log("Erro ao salvar config.json: %s. Número não persistido (verifique permissões/pasta).", e, nivel=logging.ERROR)
+            return novo_numero
 
-    def log(self, mensagem):
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {mensagem}")
+    def log(self, mensagem, *args, nivel=logging.INFO):
+        """Registra no log do app (args no estilo %, formatados só se o nível estiver ativo)."""
+        logger.log(nivel, mensagem, *args)
 
     def mostrar_tooltip(self, widget, texto, event):
         """Mostra tooltip simples (popup label)."""
@@ -370,6 +389,10 @@ class Automatizador:
             # Tooltip para cada campo
             entry.bind("<Enter>", lambda e, tt=campo['tooltip']: self.mostrar_tooltip(entry, tt, e))
             entry.bind("<Leave>", lambda e: self.tooltip.destroy() if self.tooltip else None)
+            # Cliente e CNPJ sugerem clientes já atendidos; escolher um preenche B6-B9
+            if campo['chave'] in ('cliente', 'cnpj'):
+                Autocompletar(entry, lambda texto, chave=campo['chave']: self.clientes.sugestoes(texto, chave),
+                              self.preencher_cliente, formatar=lambda c: f"{c.cliente}  ·  {c.cnpj}".strip(' ·'))
 
         row += 1
 
@@ -424,37 +447,21 @@ class Automatizador:
             lbl = tk.Label(colunas_frame, text=texto, font=('Arial', 9, 'bold'), width=width, anchor='w', bg='#34495e', fg='white', relief=tk.SOLID, bd=1)
             lbl.grid(row=0, column=col_idx, sticky="ew", padx=1)
 
-        # Container para itens com canvas e scrollbar
-        itens_container = tk.Frame(itens_frame, bg='#f0f0f0')
-        itens_container.grid(row=1, column=0, sticky="nsew")
-        itens_container.rowconfigure(0, weight=1)
-        itens_container.columnconfigure(0, weight=1)
-
-        self.canvas_itens = tk.Canvas(itens_container, bg='#f0f0f0', highlightthickness=0, height=300)
-        self.scrollbar_itens = ttk.Scrollbar(itens_container, orient="vertical", command=self.canvas_itens.yview, style='TScrollbar')
-        self.scrollable_frame_itens = tk.Frame(self.canvas_itens, bg='#f0f0f0')
-
-        for col_idx, (_, width) in enumerate(colunas_config):
-            self.scrollable_frame_itens.columnconfigure(col_idx, minsize=width * 7)
-
-        self.scrollable_frame_itens.bind(
-            "<Configure>",
-            lambda e: self.canvas_itens.configure(scrollregion=self.canvas_itens.bbox("all"))
-        )
-
-        self.canvas_itens.create_window((0, 0), window=self.scrollable_frame_itens, anchor="nw")
-        self.canvas_itens.configure(yscrollcommand=self.scrollbar_itens.set)
-
-        self.canvas_itens.pack(side="left", fill="both", expand=True)
-        self.scrollbar_itens.pack(side="right", fill="y")
-
-        self.pre_carregar_itens()  # Carrega itens com estilos e binds
+        # A tabela em si é montada após a primeira pintura (montar_grade_itens); até lá, espaço reservado
+        self._larguras_itens = [largura for _, largura in colunas_config]
+        self._frame_itens = itens_frame
+        self._reserva_itens = tk.Frame(itens_frame, height=300, bg='#f0f0f0')
+        self._reserva_itens.grid(row=1, column=0, sticky="nsew")
 
         # Label Preview Total (só-leitura, atualiza em tempo real)
         preview_frame = tk.Frame(itens_frame, bg='#f0f0f0')
         preview_frame.grid(row=2, column=0, sticky="ew", pady=(10, 0))
         self.label_total_preview = tk.Label(preview_frame, text="Total Estimado (F35): R$ 0,00", font=('Arial', 11, 'bold'), bg='#f0f0f0', fg='#27ae60', anchor='e')
-        self.label_total_preview.pack(anchor='e')
+        self.label_total_preview.pack(side='right')
+        botao_linha = ttk.Button(preview_frame, text="➕ Adicionar Linha", command=lambda: self.adicionar_linhas_itens(1))
+        botao_linha.pack(side='left')
+        botao_catalogo = ttk.Button(preview_frame, text="📦 Importar Catálogo", command=self.importar_catalogo)
+        botao_catalogo.pack(side='left', padx=(8, 0))
         # Tooltip para preview
         self.label_total_preview.bind("<Enter>", lambda e: self.mostrar_tooltip(self.label_total_preview, "Soma automática dos totais editados (F13-F34, formato BR)", e))
         self.label_total_preview.bind("<Leave>", lambda e: self.tooltip.destroy() if self.tooltip else None)
@@ -468,8 +475,15 @@ class Automatizador:
         # Botão Principal (estilizado com hover e loading)
         botao_frame = tk.Frame(self.scrollable_frame_principal, bg='#f0f0f0')
         botao_frame.grid(row=row, column=0, columnspan=3, pady=20)
-        self.botao_criar = ttk.Button(botao_frame, text="🚀 Criar Cópia do Orçamento e PDF" if PDF_SUPORTE else "💾 Criar Cópia do Orçamento (.xlsx apenas)", style='Create.TButton', command=self.executar)
+        self.botao_criar = ttk.Button(botao_frame, text="🚀 Criar Cópia do Orçamento e PDF", style='Create.TButton', command=self.executar)
         self.botao_criar.pack(pady=10)
+        # Progresso da geração (thread de trabalho) e cancelamento
+        self.barra_progresso = ttk.Progressbar(botao_frame, length=320, mode='determinate', maximum=100)
+        self.barra_progresso.pack(pady=(0, 4))
+        self.label_progresso = tk.Label(botao_frame, text="", font=('Arial', 9), bg='#f0f0f0', fg='#7f8c8d')
+        self.label_progresso.pack()
+        self.botao_cancelar = ttk.Button(botao_frame, text="✖ Cancelar", command=self.cancelar_geracao, state='disabled')
+        self.botao_cancelar.pack(pady=(4, 0))
         # Hover e tooltip para botão criar
         self.botao_criar.bind("<Enter>", lambda e: self.mostrar_tooltip(self.botao_criar, "Gera cópia com valores editados, A5 incrementado, imagens preservadas e PDF (se Windows)", e))
         self.botao_criar.bind("<Leave>", lambda e: self.tooltip.destroy() if self.tooltip else None)
@@ -493,83 +507,122 @@ class Automatizador:
 
         self.log("Interface carregada (UI mais bonita: gradiente header, tooltips, preview total live, hover botões, LabelFrames com emojis).")
 
-    def bind_preview_total(self):
-        """Bind KeyRelease nos totais de itens para preview live."""
-        for item in self.itens_widgets:
-            total_entry = item['total']
-            total_entry.bind("<KeyRelease>", self.atualizar_preview_total)
-
-    def atualizar_preview_total(self, event=None):
-        """Atualiza label preview com soma dos totais editados (F13-F34, formato BR)."""
-        total_soma = 0.0
+    def montar_grade_itens(self):
+        """Cria a tabela de itens (uma vez); quem usa a grade antes da abertura terminar chama aqui."""
+        if self.grade_itens is None:
+            # Tabela virtualizada: widgets só para as linhas visíveis (reaproveitados na rolagem)
+            colunas_grade = [(chave, largura) for (chave, _), largura in zip(motor.COLUNAS_ITENS, self._larguras_itens)]
+            self.grade_itens = GradeItens(self._frame_itens, colunas_grade,
+                                          linhas=motor.LINHA_FINAL_ITENS - motor.LINHA_INICIAL_ITENS + 1,
+                                          placeholders_padrao=PLACEHOLDERS_ITENS, altura=300,
+                                          ao_alterar=self.item_alterado, ao_criar_linha=self.ligar_catalogo)
+            self._reserva_itens.destroy()
+            self.grade_itens.grid(row=1, column=0, sticky="nsew")
+            self.log("Itens: tabela virtualizada com %d linha(s).", self.grade_itens.quantidade)
+        return self.grade_itens
+
+    def carregar_clientes(self):
+        """Lê o cadastro de clientes do banco (thread própria: não atrasa a abertura)."""
         try:
-            for i, item in enumerate(self.itens_widgets):
-                valor_total_str = item['total'].get_value()
-                if valor_total_str and valor_total_str != "0,00":
-                    valor_limpo = valor_total_str.replace('.', '').replace(',', '.')
-                    try:
-                        total_num = float(valor_limpo)
-                        total_soma += total_num
-                    except ValueError:
-                        pass  # Ignora inválidos
-            # Formato BR (pontos milhar, vírgula decimal)
-            total_formatado = f"{total_soma:,.2f}".replace('.', 'X').replace(',', '.').replace('X', ',')
-            self.label_total_preview.config(text=f"Total Estimado (F35): R$ {total_formatado}")
-            self.log(f"Preview total atualizado: R$ {total_formatado}")
+            quantidade = self.clientes.carregar()
+            self.log("Clientes para autocompletar: %d.", quantidade, nivel=logging.DEBUG)
         except Exception as e:
-            self.log(f"Erro no preview total: {e}")
-            self.label_total_preview.config(text="Total Estimado (F35): R$ 0,00")
-
-    def pre_carregar_itens(self):
-        """Pré-carrega 22 itens com estilos bonitos (cores alternadas, bordas) e binds para preview."""
-        colunas_placeholders_iniciais = [
-            "Item 1", "Digite a descrição do item", "0", "UND", "0,00", "0,00"
-        ]
-        widths = [10, 35, 12, 8, 15, 15]
-
-        for i in range(22):  # Linhas 13-34
-            row_item = i
-            placeholder_item = f"Item {i+1}"
-
-            # Cores alternadas suaves
-            bg_color = '#f8f9fa' if i % 2 == 0 else '#ffffff'
-
-            # Coluna A: Item
-            item_entry = EntryWithPlaceholder(self.scrollable_frame_itens, placeholder=placeholder_item, width=widths[0], relief='solid', bd=1, bg=bg_color, font=('Arial', 9))
-            item_entry.grid(row=row_item, column=0, padx=1, pady=1, sticky="ew")
-
-            # Coluna B: Descrição (Text)
-            desc_text = TextWithPlaceholder(self.scrollable_frame_itens, placeholder=colunas_placeholders_iniciais[1], width=widths[1], height=1, wrap=tk.NONE, relief='solid', bd=1, bg=bg_color, font=('Arial', 9))
-            desc_text.grid(row=row_item, column=1, padx=1, pady=1, sticky="ew")
-
-            # Colunas C-F: Entries
-            quant_entry = EntryWithPlaceholder(self.scrollable_frame_itens, placeholder=colunas_placeholders_iniciais[2], width=widths[2], relief='solid', bd=1, bg=bg_color, font=('Arial', 9))
-            quant_entry.grid(row=row_item, column=2, padx=1, pady=1, sticky="ew")
-
-            und_entry = EntryWithPlaceholder(self.scrollable_frame_itens, placeholder=colunas_placeholders_iniciais[3], width=widths[3], relief='solid', bd=1, bg=bg_color, font=('Arial', 9))
-            und_entry.grid(row=row_item, column=3, padx=1, pady=1, sticky="ew")
-
-            vlr_uni_entry = EntryWithPlaceholder(self.scrollable_frame_itens, placeholder=colunas_placeholders_iniciais[4], width=widths[4], relief='solid', bd=1, bg=bg_color, font=('Arial', 9))
-            vlr_uni_entry.grid(row=row_item, column=4, padx=1, pady=1, sticky="ew")
+            self.log("Clientes não carregados do banco: %s", e, nivel=logging.WARNING)
+
+    def preencher_cliente(self, cliente):
+        """Preenche cliente, endereço, CNPJ e telefone com o cliente escolhido na sugestão."""
+        for campo in self.campos_fixos:
+            valor = getattr(cliente, campo['chave'], "")
+            if valor:
+                campo['entry'].set_real_value(valor)
+        self.log("Cliente preenchido: %s", cliente.cliente)
+
+    def ligar_catalogo(self, entradas):
+        """Descrição de cada linha da grade sugere produtos do catálogo (B/D/E ao escolher)."""
+        entrada = entradas['desc']
+        Autocompletar(entrada, self.buscar_produtos, lambda produto: self.escolher_produto(entrada.linha, produto),
+                      formatar=lambda p: "  ·  ".join(parte for parte in (p.descricao, p.und, p.preco and f"R$ {p.preco}") if parte),
+                      atraso=AGUARDO_BUSCA_MS)
+
+    def buscar_produtos(self, texto):
+        """Roda na thread das sugestões (Autocompletar com atraso), não na do Tk."""
+        try:
+            return self.catalogo.buscar(texto, limite=10) if len(texto.strip()) >= 2 else []
+        except Exception as e:
+            self.log("Erro na busca do catálogo: %s", e, nivel=logging.ERROR)
+            return []
 
-            total_entry = EntryWithPlaceholder(self.scrollable_frame_itens, placeholder=colunas_placeholders_iniciais[5], width=widths[5], relief='solid', bd=1, bg=bg_color, font=('Arial', 9))
-            total_entry.grid(row=row_item, column=5, padx=1, pady=1, sticky="ew")
+    def escolher_produto(self, linha, produto):
+        """Preenche descrição, UND e valor unitário da linha; o total é recalculado pela grade."""
+        if linha is None:
+            return
+        valores = {'desc': produto.descricao}
+        if produto.und:
+            valores['und'] = produto.und
+        if produto.preco:
+            valores['vlr_uni'] = produto.preco
+        self.grade_itens.preencher(linha, valores)
+        self.log("Item %d: produto %s %s.", linha + 1, produto.codigo, produto.descricao)
+
+    def importar_catalogo(self):
+        """Importa o catálogo (.csv/.xlsx) numa thread, sem travar a interface."""
+        arquivo = filedialog.askopenfilename(title="Selecione o catálogo de produtos",
+                                             filetypes=[("Catálogo", "*.csv *.xlsx"), ("Todos", "*.*")])
+        if not arquivo:
+            return
 
-            # Armazena widgets
-            item_widgets = {
-                'item': item_entry, 'desc': desc_text, 'quant': quant_entry,
-                'und': und_entry, 'vlr_uni': vlr_uni_entry, 'total': total_entry
-            }
-            self.itens_widgets.append(item_widgets)
+        def importar():
+            try:
+                total = self.catalogo.importar(arquivo)
+                self.log("Catálogo importado: %d produto(s) de %s.", total, os.path.basename(arquivo))
+            except Exception as e:
+                self.log("Erro ao importar catálogo: %s", e, nivel=logging.ERROR)
+
+        self.log("Importando catálogo %s...", os.path.basename(arquivo))
+        threading.Thread(target=importar, name="importar-catalogo", daemon=True).start()
+
+    def item_alterado(self, linha, chave):
+        """Chamado pela grade a cada edição: ajusta a soma só pela linha alterada."""
+        if chave in numeros.ColunasItens.CHAVES:
+            self.soma_itens.atualizar(linha, self.grade_itens.valores[linha])
+            self.agendar_preview_total()
+
+    def adicionar_linhas_itens(self, quantidade=1):
+        self.montar_grade_itens().adicionar_linhas(quantidade)
+        self.grade_itens.mostrar_linha(self.grade_itens.quantidade - 1)
+        self.log("Itens: %d linha(s).", self.grade_itens.quantidade)
+
+    def agendar_preview_total(self):
+        """Redesenha o preview quando a digitação para (uma vez por rajada de teclas)."""
+        if self._preview_agendado is not None:
+            self.root.after_cancel(self._preview_agendado)
+        self._preview_agendado = self.root.after(AGUARDO_PREVIEW_MS, self.mostrar_preview_total)
+
+    def mostrar_preview_total(self):
+        """Mostra a soma mantida em soma_itens (sem reler os itens)."""
+        self._preview_agendado = None
+        total_formatado = numeros.formatar_br(self.soma_itens.soma())
+        self.label_total_preview.config(text=f"Total Estimado (F35): R$ {total_formatado}")
+        agora = time.monotonic()
+        if agora - self._ultimo_log_preview >= INTERVALO_LOG_PREVIEW:
+            self._ultimo_log_preview = agora
+            self.log("Preview total atualizado: R$ %s", total_formatado, nivel=logging.DEBUG)
 
-        self.log("Itens pré-carregados (22 linhas com estilos: alternadas '#f8f9fa'/'#ffffff', bordas, binds para preview total).")
+    def atualizar_preview_total(self, event=None):
+        """Recalcula a soma de todos os itens (após carregar o modelo) e atualiza o preview."""
+        try:
+            self.soma_itens.recarregar(motor.normalizar_item(item) for item in self.grade_itens.itens())
+            self.mostrar_preview_total()
+        except Exception as e:
+            self.log("Erro no preview total: %s", e, nivel=logging.ERROR)
+            self.label_total_preview.config(text="Total Estimado (F35): R$ 0,00")
 
     def selecionar_pasta(self, entry):
         pasta = filedialog.askdirectory()
         if pasta:
             entry.delete(0, tk.END)
             entry.insert(0, pasta)
-            self.log(f"Pasta selecionada: {pasta}")
+            self.log("Pasta selecionada: %s", pasta)
 
     def selecionar_arquivo(self, entry):
         pasta = self.pasta_selecionada.get()
@@ -582,120 +635,85 @@ class Automatizador:
             entry.delete(0, tk.END)
             entry.insert(0, nome_arquivo)
             self.arquivo_selecionado.set(nome_arquivo)
-            self.log(f"Arquivo selecionado: {nome_arquivo}. Carregando valores do modelo...")
+            self.log("Arquivo selecionado: %s. Carregando valores do modelo...", nome_arquivo)
             self.carregar_valores_modelo(arquivo)
 
-    def obter_valor_real_celula(self, ws, celula):
-        """Obtém valor real da célula (ignora fórmulas vazias)."""
-        try:
-            cel = ws[celula]
-            if cel is None:
-                return ""
-            valor = cel.value
-            if valor is None:
-                return ""
-            valor_str = str(valor).strip()
-            if not valor_str:
-                return ""
-            return valor_str
-        except Exception as e:
-            self.log(f"Erro ao obter valor de {celula}: {e}")
-            return ""
+    @staticmethod
+    def valor_real(valor):
+        """Texto do valor lido do modelo ('' para célula vazia)."""
+        return motor.valor_texto(valor)
 
     def extrair_numero_a5(self, valor_a5):
         """Extrai número de A5 (ex: 'N° do Orçamento 5' → 5). Fallback 1 se inválido."""
         if not valor_a5:
-            self.log("A5 vazio. Fallback para 1.")
+            self.log("A5 vazio. Fallback para 1.", nivel=logging.WARNING)
             return 1
-        try:
-            # Regex para extrair dígitos no final (flexível: 'Orçamento 5', 'N° 10', etc.)
-            match = re.search(r'\d+', valor_a5)
-            if match:
-                numero_extraido = int(match.group())
-                self.log(f"Número extraído de A5 '{valor_a5}': {numero_extraido}")
-                return numero_extraido
-            else:
-                self.log(f"A5 sem número válido '{valor_a5}'. Fallback para 1.")
-                return 1
-        except ValueError:
-            self.log(f"Erro extrair número de A5 '{valor_a5}'. Fallback para 1.")
+        numero_extraido = motor.extrair_numero(valor_a5)
+        if numero_extraido is None:
+            self.log("A5 sem número válido '%s'. Fallback para 1.", valor_a5, nivel=logging.WARNING)
             return 1
+        self.log("Número extraído de A5 '%s': %s", valor_a5, numero_extraido, nivel=TRACE)
+        return numero_extraido
 
     def carregar_valores_modelo(self, caminho_arquivo):
         """Carrega valores: preto para B36/B37/B39; cinza para fixos/itens. Extrai A5 para auto-incremento."""
         try:
-            wb = load_workbook(caminho_arquivo)
-            ws = wb.active
+            # Só as células do mapa, lidas em streaming até a última linha mapeada (em cache)
+            mapa, valores = motor.inspecionar_modelo(caminho_arquivo)
 
             # NOVA PARTE: Extrai número de A5 para auto-incremento
-            valor_a5 = self.obter_valor_real_celula(ws, 'A5')
+            valor_a5 = self.valor_real(valores.get(mapa.numero))
             numero_a5 = self.extrair_numero_a5(valor_a5)
             
-            # Carrega de JSON (se existir) e usa o MAIOR (persistência + modelo)
-            try:
-                if os.path.exists(self.config_file):
-                    with open(self.config_file, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                        numero_json = int(config.get('proximo_numero', 1))
-                        proximo_numero = max(numero_a5 + 1, numero_json)  # Usa o maior
-                        self.log(f"A5: {numero_a5} (JSON: {numero_json}) → Próximo: {proximo_numero}")
-                else:
-                    proximo_numero = numero_a5 + 1
-                    self.log(f"A5: {numero_a5} (sem JSON) → Próximo: {proximo_numero}")
-            except Exception as json_err:
-                proximo_numero = numero_a5 + 1
-                self.log(f"Erro JSON em carregamento: {json_err}. Usando A5 +1: {proximo_numero}")
-            
+            # Usa o MAIOR entre A5 +1 e config.json (atualiza o JSON sob trava)
+            proximo_numero = self.salvar_numero_config(numero_a5 + 1)
+            self.log("A5: %s → Próximo: %s", numero_a5, proximo_numero)
             self.numero_orcamento.set(str(proximo_numero))
-            self.salvar_numero_config(proximo_numero)  # Salva/atualiza JSON
-            print(f"DEBUG A5: Extraído {numero_a5} de '{valor_a5}' → UI/JSON definido para {proximo_numero}")
 
             # Force update visual
             self.entry_numero.delete(0, tk.END)
             self.entry_numero.insert(0, str(proximo_numero))
             self.entry_numero.update_idletasks()
 
+            rastrear = logger.isEnabledFor(TRACE)  # rastreio por célula: desligado por padrão
+
             # Campos fixos B6-B9: placeholders cinza
             for campo in self.campos_fixos:
-                valor_modelo = self.obter_valor_real_celula(ws, campo['celula_fixa'])
+                valor_modelo = self.valor_real(valores.get(mapa.celula(campo['chave'])))
                 if valor_modelo:
                     entry = campo['entry']
                     entry.set_placeholder(valor_modelo)
-                    self.log(f"Campo fixo '{campo['titulo']}' carregado como placeholder cinza: {valor_modelo}")
-                else:
-                    self.log(f"Campo fixo '{campo['titulo']}' vazio, mantendo placeholder cinza.")
+                    if rastrear:
+                        self.log("Campo fixo '%s' carregado como placeholder cinza: %s", campo['titulo'], valor_modelo, nivel=TRACE)
+                elif rastrear:
+                    self.log("Campo fixo '%s' vazio, mantendo placeholder cinza.", campo['titulo'], nivel=TRACE)
 
             # Campos adicionais B36/B37/B39: preto se presente, cinza se vazio
             for campo in self.campos_adicionais:
-                valor_modelo = self.obter_valor_real_celula(ws, campo['celula'])
+                valor_modelo = self.valor_real(valores.get(mapa.celula(campo['chave'])))
                 entry = campo['entry']
                 if valor_modelo:
                     entry.set_real_value(valor_modelo)  # Preto
-                    self.log(f"Campo adicional '{campo['titulo']}' carregado como real preto: {valor_modelo}")
+                    if rastrear:
+                        self.log("Campo adicional '%s' carregado como real preto: %s", campo['titulo'], valor_modelo, nivel=TRACE)
                 else:
                     entry.set_placeholder(campo['placeholder_default'])  # Cinza
-                    self.log(f"Campo adicional '{campo['titulo']}' vazio, placeholder cinza.")
-
-            # Itens A13-F34: placeholders cinza
-            for i, item in enumerate(self.itens_widgets):
-                linha = 13 + i
-                if linha > 34:
-                    break
-                colunas = [('item', 'A'), ('desc', 'B'), ('quant', 'C'), ('und', 'D'), ('vlr_uni', 'E'), ('total', 'F')]
-                for key, col in colunas:
-                    celula = f"{col}{linha}"
-                    valor_modelo = self.obter_valor_real_celula(ws, celula)
-                    widget = item[key]
+                    if rastrear:
+                        self.log("Campo adicional '%s' vazio, placeholder cinza.", campo['titulo'], nivel=TRACE)
+
+            # Itens (bloco detectado no modelo, A13-F34 no padrão): placeholders cinza, de uma vez
+            placeholders = {}
+            for i, refs in enumerate(mapa.linhas_itens(mapa.capacidade)[:mapa.capacidade]):
+                for (key, _), celula in zip(mapa.colunas_itens, refs):
+                    valor_modelo = self.valor_real(valores.get(celula))
                     if valor_modelo:
-                        if isinstance(widget, TextWithPlaceholder):
-                            widget.set_placeholder(valor_modelo)
-                        else:
-                            widget.set_placeholder(valor_modelo)
-                        self.log(f"Item {i+1} {key.upper()} carregado como placeholder cinza em {celula}: {valor_modelo}")
-                    else:
-                        self.log(f"Item {i+1} {key.upper()} vazio, mantendo placeholder cinza.")
-
-            wb.close()
+                        placeholders.setdefault(i, {})[key] = valor_modelo
+                        if rastrear:
+                            self.log("Item %s %s carregado como placeholder cinza em %s: %s", i + 1, key.upper(), celula, valor_modelo, nivel=TRACE)
+                    elif rastrear:
+                        self.log("Item %s %s vazio, mantendo placeholder cinza.", i + 1, key.upper(), nivel=TRACE)
+            self.montar_grade_itens().definir_placeholders(placeholders)
+
             self.log("Valores carregados (preto B36/B37/B39 se presentes; cinza fixos/itens). A5 processado para auto-incremento.")
 
             # Atualiza UI e preview após carregamento
@@ -703,9 +721,9 @@ class Automatizador:
             self.root.after(300, self.atualizar_preview_total)  # Preview após load
 
         except Exception as e:
-            self.log(f"Erro ao carregar modelo: {e}")
+            self.log("Erro ao carregar modelo: %s", e, nivel=logging.ERROR)
             import traceback
-            self.log(f"Traceback: {traceback.format_exc()}")
+            self.log("Traceback: %s", traceback.format_exc(), nivel=logging.ERROR)
             messagebox.showerror("Erro", f"Falha ao carregar .xlsx: {e}")
 
     def atualizar_campos_automaticos(self):
@@ -714,15 +732,9 @@ class Automatizador:
             for campo in self.campos_fixos + self.campos_adicionais:
                 entry = campo['entry']
                 entry.event_generate("<FocusOut>")
-            for item in self.itens_widgets:
-                for key in item:
-                    widget = item[key]
-                    widget.event_generate("<FocusOut>")
-            self.canvas_itens.update_idletasks()
-            self.canvas_itens.configure(scrollregion=self.canvas_itens.bbox("all"))
-            self.log("UI atualizada após carregamento do modelo (placeholders aplicados, scroll ajustado).")
+            self.log("UI atualizada após carregamento do modelo (placeholders aplicados, scroll ajustado).", nivel=logging.DEBUG)
         except Exception as e:
-            self.log(f"Erro atualizar campos automáticos: {e}")
+            self.log("Erro atualizar campos automáticos: %s", e, nivel=logging.ERROR)
 
     def forcar_atualizacao_ui(self):
         """Força update visual (mantém estilos)."""
@@ -732,235 +744,111 @@ class Automatizador:
                 entry.update()
                 entry.event_generate("<FocusOut>")
             
-            for item in self.itens_widgets:
-                for key in item:
-                    widget = item[key]
-                    widget.update()
-                    widget.event_generate("<FocusOut>")
-                    if hasattr(widget, 'see'):
-                        widget.see(tk.END)
-            
             self.canvas_principal.update_idletasks()
             self.canvas_principal.configure(scrollregion=self.canvas_principal.bbox("all"))
-            self.canvas_itens.update_idletasks()
-            self.canvas_itens.configure(scrollregion=self.canvas_itens.bbox("all"))
             
             self.atualizar_preview_total()  # Atualiza preview após UI
             
-            self.log("UI forçada (estilos preservados, preview total atualizado).")
+            self.log("UI forçada (estilos preservados, preview total atualizado).", nivel=logging.DEBUG)
         except Exception as e:
-            self.log(f"Erro forçar UI: {e}")
+            self.log("Erro forçar UI: %s", e, nivel=logging.ERROR)
 
-    def copiar_imagens_completo(self, ws_original, ws_copia):
-        """Copia imagens usando openpyxl (preserva no Excel)."""
-        imagens_detectadas = 0
-        imagens_copiadas = 0
+    def calcular_valor_total(self, itens=None):
+        """Soma de F dos itens (núcleo numérico do motor; formato BR)."""
         try:
-            if hasattr(ws_original, '_images') and ws_original._images:
-                imagens_detectadas += len(ws_original._images)
-            if hasattr(ws_original, '_drawings') and ws_original._drawings:
-                imagens_detectadas += len(ws_original._drawings)
-            self.log(f"{imagens_detectadas} imagem(ns)/drawing(s) detectada(s).")
-
-            if imagens_detectadas == 0:
-                self.log("Nenhuma imagem. Fallback ZIP se necessário.")
-                return
-
-            # Copia _images
-            if hasattr(ws_original, '_images') and ws_original._images:
-                for img in ws_original._images:
-                    try:
-                        nova_img = Image()
-                        if hasattr(img, 'anchor'):
-                            nova_img.anchor = img.anchor
-                        if hasattr(img, 'width') and hasattr(img, 'height'):
-                            nova_img.width = img.width
-                            nova_img.height = img.height
-                        if hasattr(img, '_data'):
-                            nova_img._data = img._data
-                        ws_copia.add_image(nova_img, str(img.anchor))
-                        imagens_copiadas += 1
-                    except Exception as img_err:
-                        self.log(f"Aviso copiar imagem: {img_err}. Fallback ZIP.")
-                self.log(f"{imagens_copiadas} imagem(ns) copiadas via _images.")
-
-            # Copia _drawings
-            drawings_copiados = 0
-            if hasattr(ws_original, '_drawings') and ws_original._drawings:
-                drawing_copia = SpreadsheetDrawing()
-                for dr in ws_original._drawings:
-                    try:
-                        drawing_copia.add_drawing(dr)
-                        drawings_copiados += 1
-                    except Exception as dr_err:
-                        self.log(f"Aviso copiar drawing: {dr_err}.")
-                if drawings_copiados > 0:
-                    ws_copia._drawings = [drawing_copia]
-                    imagens_copiadas += drawings_copiados
-                    self.log(f"{drawings_copiados} drawing(s) copiados.")
-
-            self.log(f"Total {imagens_copiadas} imagens/desenhos copiadas (fallback ZIP se detectadas).")
-
-        except Exception as e:
-            self.log(f"Erro openpyxl imagens: {e}. Fallback ZIP.")
-
-    def fallback_zip_imagens(self, arquivo_original, arquivo_copia):
-        """Fallback: Re-insere mídia via ZIP."""
-        midia_reinserida = 0
-        try:
-            if not os.path.exists(arquivo_original):
-                self.log("Fallback ZIP: Original não encontrado.")
-                return 0
-
-            with zipfile.ZipFile(arquivo_original, 'r') as zip_orig:
-                arquivos_media = [f for f in zip_orig.namelist() if f.startswith('xl/media/') and f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.emf'))]
-                self.log(f"Fallback ZIP: {len(arquivos_media)} mídia(s) detectada(s).")
-
-                if not arquivos_media:
-                    return 0
-
-                temp_dir = 'temp_media'
-                os.makedirs(temp_dir, exist_ok=True)
-
-                for media_file in arquivos_media:
-                    zip_orig.extract(media_file, temp_dir)
-                    self.log(f"Fallback ZIP: Extraído {os.path.basename(media_file)}.")
-
-                with zipfile.ZipFile(arquivo_copia, 'a') as zip_copia:
-                    for media_file in arquivos_media:
-                        temp_path = os.path.join(temp_dir, media_file.replace('xl/media/', ''))
-                        if os.path.exists(temp_path):
-                            zip_copia.write(temp_path, media_file)
-                            midia_reinserida += 1
-                            self.log(f"Fallback ZIP: Re-inserido {os.path.basename(media_file)}.")
-
-                shutil.rmtree(temp_dir)
-                self.log(f"Fallback ZIP: {midia_reinserida} mídia(s) re-inseridas.")
-
-        except Exception as zip_err:
-            self.log(f"Aviso fallback ZIP: {zip_err}.")
-            if os.path.exists('temp_media'):
-                shutil.rmtree('temp_media')
-
-        return midia_reinserida
-
-    def calcular_valor_total(self, itens):
-        """Calcula soma F13-F34 (formato BR)."""
-        total_soma = 0.0
-        itens_contados = 0
-        try:
-            for i, item in enumerate(itens):
-                valor_total_str = item['total'].get_value()
-                if valor_total_str and valor_total_str != "0,00":
-                    valor_limpo = valor_total_str.replace('.', '').replace(',', '.')
-                    try:
-                        total_num = float(valor_limpo)
-                        total_soma += total_num
-                        itens_contados += 1
-                    except ValueError:
-                        self.log(f"Aviso: Total inválido item {i+1}: {valor_total_str}.")
-            total_formatado = f"{total_soma:,.2f}".replace('.', 'X').replace(',', '.').replace('X', ',')
-            self.log(f"F35 calculado: {total_formatado} (soma {itens_contados} itens).")
+            total_formatado = motor.calcular_total(self.grade_itens.itens() if itens is None else itens)
+            self.log("F35 calculado: %s.", total_formatado, nivel=logging.DEBUG)
             return total_formatado
         except Exception as e:
-            self.log(f"Erro cálculo F35: {e}")
+            self.log("Erro cálculo F35: %s", e, nivel=logging.ERROR)
             return "0,00"
 
-    def aplicar_valores(self, ws_copia, proximo_numero):
-        """Aplica valores na cópia (editados/reais; F35 calculado)."""
-        try:
-            # A5: Usa número atual da UI (baseado em A5 do modelo + incrementos)
-            ws_copia['A5'] = f"N° do Orçamento {proximo_numero}"
-            self.log(f"A5 aplicado na cópia: N° do Orçamento {proximo_numero} (baseado em modelo +1)")
+    def coletar_registro(self):
+        """Lê os campos da UI no formato de registro do motor (mesmo usado no lote)."""
+        registro = {}
+        for campo in self.campos_fixos + self.campos_adicionais:
+            registro[campo['chave']] = campo['entry'].get_value()
+        registro['itens'] = self.montar_grade_itens().itens()
+        return registro
 
-            # Fixos B6-B9: só editados
-            for campo in self.campos_fixos:
-                valor = campo['entry'].get_value()
-                if valor:
-                    ws_copia[campo['celula_fixa']] = valor
-                    self.log(f"Fixo '{campo['titulo']}' aplicado {campo['celula_fixa']}: {valor}")
-                else:
-                    ws_copia[campo['celula_fixa']] = ""
-                    self.log(f"Fixo '{campo['titulo']}' em branco (não editado).")
+    def aplicar_valores(self, registro, proximo_numero, mapa=motor.MAPA_PADRAO):
+        """Monta {célula: valor} para a cópia (editados/reais; F35 calculado).
 
-            # Adicionais B36/B37/B39: real/editado
-            for campo in self.campos_adicionais:
-                valor = campo['entry'].get_value()
-                if valor:
-                    ws_copia[campo['celula']] = valor
-                    self.log(f"Adicional '{campo['titulo']}' aplicado {campo['celula']}: {valor}")
-                else:
-                    ws_copia[campo['celula']] = ""
-                    self.log(f"Adicional '{campo['titulo']}' em branco (não editado).")
-
-            # Itens A13-F34: só editados
-            for i, item in enumerate(self.itens_widgets):
-                linha = 13 + i
-                if linha > 34:
-                    break
-                colunas = [('item', 'A'), ('desc', 'B'), ('quant', 'C'), ('und', 'D'), ('vlr_uni', 'E'), ('total', 'F')]
-                for key, col in colunas:
-                    valor = item[key].get_value()
+        Itens além do bloco do modelo ganham linhas novas; total e B36-B39 descem junto.
+        """
+        try:
+            celulas = motor.celulas_do_registro(registro, proximo_numero, mapa)
+            if logger.isEnabledFor(TRACE):  # rastreio por célula: desligado por padrão
+                for celula, valor in celulas.items():
                     if valor:
-                        celula = f"{col}{linha}"
-                        ws_copia[celula] = valor
-                        self.log(f"Item {i+1} {key.upper()} aplicado {celula}: {valor}")
-                    else:
-                        celula = f"{col}{linha}"
-                        ws_copia[celula] = ""
-                        self.log(f"Item {i+1} {key.upper()} em branco (não editado).")
-
-            # F35: Calculado
-            total_f35 = self.calcular_valor_total(self.itens_widgets)
-            ws_copia['F35'] = total_f35
-            self.log(f"F35 aplicado: {total_f35} (recalculado).")
-
+                        self.log("%s aplicado: %s", celula, valor, nivel=TRACE)
+            self.log("A5 aplicado na cópia: %s (baseado em modelo +1)", celulas[mapa.numero])
+            extras = max(0, len(registro.get('itens') or []) - mapa.capacidade)
+            celula_total = mapa.deslocar(mapa.celula_total, extras)
+            self.log("%s aplicado: %s (recalculado).", celula_total, motor.formatar_numero_br(celulas[celula_total]))
             self.log("Valores aplicados (editados/reais; F35 calculado).")
+            return celulas
 
         except Exception as e:
-            self.log(f"Erro aplicar valores: {e}")
+            self.log("Erro aplicar valores: %s", e, nivel=logging.ERROR)
             import traceback
-            self.log(f"Traceback: {traceback.format_exc()}")
+            self.log("Traceback: %s", traceback.format_exc(), nivel=logging.ERROR)
             raise
 
-    def gerar_pdf(self, caminho_arquivo):
-        """Gera PDF via pywin32 (Windows)."""
-        if not PDF_SUPORTE:
-            self.log("PDF desabilitado (pywin32).")
-            return None
+    def gerar_pdf(self, caminho_arquivo, caminho_modelo=None, celulas=None, insercao=None):
+        """Enfileira o PDF na fila em segundo plano (conversor persistente). Retorna Future ou None.
+
+        Sem Excel/LibreOffice, desenha o PDF com o renderizador nativo (layout do modelo).
+        """
+        # PDF via Excel (Windows) ou LibreOffice headless (Linux/macOS), em segundo plano;
+        # sem nenhum dos dois, o renderizador nativo (pdf_nativo) desenha o PDF direto
+        if not pdf.suporte_pdf():
+            if caminho_modelo is None or celulas is None:
+                self.log("PDF desabilitado (sem Excel/pywin32 ou LibreOffice).")
+                return None
+            futuro = Future()
+            try:
+                caminho_pdf = os.path.splitext(caminho_arquivo)[0] + ".pdf"
+                futuro.set_result(motor.gerar_pdf_nativo(caminho_modelo, celulas, caminho_pdf, insercao))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
         try:
-            excel = win32.Dispatch("Excel.Application")
-            excel.Visible = False
-            excel.DisplayAlerts = False
-            wb = excel.Workbooks.Open(os.path.abspath(caminho_arquivo))
-            ws = wb.ActiveSheet
-            pasta_pdf = os.path.dirname(caminho_arquivo)
-            nome_base = os.path.splitext(os.path.basename(caminho_arquivo))[0]
-            pdf_caminho = os.path.join(pasta_pdf, f"{nome_base}.pdf")
-            self.log(f"Gerando PDF: {pdf_caminho}")
-            ws.ExportAsFixedFormat(0, pdf_caminho)  # 0 = PDF
-            wb.Close(SaveChanges=False)
-            excel.Quit()
-            self.log("PDF gerado.")
-            return pdf_caminho
+            if self.fila_pdf is None:
+                self.fila_pdf = pdf.FilaPDF(log=logger.error)
+                self.log("Fila de PDF iniciada (%s).", self.fila_pdf.conversor.nome)
+            futuro = self.fila_pdf.submeter(caminho_arquivo)
+            self.log("PDF enfileirado: %s", os.path.basename(caminho_arquivo))
+            return futuro
         except Exception as e:
-            self.log(f"Erro PDF: {e}")
-            import traceback
-            self.log(f"Traceback PDF: {traceback.format_exc()}")
-            if 'excel' in locals():
-                try:
-                    excel.Quit()
-                except:
-                    pass
+            self.log("Erro PDF: %s", e, nivel=logging.ERROR)
             return None
 
-    def executar(self):
-        """Executa criação (cópia, valores, imagens, PDF, persistência)."""
-        self.botao_criar.config(state='disabled')
-        self.botao_criar.configure(text="⏳ Processando...")
-        self.root.update_idletasks()  # Loading visual
-        self.log("Iniciando criação...")
+    def acompanhar_pdf(self, futuro, nome_arquivo):
+        """Verifica o Future do PDF pelo loop do Tk (sem bloquear a interface)."""
+        if not futuro.done():
+            self.root.after(200, lambda: self.acompanhar_pdf(futuro, nome_arquivo))
+            return
+        erro = futuro.exception()
+        if erro:
+            self.log("PDF não gerado para %s: %s (gere manualmente no Excel).", nome_arquivo, erro, nivel=logging.WARNING)
+        else:
+            self.log("PDF gerado: %s", os.path.basename(futuro.result()))
+
+    def fechar(self):
+        """Cancela a geração em andamento, encerra a fila de PDF (converte o pendente) e fecha a janela."""
+        if self.thread_geracao is not None and self.thread_geracao.is_alive():
+            self.cancelamento.set()
+            self.thread_geracao.join()
+        if self.fila_pdf is not None:
+            self.log("Aguardando PDFs pendentes...")
+            self.fila_pdf.fechar(esperar=True)
+        self.root.destroy()
 
+    def executar(self):
+        """Valida e lê os campos (thread do Tk) e dispara a geração numa thread de trabalho."""
+        if self.thread_geracao is not None and self.thread_geracao.is_alive():
+            return
         try:
             pasta = self.pasta_selecionada.get()
             if not pasta:
@@ -971,85 +859,213 @@ class Automatizador:
             caminho_completo = os.path.join(pasta, arquivo_modelo)
             if not os.path.exists(caminho_completo):
                 raise FileNotFoundError(f"Arquivo não encontrado: {caminho_completo}")
+            # Widgets só podem ser lidos na thread do Tk: o registro segue pronto para a thread
+            registro = self.coletar_registro()
+            numero_minimo = int(self.numero_orcamento.get())
+        except Exception as e:
+            self.log("Erro execução: %s", e, nivel=logging.ERROR)
+            messagebox.showerror("Erro!", f"Falha na criação: {e}\n\nLogs no terminal para detalhes.")
+            return
 
-            proximo_numero = int(self.numero_orcamento.get())
-            nome_base = os.path.splitext(arquivo_modelo)[0]
-            novo_arquivo = f"{nome_base}_copia_{proximo_numero}.xlsx"
-            novo_caminho = os.path.join(pasta, novo_arquivo)
-
-            self.log(f"Copiando para {novo_arquivo}...")
-            shutil.copy2(caminho_completo, novo_caminho)
-            self.log("Arquivo copiado.")
-
-            wb_copia = load_workbook(novo_caminho)
-            ws_copia = wb_copia.active
-            wb_original = load_workbook(caminho_completo)
-            ws_original = wb_original.active
-
-            self.copiar_imagens_completo(ws_original, ws_copia)
-
-            self.aplicar_valores(ws_copia, proximo_numero)
-
-            wb_copia.save(novo_caminho)
-            self.log("Cópia salva.")
-
-            imagens_detectadas = (hasattr(ws_original, '_images') and len(ws_original._images) > 0) or (hasattr(ws_original, '_drawings') and len(ws_original._drawings) > 0)
-            if imagens_detectadas:
-                self.fallback_zip_imagens(caminho_completo, novo_caminho)
+        self.log("Iniciando criação...")
+        self.botao_criar.config(state='disabled')
+        self.botao_criar.configure(text="⏳ Processando...")
+        self.botao_cancelar.config(state='normal')
+        self.barra_progresso['value'] = 0
+        self.label_progresso.config(text="Iniciando...")
+
+        self.cancelamento = threading.Event()
+        self.eventos_geracao = queue.Queue()
+        self.thread_geracao = threading.Thread(
+            target=self.gerar_em_segundo_plano, name="geracao-orcamento", daemon=True,
+            args=(pasta, arquivo_modelo, registro, numero_minimo, self.cancelamento, self.eventos_geracao))
+        self.thread_geracao.start()
+        self.root.after(50, self.processar_eventos_geracao)
+
+    def cancelar_geracao(self):
+        """Pede o cancelamento; a thread para na próxima etapa e remove a cópia parcial."""
+        if self.thread_geracao is not None and self.thread_geracao.is_alive():
+            self.cancelamento.set()
+            self.botao_cancelar.config(state='disabled')
+            self.label_progresso.config(text="Cancelando...")
+            self.log("Cancelamento solicitado.")
+
+    def gerar_em_segundo_plano(self, pasta, arquivo_modelo, registro, numero_minimo, cancelamento, eventos):
+        """Thread de trabalho: reserva o número, grava a cópia e dispara o PDF.
+
+        Não toca em widgets; progresso e resultado vão pela fila 'eventos', lida pelo
+        loop do Tk em processar_eventos_geracao.
+        """
+        def progresso(percentual, texto):
+            eventos.put(('progresso', percentual, texto))
+
+        def verificar_cancelamento():
+            if cancelamento.is_set():
+                raise GeracaoCancelada()
+
+        caminho_completo = os.path.join(pasta, arquivo_modelo)
+        novo_caminho = None
+        proximo_numero = None
+        perfil = Perfil('orcamento')
+        situacao = 'erro'
+        try:
+            with perfil:
+                progresso(5, "Reservando número...")
+                verificar_cancelamento()
+                # Reserva o número (nunca repete entre operadores/lotes simultâneos)
+                with perfil.etapa('numero'):
+                    proximo_numero = self.alocador.reservar(1, minimo=numero_minimo).start
+                nome_base = os.path.splitext(arquivo_modelo)[0]
+                novo_arquivo = motor.nome_copia(nome_base, proximo_numero)
+
+                progresso(20, "Carregando modelo...")
+                # Modelo lido uma vez e mantido em cache (recarrega só se o arquivo mudar);
+                # modo XML reescreve só a planilha e copia imagens/estilos byte a byte
+                with perfil.etapa('modelo'):
+                    modelo = motor.obter_modelo(caminho_completo)
+                with perfil.etapa('aplicar'):
+                    celulas = self.aplicar_valores(registro, proximo_numero, modelo.mapa)
+                    insercao = modelo.mapa.insercao(len(registro['itens']))
+                if insercao:
+                    self.log("%d linha(s) de itens inseridas a partir da linha %d.", insercao[1], insercao[0])
+                verificar_cancelamento()
+
+                progresso(50, f"Gravando {novo_arquivo}...")
+                novo_caminho = os.path.join(pasta, novo_arquivo)
+                with perfil.etapa('salvar'):
+                    gravadas = modelo.salvar_copia(celulas, novo_caminho, insercao)
+                self.log("Cópia salva: %s (%s célula(s) gravadas).", novo_arquivo, gravadas)
+                verificar_cancelamento()
+
+                # PDF: fila em segundo plano (conversor) ou nativo; a partir daqui não cancela mais
+                progresso(80, "Gerando PDF...")
+                with perfil.etapa('pdf'):
+                    pdf_futuro = self.gerar_pdf(novo_caminho, caminho_completo, celulas, insercao)
+                with perfil.etapa('banco'):
+                    self.registrar_no_banco(registro, proximo_numero, novo_caminho, caminho_completo,
+                                            pdf_futuro is not None)
+                # Persistência: a reserva já gravou o +1 em config.json
+                with perfil.etapa('numero'):
+                    proximo = self.alocador.ler()
+
+            situacao = 'ok'
+            self.log("Etapas: %s", perfil.resumo())
+            progresso(100, "Concluído.")
+            eventos.put(('concluido', {
+                'pasta': pasta, 'novo_arquivo': novo_arquivo, 'numero': proximo_numero,
+                'proximo': proximo, 'pdf_futuro': pdf_futuro, 'etapas': perfil.resumo(),
+            }))
+        except GeracaoCancelada:
+            situacao = 'cancelado'
+            self._remover_copia_parcial(novo_caminho)
+            eventos.put(('cancelado',))
+        except Exception as e:
+            import traceback
+            self.log("Traceback: %s", traceback.format_exc(), nivel=logging.ERROR)
+            self._remover_copia_parcial(novo_caminho)
+            eventos.put(('erro', e))
+        finally:
+            self.salvar_metricas(perfil, situacao=situacao, numero=proximo_numero, modelo=arquivo_modelo)
 
-            wb_original.close()
+    def salvar_metricas(self, perfil, **extras):
+        """Acrescenta as etapas medidas a metricas.jsonl; falha aqui só gera aviso."""
+        try:
+            perfil.salvar(self.arquivo_metricas, **extras)
+            for arquivo in perfil.arquivos:
+                self.log("Perfil gravado: %s", arquivo)
+        except Exception as e:
+            self.log("Métricas não gravadas em %s: %s", self.arquivo_metricas, e, nivel=logging.WARNING)
 
-            self.log("Gerando PDF...")
-            pdf_caminho = self.gerar_pdf(novo_caminho)
+    def registrar_no_banco(self, registro, numero, caminho_xlsx, caminho_modelo, com_pdf):
+        """Grava o orçamento no banco local; falha aqui só gera aviso (a cópia já existe)."""
+        try:
+            caminho_pdf = os.path.splitext(caminho_xlsx)[0] + ".pdf" if com_pdf else None
+            self.banco.registrar(registro, numero, caminho_xlsx, caminho_pdf, caminho_modelo)
+            self.clientes.aprender(registro)
+            self.log("Orçamento %s registrado em %s.", numero, os.path.basename(self.banco.caminho), nivel=logging.DEBUG)
+        except Exception as e:
+            self.log("Orçamento %s não registrado no banco: %s", numero, e, nivel=logging.WARNING)
 
-            # Persistência: +1 ao usado e salva JSON
-            novo_proximo = proximo_numero + 1
-            self.log(f"Incrementando A5: de {proximo_numero} para {novo_proximo}")
-            self.numero_orcamento.set(str(novo_proximo))
-            self.salvar_numero_config(novo_proximo)
-            
-            # Force update visual
-            self.entry_numero.delete(0, tk.END)
-            self.entry_numero.insert(0, str(novo_proximo))
-            self.entry_numero.update_idletasks()
-            print(f"DEBUG A5: UI atualizado para {novo_proximo} após +1")
+    def _remover_copia_parcial(self, caminho):
+        if caminho and os.path.exists(caminho):
+            os.remove(caminho)
+            self.log("Cópia falha removida.")
 
-            self.log(f"Cópia criada: {novo_arquivo} (A5: {proximo_numero}, F35 calculado, imagens OK).")
-            if pdf_caminho:
-                self.log(f"PDF: {os.path.basename(pdf_caminho)}")
-                mensagem = f"✅ Cópia criada: {novo_arquivo}\n📄 PDF gerado: {os.path.basename(pdf_caminho)}\n📁 Pasta: {pasta}\n🔢 A5 usado: {proximo_numero} | Próximo: {novo_proximo}\n💾 Salvo em config.json"
+    def processar_eventos_geracao(self):
+        """Aplica na UI os eventos da thread de geração (chamado via root.after)."""
+        while True:
+            try:
+                evento = self.eventos_geracao.get_nowait()
+            except queue.Empty:
+                break
+            tipo = evento[0]
+            if tipo == 'progresso':
+                self.barra_progresso['value'] = evento[1]
+                self.label_progresso.config(text=evento[2])
+                continue
+            self.finalizar_geracao()
+            if tipo == 'concluido':
+                self.geracao_concluida(evento[1])
+            elif tipo == 'cancelado':
+                self.label_progresso.config(text="Cancelado.")
+                self.log("Criação cancelada (número reservado não será reutilizado).")
             else:
-                self.log("PDF não gerado (manual no Excel).")
-                mensagem = f"✅ Cópia criada: {novo_arquivo}\n(Gere PDF manualmente no Excel)\n📁 Pasta: {pasta}\n🔢 A5 usado: {proximo_numero} | Próximo: {novo_proximo}\n💾 Salvo em config.json"
+                self.label_progresso.config(text="Falhou.")
+                self.log("Erro execução: %s", evento[1], nivel=logging.ERROR)
+                messagebox.showerror("Erro!", f"Falha na criação: {evento[1]}\n\nLogs no terminal para detalhes.")
+            return
+        self.root.after(50, self.processar_eventos_geracao)
+
+    def geracao_concluida(self, resultado):
+        """Atualiza número e mostra o resumo (thread do Tk)."""
+        novo_arquivo, proximo_numero, novo_proximo = resultado['novo_arquivo'], resultado['numero'], resultado['proximo']
+        pdf_futuro = resultado['pdf_futuro']
+        self.log("Incrementando A5: de %s para %s", proximo_numero, novo_proximo)
+        self.numero_orcamento.set(str(novo_proximo))
+
+        # Force update visual
+        self.entry_numero.delete(0, tk.END)
+        self.entry_numero.insert(0, str(novo_proximo))
+
+        self.log("Cópia criada: %s (A5: %s, F35 calculado, imagens OK).", novo_arquivo, proximo_numero)
+        pasta = resultado['pasta']
+        if pdf_futuro:
+            self.acompanhar_pdf(pdf_futuro, novo_arquivo)
+            nome_pdf = os.path.splitext(novo_arquivo)[0] + ".pdf"
+            situacao_pdf = "PDF gerado" if pdf_futuro.done() and not pdf_futuro.exception() else "PDF em geração (segundo plano)"
+            mensagem = f"✅ Cópia criada: {novo_arquivo}\n📄 {situacao_pdf}: {nome_pdf}\n📁 Pasta: {pasta}\n🔢 A5 usado: {proximo_numero} | Próximo: {novo_proximo}\n💾 Salvo em config.json\n⏱ {resultado['etapas']}"
+        else:
+            self.log("PDF não gerado (manual no Excel).", nivel=logging.WARNING)
+            mensagem = f"✅ Cópia criada: {novo_arquivo}\n(Gere PDF manualmente no Excel)\n📁 Pasta: {pasta}\n🔢 A5 usado: {proximo_numero} | Próximo: {novo_proximo}\n💾 Salvo em config.json\n⏱ {resultado['etapas']}"
 
-            self.log("Processo concluído com sucesso!")
-            messagebox.showinfo("Sucesso!", mensagem)
+        self.log("Processo concluído com sucesso!")
+        messagebox.showinfo("Sucesso!", mensagem)
 
-            # App fica aberto para ver +1 (comente destroy se quiser fechar)
-            # self.root.destroy()
-            print("DEBUG A5: Verifique campo 'Número do Orçamento' agora em +1 (baseado em A5 do modelo)")
+        # App fica aberto para ver +1 (comente destroy se quiser fechar)
+        # self.root.destroy()
 
-        except Exception as e:
-            self.log(f"Erro execução: {e}")
-            import traceback
-            self.log(f"Traceback: {traceback.format_exc()}")
-            if 'novo_caminho' in locals() and os.path.exists(novo_caminho):
-                os.remove(novo_caminho)
-                self.log("Cópia falha removida.")
-            if 'pdf_caminho' in locals() and pdf_caminho and os.path.exists(pdf_caminho):
-                os.remove(pdf_caminho)
-                self.log("PDF falha removido.")
-            messagebox.showerror("Erro!", f"Falha na criação: {e}\n\nLogs no terminal para detalhes.")
-        finally:
-            self.botao_criar.config(state='normal')
-            self.botao_criar.configure(text="🚀 Criar Cópia do Orçamento e PDF" if PDF_SUPORTE else "💾 Criar Cópia do Orçamento (.xlsx apenas)")
-            self.root.update_idletasks()
-            self.log("Botão reabilitado. Pronto para nova operação.")
+    def finalizar_geracao(self):
+        self.thread_geracao = None
+        self.botao_cancelar.config(state='disabled')
+        self.botao_criar.config(state='normal')
+        self.botao_criar.configure(text="🚀 Criar Cópia do Orçamento e PDF")
+        self.log("Botão reabilitado. Pronto para nova operação.")
 
-def main():
+def main(argv=None):
     """Função principal: Cria janela e inicia app."""
+    parser = argparse.ArgumentParser(description="Automatizador de Orçamentos Excel")
+    parser.add_argument('--medir-inicio', action='store_true',
+                        help="Abre a janela, mostra o tempo até ficar interativa e fecha")
+    args = parser.parse_args(argv)
+
     root = tk.Tk()
     app = Automatizador(root)
+    root.protocol("WM_DELETE_WINDOW", app.fechar)
+    if args.medir_inicio:
+        def relatar(resumo):
+            print(" | ".join(f"{nome}: {valor:.0f}" for nome, valor in resumo.items()))
+            root.after_idle(app.fechar)
+        app.ao_concluir_inicio = relatar
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+"""Lista de sugestões (autocompletar) presa a um Entry do Tkinter.
+
+A cada tecla o texto do Entry vai para buscar(texto) (ex: CadastroClientes.sugestoes),
+e as sugestões aparecem numa lista logo abaixo do campo. Seta para baixo/cima navega,
+Enter ou clique escolhe (ao_escolher(sugestão)) e Esc fecha; com a lista fechada as
+teclas seguem para os bindings do próprio campo. A lista é uma única janela criada na
+primeira vez e reaproveitada.
+
+Com atraso (ms), a busca sai da thread do Tk: cada tecla reagenda a busca (debounce),
+que roda numa thread única compartilhada por todos os campos; o resultado volta pelo
+loop do Tk (after), e resultados de um texto que já mudou são descartados. Use para
+buscas que tocam disco (catálogo); buscas em memória (clientes) podem ficar síncronas.
+"""
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+# Teclas que não mudam o texto: não refazem a busca
+_TECLAS_NAVEGACAO = {'Up', 'Down', 'Return', 'KP_Enter', 'Escape', 'Tab', 'Shift_L', 'Shift_R',
+                     'Control_L', 'Control_R', 'Alt_L', 'Alt_R', 'Left', 'Right', 'Home', 'End'}
+INTERVALO_RESULTADO_MS = 20  # de quanto em quanto o loop do Tk confere a busca em segundo plano
+
+_executor = None
+
+
+def _executor_buscas():
+    """Thread única das buscas em segundo plano (criada na primeira busca)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autocompletar")
+    return _executor
+
+
+class Autocompletar:
+    """Sugestões por prefixo para um Entry; formatar(sugestão) dá o texto de cada linha.
+
+    atraso=None busca na hora, na thread do Tk; com atraso (ms) a busca é adiada até a
+    digitação parar e roda em segundo plano.
+    """
+
+    def __init__(self, entrada, buscar, ao_escolher, formatar=str, linhas=8, fonte=('Arial', 9), atraso=None):
+        self.entrada = entrada
+        self.buscar = buscar
+        self.ao_escolher = ao_escolher
+        self.formatar = formatar
+        self.linhas = linhas
+        self.fonte = fonte
+        self.atraso = atraso
+        self.sugestoes = []
+        self._janela = None
+        self._lista = None
+        self._agendada = None  # after() da próxima busca em segundo plano
+        self._pedido = 0       # nº da busca mais recente; resultados de pedidos anteriores são descartados
+        # Tag própria antes das do Entry: com a lista aberta, setas/Enter param aqui ('break')
+        # e não chegam a outros bindings do campo (ex.: navegação da grade de itens)
+        tag = f"Autocompletar{id(self)}"
+        entrada.bindtags((tag,) + entrada.bindtags())
+        entrada.bind_class(tag, '<KeyRelease>', self._ao_digitar)
+        entrada.bind_class(tag, '<Down>', lambda e: self._mover(1))
+        entrada.bind_class(tag, '<Up>', lambda e: self._mover(-1))
+        entrada.bind_class(tag, '<Return>', self._escolher_selecionada)
+        entrada.bind_class(tag, '<Escape>', lambda e: self.fechar())
+        entrada.bind_class(tag, '<FocusOut>', lambda e: entrada.after(150, self._fechar_sem_foco))
+
+    def _texto(self):
+        obter = getattr(self.entrada, 'get_value', None)  # EntryWithPlaceholder ignora o placeholder
+        return obter() if obter else self.entrada.get()
+
+    def _ao_digitar(self, event):
+        if event.keysym in _TECLAS_NAVEGACAO:
+            return
+        if self.atraso is None:
+            self._exibir(self.buscar(self._texto()))
+            return
+        self._cancelar()
+        self._agendada = self.entrada.after(self.atraso, self._buscar_em_segundo_plano)
+
+    def _buscar_em_segundo_plano(self):
+        self._agendada = None
+        pedido = self._pedido
+        texto = self._texto()
+        # Pedido superado enquanto esperava na fila: nem consulta
+        futuro = _executor_buscas().submit(lambda: self.buscar(texto) if pedido == self._pedido else [])
+        self.entrada.after(INTERVALO_RESULTADO_MS, lambda: self._receber(futuro, pedido))
+
+    def _receber(self, futuro, pedido):
+        """Confere a busca pelo loop do Tk; mostra o resultado só se ainda for o pedido atual."""
+        if pedido != self._pedido:
+            return
+        if not futuro.done():
+            self.entrada.after(INTERVALO_RESULTADO_MS, lambda: self._receber(futuro, pedido))
+            return
+        self._exibir([] if futuro.exception() else futuro.result())
+
+    def _cancelar(self):
+        """Descarta a busca agendada e a que estiver em andamento."""
+        self._pedido += 1
+        if self._agendada is not None:
+            self.entrada.after_cancel(self._agendada)
+            self._agendada = None
+
+    def _exibir(self, sugestoes):
+        self.sugestoes = sugestoes
+        if self.sugestoes:
+            self._mostrar()
+        else:
+            self.fechar()
+
+    def _criar_janela(self):
+        self._janela = tk.Toplevel(self.entrada)
+        self._janela.overrideredirect(True)
+        self._janela.withdraw()
+        self._lista = tk.Listbox(self._janela, font=self.fonte, activestyle='dotbox', exportselection=False)
+        self._lista.pack(fill='both', expand=True)
+        self._lista.bind('<ButtonRelease-1>', self._escolher_selecionada)
+
+    def _mostrar(self):
+        if self._janela is None:
+            self._criar_janela()
+        self._lista.delete(0, tk.END)
+        for sugestao in self.sugestoes:
+            self._lista.insert(tk.END, self.formatar(sugestao))
+        self._lista.config(height=min(self.linhas, len(self.sugestoes)))
+        x = self.entrada.winfo_rootx()
+        y = self.entrada.winfo_rooty() + self.entrada.winfo_height()
+        self._janela.geometry(f"{self.entrada.winfo_width()}x{self._lista.winfo_reqheight()}+{x}+{y}")
+        self._janela.deiconify()
+        self._janela.lift()
+
+    def _visivel(self):
+        return self._janela is not None and self._janela.winfo_viewable()
+
+    def _mover(self, delta):
+        if not self._visivel():
+            return None
+        atual = self._lista.curselection()
+        indice = (atual[0] + delta) if atual else (0 if delta > 0 else len(self.sugestoes) - 1)
+        indice = max(0, min(indice, len(self.sugestoes) - 1))
+        self._lista.selection_clear(0, tk.END)
+        self._lista.selection_set(indice)
+        self._lista.see(indice)
+        return 'break'  # não deixa a seta mover o foco para o próximo campo
+
+    def _escolher_selecionada(self, event=None):
+        if not self._visivel():
+            return None
+        selecionada = self._lista.curselection()
+        if not selecionada:
+            return None
+        sugestao = self.sugestoes[selecionada[0]]
+        self.fechar()
+        self.ao_escolher(sugestao)
+        self.entrada.focus_set()
+        return 'break'
+
+    def _fechar_sem_foco(self):
+        foco = self.entrada.focus_get()
+        if foco is not self.entrada and foco is not self._lista:
+            self.fechar()
+
+    def fechar(self):
+        if self.atraso is not None:
+            self._cancelar()
+        if self._janela is not None:
+            self._janela.withdraw()
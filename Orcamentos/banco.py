@@ -0,0 +1,323 @@
+"""Banco local (SQLite) dos orçamentos gerados: busca e reemissão sem abrir nenhum .xlsx.
+
+Cada orçamento gerado (interface ou lote) vira uma linha em 'orcamentos' (número de
+A5, cliente/endereço/CNPJ/telefone, prazo/pagamento/condições, total de F35, data e
+caminhos do .xlsx/.pdf) e suas linhas em 'itens', com os textos como foram
+digitados. Há índices por número, CNPJ (só dígitos) e data, então "todos os
+orçamentos do CNPJ X no mês passado" é uma consulta, e reemitir um orçamento é
+ler o registro de volta e passar para motor.gerar_orcamento. Reemitir com o mesmo
+número atualiza os arquivos da linha existente; com --novo-numero grava outra.
+
+Uso:
+    python banco.py buscar --cnpj 12.345.678/0001-90 --desde 2026-09-01 --ate 2026-09-30
+    python banco.py reemitir 1234 modelo.xlsx --saida pasta [--novo-numero]
+"""
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import closing
+from decimal import Decimal
+
+import logs
+import motor
+import numeros
+from locais import caminho_dados
+
+logger = logs.obter_logger('banco')
+
+ARQUIVO_PADRAO = caminho_dados('orcamentos.db')
+PASTA_CACHE = caminho_dados('.cache_saida')  # = cache_saida.PASTA_PADRAO (módulo importado só no reemitir)
+CAMPOS = [chave for chave, _ in motor.CAMPOS_CLIENTE + motor.CAMPOS_ADICIONAIS]
+COLUNAS_ITENS = [chave for chave, _ in motor.COLUNAS_ITENS]
+_COLUNAS_SQL_ITENS = [f'"{chave}"' for chave in COLUNAS_ITENS]  # 'desc' é palavra reservada
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS orcamentos (
+    id INTEGER PRIMARY KEY,
+    numero INTEGER NOT NULL,
+    {', '.join(f'{campo} TEXT' for campo in CAMPOS)},
+    cnpj_digitos TEXT,
+    total TEXT,
+    criado_em TEXT NOT NULL,
+    modelo TEXT,
+    arquivo_xlsx TEXT,
+    arquivo_pdf TEXT
+);
+CREATE TABLE IF NOT EXISTS itens (
+    orcamento_id INTEGER NOT NULL REFERENCES orcamentos(id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    {', '.join(f'{coluna} TEXT' for coluna in _COLUNAS_SQL_ITENS)},
+    PRIMARY KEY (orcamento_id, posicao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS arquivos_indexados (
+    caminho TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    tamanho INTEGER NOT NULL,
+    orcamento_id INTEGER REFERENCES orcamentos(id) ON DELETE SET NULL,
+    erro TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orcamentos_numero ON orcamentos(numero);
+CREATE INDEX IF NOT EXISTS idx_orcamentos_cnpj ON orcamentos(cnpj_digitos, criado_em);
+CREATE INDEX IF NOT EXISTS idx_orcamentos_data ON orcamentos(criado_em);
+"""
+_COLUNAS_ORCAMENTO = ['numero'] + CAMPOS + ['cnpj_digitos', 'total', 'criado_em', 'modelo', 'arquivo_xlsx', 'arquivo_pdf']
+_INSERIR_ORCAMENTO = (f"INSERT INTO orcamentos ({', '.join(_COLUNAS_ORCAMENTO)}) "
+                      f"VALUES ({', '.join('?' * len(_COLUNAS_ORCAMENTO))})")
+_INSERIR_ITEM = (f"INSERT INTO itens (orcamento_id, posicao, {', '.join(_COLUNAS_SQL_ITENS)}) "
+                 f"VALUES ({', '.join('?' * (len(COLUNAS_ITENS) + 2))})")
+
+_SQL_CLIENTES = """
+SELECT cliente, endereco, cnpj, telefone, cnpj_digitos FROM orcamentos WHERE id IN (
+    SELECT max(id) FROM orcamentos
+    WHERE cliente != '' OR cnpj_digitos != ''
+    GROUP BY CASE WHEN cnpj_digitos != '' THEN cnpj_digitos ELSE upper(trim(cliente)) END
+)
+"""
+
+
+_RE_NAO_DIGITO = re.compile(r'\D')
+
+
+def somente_digitos(texto):
+    """'12.345.678/0001-90' → '12345678000190' (chave de busca do CNPJ)."""
+    return _RE_NAO_DIGITO.sub('', str(texto or ""))
+
+
+def agora():
+    """Data/hora local em ISO (ordenável como texto), sem microssegundos."""
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class BancoOrcamentos:
+    """Arquivo SQLite com os orçamentos gerados; seguro entre threads e processos.
+
+    Cada operação abre a própria conexão (WAL + busy_timeout), então a thread de
+    geração da interface e um lote rodando ao mesmo tempo podem gravar no mesmo
+    arquivo. Lotes gravam todos os registros numa única transação (registrar_varios).
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO):
+        self.caminho = os.path.abspath(caminho)
+        self._lock = threading.Lock()
+        self._criado = False
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute("PRAGMA foreign_keys = ON")
+        if not self._criado:
+            with self._lock:
+                if not self._criado:
+                    conexao.execute("PRAGMA journal_mode = WAL")
+                    conexao.executescript(_ESQUEMA)
+                    self._criado = True
+        return conexao
+
+    # ---------- gravação ----------
+
+    def registrar(self, registro, numero, caminho_xlsx=None, caminho_pdf=None, modelo=None, criado_em=None):
+        """Grava um orçamento (registro no formato do motor) e retorna o id."""
+        return self.registrar_varios([(registro, numero, caminho_xlsx, caminho_pdf, modelo, criado_em)])[0]
+
+    def registrar_varios(self, entradas):
+        """Grava vários (registro, número, xlsx, pdf, modelo, criado_em) numa transação; retorna os ids."""
+        ids = []
+        with closing(self._conectar()) as conexao, conexao:
+            for entrada in entradas:
+                orcamento_id = _inserir(conexao, *entrada)
+                _marcar_indexado(conexao, entrada[2], orcamento_id)
+                ids.append(orcamento_id)
+        return ids
+
+    def registrar_reemissao(self, numero, caminho_xlsx, caminho_pdf=None, modelo=None):
+        """Atualiza os arquivos do orçamento (o mais recente com esse número) após reemiti-lo.
+
+        A reemissão com o mesmo número não vira outra linha: buscar por número continua
+        trazendo um único orçamento. Retorna o id, ou None se o número não estiver no banco.
+        """
+        with closing(self._conectar()) as conexao, conexao:
+            linha = conexao.execute("SELECT id FROM orcamentos WHERE numero = ? ORDER BY criado_em DESC, id DESC "
+                                    "LIMIT 1", (int(numero),)).fetchone()
+            if linha is None:
+                return None
+            conexao.execute("UPDATE orcamentos SET modelo = ?, arquivo_xlsx = ?, arquivo_pdf = ? WHERE id = ?",
+                            (modelo and os.path.abspath(modelo), caminho_xlsx and os.path.abspath(caminho_xlsx),
+                             caminho_pdf and os.path.abspath(caminho_pdf), linha['id']))
+            _marcar_indexado(conexao, caminho_xlsx, linha['id'])
+        return linha['id']
+
+    def arquivos_indexados(self):
+        """{caminho: (mtime_ns, tamanho)} dos .xlsx já lidos pelo indexador."""
+        with closing(self._conectar()) as conexao:
+            return {linha[0]: (linha[1], linha[2])
+                    for linha in conexao.execute("SELECT caminho, mtime_ns, tamanho FROM arquivos_indexados")}
+
+    def indexar_arquivos(self, resultados):
+        """Grava numa transação o que o indexador extraiu de cada arquivo.
+
+        resultados: (caminho, mtime_ns, tamanho, entrada, erro), com entrada no formato
+        de registrar_varios (ou None se o arquivo falhou). O orçamento que o arquivo
+        tinha no índice é substituído, então reindexar um arquivo alterado não duplica.
+        """
+        with closing(self._conectar()) as conexao, conexao:
+            for caminho, mtime_ns, tamanho, entrada, erro in resultados:
+                conexao.execute("DELETE FROM orcamentos WHERE id = "
+                                "(SELECT orcamento_id FROM arquivos_indexados WHERE caminho = ?)", (caminho,))
+                orcamento_id = _inserir(conexao, *entrada) if entrada is not None else None
+                conexao.execute("INSERT OR REPLACE INTO arquivos_indexados VALUES (?, ?, ?, ?, ?)",
+                                (caminho, mtime_ns, tamanho, orcamento_id, erro))
+
+    # ---------- consulta ----------
+
+    def buscar(self, numero=None, cnpj=None, desde=None, ate=None, limite=None):
+        """Orçamentos (dicts, mais recentes primeiro) filtrados por número, CNPJ e/ou período.
+
+        'desde'/'ate' são datas ISO ('2026-09-01') ou date/datetime; 'ate' inclui o dia todo.
+        """
+        condicoes, parametros = [], []
+        if numero is not None:
+            condicoes.append("numero = ?")
+            parametros.append(int(numero))
+        if cnpj:
+            condicoes.append("cnpj_digitos = ?")
+            parametros.append(somente_digitos(cnpj))
+        if desde:
+            condicoes.append("criado_em >= ?")
+            parametros.append(_data_iso(desde))
+        if ate:
+            condicoes.append("criado_em < ?")
+            parametros.append(_data_iso(ate, dia_seguinte=True))
+        sql = "SELECT * FROM orcamentos"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY criado_em DESC, id DESC"
+        if limite:
+            sql += f" LIMIT {int(limite)}"
+        with closing(self._conectar()) as conexao:
+            return [dict(linha) for linha in conexao.execute(sql, parametros)]
+
+    def numeros_emitidos(self, numeros):
+        """Quais dos números já têm orçamento registrado (uma consulta, pelo índice de número)."""
+        numeros = sorted({int(numero) for numero in numeros})
+        emitidos = set()
+        with closing(self._conectar()) as conexao:
+            for inicio in range(0, len(numeros), 500):  # limite de parâmetros do SQLite
+                parte = numeros[inicio:inicio + 500]
+                emitidos.update(linha[0] for linha in conexao.execute(
+                    f"SELECT DISTINCT numero FROM orcamentos WHERE numero IN ({', '.join('?' * len(parte))})", parte))
+        return emitidos
+
+    def itens(self, orcamento_id):
+        """Itens de um orçamento, na ordem, como dicts (textos como foram digitados)."""
+        with closing(self._conectar()) as conexao:
+            linhas = conexao.execute("SELECT * FROM itens WHERE orcamento_id = ? ORDER BY posicao", (orcamento_id,))
+            return [{chave: linha[chave] for chave in COLUNAS_ITENS} for linha in linhas]
+
+    def clientes(self):
+        """(cliente, endereço, CNPJ, telefone, CNPJ só dígitos) do orçamento mais recente de cada cliente.
+
+        Um cliente por CNPJ (só dígitos); sem CNPJ, pelo nome.
+        """
+        with closing(self._conectar()) as conexao:
+            return [tuple(linha) for linha in conexao.execute(_SQL_CLIENTES)]
+
+    def registro(self, numero):
+        """Registro (formato do motor/lote) do orçamento mais recente com esse número, ou None."""
+        encontrados = self.buscar(numero=numero, limite=1)
+        if not encontrados:
+            return None
+        orcamento = encontrados[0]
+        registro = {campo: orcamento[campo] or "" for campo in CAMPOS}
+        registro['numero'] = orcamento['numero']
+        registro['itens'] = self.itens(orcamento['id'])
+        return registro
+
+
+def _inserir(conexao, registro, numero, caminho_xlsx=None, caminho_pdf=None, modelo=None, criado_em=None):
+    itens = [motor.normalizar_item(item) for item in registro.get('itens') or []]
+    campos = [str(registro.get(campo) or "").strip() for campo in CAMPOS]
+    total = numeros.ColunasItens(itens).soma()
+    cursor = conexao.execute(_INSERIR_ORCAMENTO, [int(numero)] + campos + [
+        somente_digitos(registro.get('cnpj')), str(total), criado_em or agora(),
+        modelo and os.path.abspath(modelo), caminho_xlsx and os.path.abspath(caminho_xlsx),
+        caminho_pdf and os.path.abspath(caminho_pdf)])
+    orcamento_id = cursor.lastrowid
+    conexao.executemany(_INSERIR_ITEM, [[orcamento_id, posicao] + [item[chave] for chave in COLUNAS_ITENS]
+                                        for posicao, item in enumerate(itens)])
+    return orcamento_id
+
+
+def _marcar_indexado(conexao, caminho_xlsx, orcamento_id):
+    # O indexador (indexador.py) não relê um .xlsx que já foi registrado na geração
+    if caminho_xlsx and os.path.exists(caminho_xlsx):
+        info = os.stat(caminho_xlsx)
+        conexao.execute("INSERT OR REPLACE INTO arquivos_indexados VALUES (?, ?, ?, ?, NULL)",
+                        (os.path.abspath(caminho_xlsx), info.st_mtime_ns, info.st_size, orcamento_id))
+
+
+def _data_iso(valor, dia_seguinte=False):
+    if isinstance(valor, datetime.datetime):
+        return valor.isoformat(timespec='seconds')
+    data = valor if isinstance(valor, datetime.date) else datetime.date.fromisoformat(str(valor)[:10])
+    if dia_seguinte:
+        data += datetime.timedelta(days=1)
+    return data.isoformat()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta e reemissão de orçamentos do banco local.")
+    parser.add_argument('--banco', default=ARQUIVO_PADRAO, help="Arquivo SQLite dos orçamentos")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    buscar = comandos.add_parser('buscar', help="Lista orçamentos por número, CNPJ e/ou período")
+    buscar.add_argument('--numero', type=int)
+    buscar.add_argument('--cnpj')
+    buscar.add_argument('--desde', help="Data inicial (AAAA-MM-DD)")
+    buscar.add_argument('--ate', help="Data final, inclusive (AAAA-MM-DD)")
+    buscar.add_argument('--limite', type=int, default=100)
+    reemitir = comandos.add_parser('reemitir', help="Gera de novo um orçamento gravado no banco")
+    reemitir.add_argument('numero', type=int)
+    reemitir.add_argument('modelo', help="Arquivo modelo .xlsx")
+    reemitir.add_argument('--saida', default=None, help="Pasta de saída (padrão: pasta do modelo)")
+    reemitir.add_argument('--novo-numero', action='store_true', help="Reserva um número novo em vez de repetir o original")
+    reemitir.add_argument('--config', default='config.json', help="config.json com proximo_numero (com --novo-numero)")
+    reemitir.add_argument('--cache', default=PASTA_CACHE,
+                          help="Cache de saídas: reemitir com o mesmo número reaproveita os arquivos (vazio = sem cache)")
+    args = parser.parse_args(argv)
+
+    banco = BancoOrcamentos(args.banco)
+    if args.comando == 'buscar':
+        for orcamento in banco.buscar(args.numero, args.cnpj, args.desde, args.ate, args.limite):
+            print(f"{orcamento['numero']:>6}  {orcamento['criado_em']}  {orcamento['cnpj']:<20}  "
+                  f"R$ {numeros.formatar_br(Decimal(orcamento['total'] or 0)):>14}  "
+                  f"{orcamento['cliente']}  {orcamento['arquivo_xlsx'] or ''}")
+        return 0
+
+    registro = banco.registro(args.numero)
+    if registro is None:
+        logger.error("Orçamento %d não encontrado em %s.", args.numero, banco.caminho)
+        return 1
+    numero = registro['numero']
+    if args.novo_numero:
+        from numeracao import AlocadorNumeros
+        numero = AlocadorNumeros(args.config).reservar(1).start
+    pasta_saida = args.saida or os.path.dirname(os.path.abspath(args.modelo))
+    os.makedirs(pasta_saida, exist_ok=True)
+    cache = None
+    if args.cache:
+        from cache_saida import CacheSaida
+        cache = CacheSaida(args.cache)
+    caminho = motor.gerar_orcamento(args.modelo, registro, numero, pasta_saida, cache=cache)
+    if numero == registro['numero']:
+        banco.registrar_reemissao(numero, caminho, modelo=args.modelo)
+    else:
+        banco.registrar(registro, numero, caminho, modelo=args.modelo)
+    logger.info("Orçamento %d reemitido como %s.", args.numero, caminho)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
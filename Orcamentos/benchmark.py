@@ -0,0 +1,270 @@
+"""Benchmark do pipeline de orçamentos: tempo por etapa, p50/p95, vazão e pico de memória.
+
+Uso:
+    python benchmark.py --saida resultado.json
+    python benchmark.py --modelo dist/06_exemplo.xlsx --orcamentos 200 --linhas 0,500 --imagens 1,5
+    python benchmark.py --comparar anterior.json --saida atual.json
+
+Cada cenário (modo × tamanho × nº de imagens) roda num processo novo, para que o pico
+de RSS seja do cenário e não do benchmark inteiro. Os modelos sintéticos são o modelo
+base ampliado: 'linhas' linhas extras de texto abaixo da linha 39 e 'imagens' cópias do
+logo espalhadas pela planilha.
+
+Etapas medidas (ms por orçamento, exceto as de carga):
+  inspecao  - leitura das células mapeadas ao selecionar o modelo (streaming, sem cache)
+  carga     - leitura do modelo para o cache do motor (obter_modelo, a frio)
+  aplicar   - montagem de {célula: valor} do registro (aplicar_valores)
+  salvar    - geração do .xlsx em memória
+  midia     - reempacotamento com a mídia do modelo (só no modo openpyxl)
+  gravar    - escrita do .xlsx em disco
+  pdf       - PDF pelo renderizador nativo
+"""
+import argparse
+import datetime
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import logs
+import motor
+from escritor_xml import reempacotar_com_midia
+
+logger = logs.obter_logger('benchmark')
+
+MODELO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist', '06_exemplo.xlsx')
+ETAPAS = ('inspecao', 'carga', 'aplicar', 'salvar', 'midia', 'gravar', 'pdf')
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear entre as amostras ordenadas."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100.0
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo atual, em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def criar_modelo_sintetico(modelo_base, destino, linhas_extras=0, imagens=1):
+    """Amplia o modelo base: linhas de texto abaixo da 39 e cópias extras do logo."""
+    from openpyxl import load_workbook
+    from openpyxl.drawing.image import Image as ImagemXL
+
+    wb = load_workbook(modelo_base)
+    ws = wb.active
+    for linha in range(40, 40 + linhas_extras):
+        ws.cell(row=linha, column=1, value=f"Observação {linha - 39}")
+        ws.cell(row=linha, column=2, value="Texto de preenchimento para ampliar a planilha sintética.")
+        ws.cell(row=linha, column=6, value=linha * 1.5)
+    existentes = list(getattr(ws, '_images', []))
+    if existentes and imagens > len(existentes):
+        dados = existentes[0]._data()
+        existentes[0].ref = io.BytesIO(dados)
+        for i in range(imagens - len(existentes)):
+            img = ImagemXL(io.BytesIO(dados))
+            img.anchor = f"H{1 + i * 8}"
+            ws.add_image(img)
+    wb.save(destino)
+    wb.close()
+    return destino
+
+
+def registros_sinteticos(quantidade, semente=42):
+    """Registros determinísticos com 1 a 22 itens."""
+    aleatorio = random.Random(semente)
+    registros = []
+    for n in range(quantidade):
+        itens = []
+        for i in range(aleatorio.randint(1, motor.LINHA_FINAL_ITENS - motor.LINHA_INICIAL_ITENS + 1)):
+            quant = aleatorio.randint(1, 50)
+            unitario = aleatorio.randint(100, 99999) / 100
+            itens.append({'item': i + 1, 'desc': f"Produto {aleatorio.randint(1, 5000)} - linha {i + 1}",
+                          'quant': str(quant), 'und': 'UN', 'vlr_uni': motor.formatar_numero_br(unitario),
+                          'total': motor.formatar_numero_br(quant * unitario)})
+        registros.append({'cliente': f"Cliente {n}", 'endereco': f"Rua {n}, {aleatorio.randint(1, 999)}",
+                          'cnpj': f"{n:02d}.000.000/0001-00", 'telefone': '(61) 0000-0000',
+                          'prazo': 'Prazo de entrega: 10 dias', 'pagamento': 'Forma de pagamento: PIX',
+                          'condicoes': 'Na entrega', 'itens': itens})
+    return registros
+
+
+def _medir(tempos, etapa, funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    tempos.setdefault(etapa, []).append((time.perf_counter() - inicio) * 1000)
+    return resultado
+
+
+def executar_cenario(cenario):
+    """Roda um cenário (num processo próprio) e retorna o resumo por etapa."""
+    modelo, modo, pasta = cenario['modelo_sintetico'], cenario['modo'], cenario['pasta_saida']
+    tempos = {}
+    for _ in range(cenario['repeticoes_carga']):
+        motor._mapas.clear()
+        motor._inspecoes.clear()
+        _medir(tempos, 'inspecao', motor.inspecionar_modelo, modelo)
+        motor._modelos.clear()
+        motor._mapas.clear()
+        _medir(tempos, 'carga', motor.obter_modelo, modelo, modo)
+    instancia = motor.obter_modelo(modelo, modo)
+    if cenario['pdf']:  # layout do PDF fica fora das amostras (só o custo por orçamento)
+        motor.obter_pdf_nativo(modelo)
+
+    registros = registros_sinteticos(cenario['orcamentos'])
+    inicio = time.perf_counter()
+    for numero, registro in enumerate(registros, start=1):
+        celulas = _medir(tempos, 'aplicar', motor.celulas_do_registro, registro, numero, instancia.mapa)
+        if isinstance(instancia, motor.ModeloCache):
+            conteudo, _ = _medir(tempos, 'salvar', instancia.pacote_openpyxl, celulas)
+            if instancia.midia:
+                saida = io.BytesIO()
+                _medir(tempos, 'midia', reempacotar_com_midia, conteudo, instancia.midia, saida)
+                conteudo = saida.getvalue()
+        else:
+            saida = io.BytesIO()
+            _medir(tempos, 'salvar', instancia.salvar_copia, celulas, saida)
+            conteudo = saida.getvalue()
+        caminho = os.path.join(pasta, motor.nome_copia(instancia.nome_base, numero))
+
+        def gravar():
+            with open(caminho, 'wb') as f:
+                f.write(conteudo)
+        _medir(tempos, 'gravar', gravar)
+        if cenario['pdf']:
+            _medir(tempos, 'pdf', motor.gerar_pdf_nativo, modelo, celulas, os.path.splitext(caminho)[0] + '.pdf')
+    duracao = time.perf_counter() - inicio
+
+    etapas = {}
+    for etapa in ETAPAS:
+        amostras = tempos.get(etapa)
+        if amostras:
+            etapas[etapa] = {'amostras': len(amostras), 'p50_ms': round(percentil(amostras, 50), 3),
+                             'p95_ms': round(percentil(amostras, 95), 3),
+                             'media_ms': round(sum(amostras) / len(amostras), 3)}
+    por_orcamento = [sum(valores) for valores in zip(*(tempos[e] for e in ETAPAS if e in tempos
+                                                       and e not in ('inspecao', 'carga')))]
+    resultado = {chave: cenario[chave] for chave in ('nome', 'modo', 'linhas_extras', 'imagens', 'orcamentos', 'pdf')}
+    resultado.update({
+        'classe_modelo': type(instancia).__name__,
+        'tamanho_modelo_kb': round(os.path.getsize(modelo) / 1024, 1),
+        'etapas': etapas,
+        'orcamento_p50_ms': round(percentil(por_orcamento, 50), 3),
+        'orcamento_p95_ms': round(percentil(por_orcamento, 95), 3),
+        'duracao_s': round(duracao, 3),
+        'orcamentos_por_s': round(len(registros) / duracao, 2) if duracao > 0 else None,
+        'pico_rss_mb': round(pico_rss_mb(), 1) if resource is not None else None,
+    })
+    return resultado
+
+
+def _versao():
+    """Commit atual (git describe), se disponível."""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _lista_inteiros(texto):
+    return [int(v) for v in texto.split(',') if v.strip()]
+
+
+def comparar(anterior, atual):
+    """Imprime a variação de p50 e vazão entre dois resultados (cenários de mesmo nome)."""
+    antigos = {c['nome']: c for c in anterior.get('cenarios', [])}
+    for cenario in atual['cenarios']:
+        antigo = antigos.get(cenario['nome'])
+        if not antigo:
+            continue
+        variacao = (cenario['orcamento_p50_ms'] / antigo['orcamento_p50_ms'] - 1) * 100 if antigo['orcamento_p50_ms'] else 0.0
+        logger.info("%s: p50 %.2f → %.2f ms (%+.1f%%), %s → %s orçamentos/s", cenario['nome'],
+                    antigo['orcamento_p50_ms'], cenario['orcamento_p50_ms'], variacao,
+                    antigo['orcamentos_por_s'], cenario['orcamentos_por_s'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da geração de orçamentos (tempo por etapa, p50/p95, RSS).")
+    parser.add_argument('--modelo', default=MODELO_PADRAO, help="Modelo base (padrão: dist/06_exemplo.xlsx)")
+    parser.add_argument('--modos', default=','.join(motor.MODOS), help="Modos do motor, separados por vírgula")
+    parser.add_argument('--linhas', default='0,1000', help="Linhas extras dos modelos sintéticos (ex: 0,1000)")
+    parser.add_argument('--imagens', default='1,5', help="Nº de imagens dos modelos sintéticos (ex: 1,5)")
+    parser.add_argument('--orcamentos', type=int, default=100, help="Orçamentos por cenário")
+    parser.add_argument('--repeticoes-carga', type=int, default=3, help="Cargas a frio do modelo por cenário")
+    parser.add_argument('--sem-pdf', action='store_true', help="Não mede a etapa de PDF")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com os resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args(argv)
+
+    temporaria = tempfile.mkdtemp(prefix='orcamento_bench_')
+    cenarios = []
+    try:
+        for linhas, imagens in itertools.product(_lista_inteiros(args.linhas), _lista_inteiros(args.imagens)):
+            sintetico = criar_modelo_sintetico(args.modelo, os.path.join(temporaria, f"modelo_{linhas}l_{imagens}i.xlsx"),
+                                               linhas, imagens)
+            for modo in args.modos.split(','):
+                pasta = os.path.join(temporaria, f"saida_{linhas}l_{imagens}i_{modo}")
+                os.makedirs(pasta)
+                cenarios.append({'nome': f"{modo}-{linhas}l-{imagens}i", 'modo': modo, 'linhas_extras': linhas,
+                                 'imagens': imagens, 'orcamentos': args.orcamentos, 'pdf': not args.sem_pdf,
+                                 'repeticoes_carga': args.repeticoes_carga, 'modelo_sintetico': sintetico,
+                                 'pasta_saida': pasta})
+
+        resultados = []
+        contexto = multiprocessing.get_context('spawn')
+        for cenario in cenarios:
+            with contexto.Pool(1) as pool:
+                resultado = pool.apply(executar_cenario, (cenario,))
+            resultados.append(resultado)
+            etapas = ', '.join(f"{etapa} {dados['p50_ms']:.2f}/{dados['p95_ms']:.2f}"
+                               for etapa, dados in resultado['etapas'].items())
+            logger.info("%s: %s orçamentos/s, p50/p95 %.2f/%.2f ms, RSS %s MB | %s", resultado['nome'],
+                        resultado['orcamentos_por_s'], resultado['orcamento_p50_ms'], resultado['orcamento_p95_ms'],
+                        resultado['pico_rss_mb'], etapas)
+    finally:
+        shutil.rmtree(temporaria, ignore_errors=True)
+
+    relatorio = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versao': _versao(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'cenarios': resultados,
+    }
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(json.load(f), relatorio)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        logger.info("Resultados salvos em %s", args.saida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
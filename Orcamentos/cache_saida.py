@@ -0,0 +1,231 @@
+"""Cache das saídas geradas (.xlsx e PDF), endereçado pelo conteúdo do pedido.
+
+A chave é o SHA-256 de (conteúdo do modelo, células gravadas já normalizadas, número do
+orçamento, linhas inseridas e modo do motor). Pedido idêntico (criar de novo o mesmo
+orçamento, reemitir com o mesmo número, o serviço recebendo o mesmo JSON) não passa
+pelo motor: o arquivo do cache é copiado para o destino e a geração termina na hora.
+
+Os arquivos ficam em <pasta>/<2 primeiros da chave>/<chave>.<tipo>, com um índice SQLite
+(<pasta>/indice.db) guardando tamanho, mtime, SHA-256 do arquivo e último uso. Passando de
+limite_mb, as entradas usadas há mais tempo são apagadas (LRU) até 90% do limite.
+
+Quem chama sempre recebe uma cópia própria (nunca um hard link para a entrada), então
+editar a saída não altera o cache. O SHA-256 é calculado ao guardar; num acerto só se
+compara tamanho e mtime, e o arquivo é lido de novo apenas se um dos dois mudou (entrada
+mexida na pasta do cache): conteúdo igual atualiza o mtime, diferente descarta a entrada.
+
+Falhas do cache (disco, permissão, índice) só geram aviso: quem chama gera normalmente.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import logs
+from locais import caminho_dados
+
+logger = logs.obter_logger('cache')
+
+PASTA_PADRAO = caminho_dados('.cache_saida')
+LIMITE_PADRAO_MB = 500
+VERSAO_CHAVE = 1  # mude quando a geração mudar de forma que as saídas antigas não valham mais
+TAMANHO_BLOCO = 1024 * 1024
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    chave TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL DEFAULT 0,
+    ultimo_uso REAL NOT NULL,
+    PRIMARY KEY (chave, tipo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entradas_uso ON entradas(ultimo_uso);
+"""
+
+_hashes_modelos = {}  # caminho → ((mtime_ns, tamanho), sha256)
+_hashes_lock = threading.Lock()
+
+
+def sha256_arquivo(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def hash_modelo(caminho_modelo):
+    """SHA-256 do conteúdo do modelo, recalculado só quando mtime/tamanho mudam."""
+    caminho = os.path.abspath(caminho_modelo)
+    stat = os.stat(caminho)
+    assinatura = (stat.st_mtime_ns, stat.st_size)
+    with _hashes_lock:
+        entrada = _hashes_modelos.get(caminho)
+    if entrada and entrada[0] == assinatura:
+        return entrada[1]
+    digest = sha256_arquivo(caminho)
+    with _hashes_lock:
+        _hashes_modelos[caminho] = (assinatura, digest)
+    return digest
+
+
+def _valor_normalizado(valor):
+    # Tipo junto do texto: '10' (texto) e Decimal('10') viram células diferentes
+    return [type(valor).__name__, str(valor)]
+
+
+def _copiar(origem, destino):
+    """Copia origem em destino (substitui destino de uma vez, via arquivo temporário)."""
+    try:
+        if os.path.samefile(origem, destino):
+            return
+    except OSError:
+        pass
+    temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(origem, temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+class CacheSaida:
+    """Saídas geradas por chave de conteúdo, com limite de tamanho e despejo LRU."""
+
+    def __init__(self, pasta=PASTA_PADRAO, limite_mb=LIMITE_PADRAO_MB):
+        self.pasta = os.path.abspath(pasta)
+        self.limite = int(limite_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conexao = None
+
+    @contextmanager
+    def _transacao(self):
+        """Conexão única (por instância), numa transação e sob trava.
+
+        Diferente do banco de orçamentos, a conexão fica aberta: um acerto precisa custar bem
+        menos que gerar de novo, e abrir/fechar a cada uso (checkpoint do WAL + fsync) custava
+        dezenas de ms. O índice é descartável, então synchronous=NORMAL basta.
+        """
+        with self._lock:
+            if self._conexao is None:
+                os.makedirs(self.pasta, exist_ok=True)
+                conexao = sqlite3.connect(os.path.join(self.pasta, 'indice.db'), timeout=30, check_same_thread=False)
+                conexao.execute("PRAGMA journal_mode = WAL")
+                conexao.execute("PRAGMA synchronous = NORMAL")
+                conexao.executescript(_ESQUEMA)
+                colunas = [linha[1] for linha in conexao.execute("PRAGMA table_info(entradas)")]
+                if 'mtime_ns' not in colunas:  # índice de versão anterior: mtime 0 força uma conferência
+                    conexao.execute("ALTER TABLE entradas ADD COLUMN mtime_ns INTEGER NOT NULL DEFAULT 0")
+                self._conexao = conexao
+            with self._conexao:
+                yield self._conexao
+
+    def fechar(self):
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    def _arquivo(self, chave, tipo):
+        return os.path.join(self.pasta, chave[:2], f"{chave}.{tipo}")
+
+    def chave(self, caminho_modelo, celulas, numero, insercao=None, modo='xml'):
+        """Chave de conteúdo de um pedido (células como as de motor.celulas_do_registro)."""
+        normalizado = json.dumps({
+            'versao': VERSAO_CHAVE, 'modelo': hash_modelo(caminho_modelo), 'numero': int(numero),
+            'celulas': sorted((ref, _valor_normalizado(valor)) for ref, valor in celulas.items()),
+            'insercao': list(insercao) if insercao else None, 'modo': modo,
+        }, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(normalizado.encode('utf-8')).hexdigest()
+
+    def obter(self, chave, tipo, destino):
+        """Copia a saída em cache para o destino. True se havia (e estava íntegra), False se não."""
+        try:
+            with self._transacao() as conexao:
+                linha = conexao.execute("SELECT tamanho, mtime_ns, sha256 FROM entradas WHERE chave = ? AND tipo = ?",
+                                        (chave, tipo)).fetchone()
+                if linha is None:
+                    return False
+                tamanho, mtime_ns, sha256 = linha
+                arquivo = self._arquivo(chave, tipo)
+                try:
+                    stat = os.stat(arquivo)
+                except FileNotFoundError:
+                    stat = None
+                if stat is not None and (stat.st_size, stat.st_mtime_ns) != (tamanho, mtime_ns):
+                    if stat.st_size == tamanho and sha256_arquivo(arquivo) == sha256:
+                        mtime_ns = stat.st_mtime_ns  # só tocado: conteúdo igual
+                    else:
+                        stat = None
+                if stat is None:
+                    logger.warning("Entrada do cache alterada ou ausente, descartada: %s", os.path.basename(arquivo))
+                    self._remover(conexao, [(chave, tipo)])
+                    return False
+                _copiar(arquivo, destino)
+                conexao.execute("UPDATE entradas SET ultimo_uso = ?, mtime_ns = ? WHERE chave = ? AND tipo = ?",
+                                (time.time(), mtime_ns, chave, tipo))
+            return True
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Cache de saída indisponível (%s): %s", tipo, e)
+            return False
+
+    def guardar(self, chave, tipo, origem):
+        """Guarda o arquivo gerado sob a chave e despeja as entradas mais antigas se passar do limite."""
+        try:
+            arquivo = self._arquivo(chave, tipo)
+            os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+            _copiar(origem, arquivo)
+            digest = sha256_arquivo(arquivo)
+            stat = os.stat(arquivo)
+            with self._transacao() as conexao:
+                conexao.execute("INSERT OR REPLACE INTO entradas (chave, tipo, tamanho, sha256, mtime_ns, ultimo_uso) "
+                                "VALUES (?, ?, ?, ?, ?, ?)",
+                                (chave, tipo, stat.st_size, digest, stat.st_mtime_ns, time.time()))
+                total = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM entradas").fetchone()[0]
+                if total > self.limite:
+                    self._despejar(conexao, total)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Saída não guardada no cache (%s): %s", tipo, e)
+
+    def obter_ou_gerar(self, chave, tipo, destino, gerar):
+        """Destino pelo cache ou por gerar() (que grava o destino e vai para o cache). True se veio do cache."""
+        if self.obter(chave, tipo, destino):
+            return True
+        gerar()
+        self.guardar(chave, tipo, destino)
+        return False
+
+    def _despejar(self, conexao, total):
+        alvo = self.limite * 0.9
+        removidas = []
+        for chave, tipo, tamanho in conexao.execute("SELECT chave, tipo, tamanho FROM entradas ORDER BY ultimo_uso"):
+            if total <= alvo:
+                break
+            removidas.append((chave, tipo))
+            total -= tamanho
+        self._remover(conexao, removidas)
+        logger.info("Cache de saída: %d entrada(s) antiga(s) removida(s) (limite %.1f MB).",
+                    len(removidas), self.limite / (1024 * 1024))
+
+    def _remover(self, conexao, entradas):
+        conexao.executemany("DELETE FROM entradas WHERE chave = ? AND tipo = ?", entradas)
+        for chave, tipo in entradas:
+            try:
+                os.remove(self._arquivo(chave, tipo))
+            except FileNotFoundError:
+                pass
+
+    def tamanho(self):
+        """(entradas, bytes) no cache."""
+        with self._transacao() as conexao:
+            return tuple(conexao.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM entradas").fetchone())
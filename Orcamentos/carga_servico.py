@@ -0,0 +1,126 @@
+"""Teste de carga do serviço local (servico.py): N orçamentos com C conexões simultâneas.
+
+Uso:
+    python carga_servico.py --modelo 06_exemplo --orcamentos 500 --concorrencia 8
+    python carga_servico.py --url http://127.0.0.1:8765 --modelo 06_exemplo --sem-pdf --itens 40
+
+Cada conexão (keep-alive) manda POST /orcamentos e espera a resposta. Respostas 503 (fila
+cheia) contam como rejeitadas e são reenviadas após o Retry-After, até --tentativas vezes.
+No fim mostra vazão, latência p50/p95/p99 das aceitas e a contagem por status; com
+--saida grava o mesmo resumo em JSON (para comparar versões, como o benchmark.py).
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import logs
+from benchmark import percentil
+
+logger = logs.obter_logger('carga')
+
+
+def registro_exemplo(indice, itens=5):
+    """Orçamento sintético (numero fica a cargo do serviço)."""
+    return {
+        'cliente': f"Cliente Carga {indice}", 'endereco': "Rua do Teste, 100",
+        'cnpj': f"{indice % 100:02d}.345.678/0001-90", 'telefone': "(11) 4000-0000",
+        'prazo': "Prazo de entrega: 10 dias", 'pagamento': "Forma de pagamento: boleto",
+        'condicoes': "Na entrega: conferir itens",
+        'itens': [{'item': str(n), 'desc': f"Produto {n} do pedido {indice}", 'quant': str(n % 7 + 1),
+                   'und': "UND", 'vlr_uni': f"{n * 3 + 1},50"} for n in range(1, itens + 1)],
+    }
+
+
+def executar_carga(url, modelo, orcamentos, concorrencia, itens=5, com_pdf=True, tentativas=20):
+    """Dispara a carga e retorna o resumo (dict)."""
+    endereco = urlsplit(url)
+    proximo = iter(range(orcamentos))
+    lock = threading.Lock()
+    latencias, status, rejeicoes = [], Counter(), [0]
+
+    def trabalhar():
+        conexao = http.client.HTTPConnection(endereco.hostname, endereco.port or 80, timeout=300)
+        try:
+            while True:
+                with lock:
+                    indice = next(proximo, None)
+                if indice is None:
+                    return
+                corpo = json.dumps({'modelo': modelo, 'orcamento': registro_exemplo(indice, itens), 'pdf': com_pdf})
+                for _ in range(max(1, tentativas)):
+                    inicio = time.perf_counter()
+                    try:
+                        conexao.request('POST', '/orcamentos', corpo, {'Content-Type': 'application/json'})
+                        resposta = conexao.getresponse()
+                        resposta.read()
+                    except (OSError, http.client.HTTPException):
+                        conexao.close()  # reconecta na próxima tentativa
+                        with lock:
+                            status['falha_conexao'] += 1
+                        time.sleep(0.1)
+                        continue
+                    duracao = (time.perf_counter() - inicio) * 1000
+                    if resposta.status != 503:
+                        with lock:
+                            status[resposta.status] += 1
+                            latencias.append(duracao)
+                        break
+                    with lock:
+                        rejeicoes[0] += 1
+                    time.sleep(float(resposta.getheader('Retry-After') or 1))
+                else:
+                    with lock:
+                        status['desistiu'] += 1
+        finally:
+            conexao.close()
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhar, name=f"carga-{n}") for n in range(max(1, concorrencia))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    aceitos = status.get(201, 0)
+    return {
+        'orcamentos': orcamentos, 'concorrencia': concorrencia, 'itens': itens, 'pdf': com_pdf,
+        'duracao_s': round(duracao, 3),
+        'orcamentos_por_s': round(aceitos / duracao, 2) if duracao > 0 else 0.0,
+        'p50_ms': round(percentil(latencias, 50) or 0, 2), 'p95_ms': round(percentil(latencias, 95) or 0, 2),
+        'p99_ms': round(percentil(latencias, 99) or 0, 2),
+        'status': {str(chave): valor for chave, valor in sorted(status.items(), key=str)},
+        'rejeitados_503': rejeicoes[0],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço local de orçamentos.")
+    parser.add_argument('--url', default='http://127.0.0.1:8765', help="Endereço do servico.py")
+    parser.add_argument('--modelo', required=True, help="ID do modelo (GET /modelos)")
+    parser.add_argument('--orcamentos', type=int, default=200)
+    parser.add_argument('--concorrencia', type=int, default=8, help="Conexões simultâneas")
+    parser.add_argument('--itens', type=int, default=5, help="Itens por orçamento")
+    parser.add_argument('--sem-pdf', action='store_true', help="Pede só o .xlsx")
+    parser.add_argument('--tentativas', type=int, default=20, help="Reenvios de uma requisição recusada com 503")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com o resumo")
+    args = parser.parse_args(argv)
+
+    resumo = executar_carga(args.url, args.modelo, args.orcamentos, args.concorrencia, args.itens,
+                            not args.sem_pdf, args.tentativas)
+    logger.info("%d orçamento(s) em %.2fs: %.1f/s, p50/p95/p99 %.1f/%.1f/%.1f ms, status %s, %d recusa(s) 503.",
+                args.orcamentos, resumo['duracao_s'], resumo['orcamentos_por_s'], resumo['p50_ms'],
+                resumo['p95_ms'], resumo['p99_ms'], resumo['status'], resumo['rejeitados_503'])
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+    return 0 if set(resumo['status']) == {'201'} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""Catálogo de produtos (descrição, UND, valor unitário) com busca indexada para os itens.
+
+Uso:
+    python catalogo.py importar produtos.csv [--catalogo catalogo.db]
+    python catalogo.py buscar "parafuso inox 10"
+
+A importação lê o .csv (ou a primeira planilha do .xlsx, via leitor_modelo) linha a
+linha e grava em lotes numa única transação, então 100 mil SKUs não passam pela
+memória de uma vez. As colunas são reconhecidas pelo cabeçalho: código/sku,
+descrição/produto, und/unidade e valor/preço (valores no formato BR, '1.234,56').
+
+O índice fica no próprio arquivo SQLite (catalogo.db) e é montado só na importação;
+abrir o programa não reconstrói nada. São dois índices: a descrição normalizada
+(sem acento, maiúscula), para busca por prefixo, e a tabela de termos (uma palavra
+por linha), para busca por palavras em qualquer ordem, cada uma casando como
+prefixo. Palavra sem nenhum termo no catálogo (erro de digitação) é trocada pelos
+termos mais parecidos (difflib). Os candidatos vêm do vocabulário gravado na
+importação (só palavras das descrições; códigos/SKUs e números ficam de fora), lido
+uma vez e agrupado por inicial e tamanho: só os grupos de tamanho que ainda podem
+passar do corte do difflib são comparados.
+
+A busca usa uma única conexão (por instância), aberta na primeira busca e protegida
+por trava; a importação grava por uma conexão própria.
+"""
+import argparse
+import csv
+import difflib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+from collections import namedtuple
+from contextlib import closing, contextmanager
+from decimal import Decimal
+
+import leitor_modelo
+import logs
+import numeros
+from locais import caminho_dados
+
+logger = logs.obter_logger('catalogo')
+
+ARQUIVO_PADRAO = caminho_dados('catalogo.db')
+TAMANHO_LOTE = 5000
+# Na busca por palavras, contar além disso não muda qual palavra é a mais rara
+LIMITE_CONTAGEM = 5000
+# Busca aproximada: corte do difflib e menor palavra que entra no vocabulário
+CORTE_APROXIMADO = 0.75
+TAMANHO_MINIMO_APROXIMADO = 3
+# Cabeçalhos aceitos (normalizados) para cada campo do produto
+CABECALHOS = {
+    'codigo': ('CODIGO', 'COD', 'SKU', 'REFERENCIA', 'REF'),
+    'descricao': ('DESCRICAO', 'DESC', 'PRODUTO', 'NOME'),
+    'und': ('UND', 'UN', 'UNID', 'UNIDADE'),
+    'preco': ('VALOR', 'VLR_UNI', 'VALOR UNITARIO', 'PRECO', 'PRECO UNITARIO', 'VLR UNITARIO'),
+}
+
+Produto = namedtuple('Produto', 'codigo descricao und preco')
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS produtos (
+    id INTEGER PRIMARY KEY,
+    codigo TEXT,
+    descricao TEXT NOT NULL,
+    und TEXT,
+    preco TEXT,
+    chave TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS termos (
+    termo TEXT NOT NULL,
+    produto_id INTEGER NOT NULL,
+    PRIMARY KEY (termo, produto_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS vocabulario (
+    termo TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_produtos_chave ON produtos(chave);
+CREATE INDEX IF NOT EXISTS idx_produtos_codigo ON produtos(codigo);
+CREATE INDEX IF NOT EXISTS idx_termos_produto ON termos(produto_id, termo);
+"""
+_RE_PALAVRA = re.compile(r'[A-Z0-9]+(?:[.,/][A-Z0-9]+)*')
+# Maior caractere possível: 'ABC' <= chave < 'ABC' + _FIM cobre todos os prefixos 'ABC'
+_FIM = '\U0010ffff'
+
+
+def normalizar(texto):
+    """'Parafuso Sextavado ½"' → 'PARAFUSO SEXTAVADO' (sem acento, maiúsculo, espaços simples)."""
+    texto = unicodedata.normalize('NFD', str(texto or "")).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.upper().split())
+
+
+def termos(texto):
+    """Palavras normalizadas de um texto, na ordem, sem repetir."""
+    return list(dict.fromkeys(_RE_PALAVRA.findall(normalizar(texto))))
+
+
+def termos_aproximaveis(descricao):
+    """Palavras da descrição que entram na busca aproximada (sem números nem palavras curtas)."""
+    return [termo for termo in termos(descricao)
+            if len(termo) >= TAMANHO_MINIMO_APROXIMADO and not any(c.isdigit() for c in termo)]
+
+
+def _tamanhos_compativeis(tamanho, corte=CORTE_APROXIMADO):
+    """Tamanhos de termo cujo ratio() com um de 'tamanho' letras ainda pode chegar ao corte.
+
+    ratio = 2·M / (a + b), com M ≤ min(a, b); fora desse intervalo nem vale comparar.
+    """
+    return [outro for outro in range(1, 2 * tamanho + 1) if 2 * min(outro, tamanho) >= corte * (outro + tamanho)]
+
+
+def _preco(valor):
+    """Valor da planilha/CSV → texto BR ('1.234,56'); '' se vazio ou inválido.
+
+    Aceita também o ponto decimal de exportações ('12.5', '1234.56'), quando o texto
+    não tem vírgula e termina em 1 ou 2 casas depois do ponto.
+    """
+    if valor is None or valor == "":
+        return ""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        numero = Decimal(repr(valor)) if isinstance(valor, float) else Decimal(valor)
+    else:
+        texto = str(valor).strip()
+        if ',' not in texto and re.fullmatch(r'-?\d+\.\d{1,2}', texto):
+            texto = texto.replace('.', ',')
+        numero = numeros.converter_br(texto)
+        if numero is None:
+            return ""
+    return numeros.formatar_br(numero)
+
+
+def _colunas(cabecalho):
+    """{campo: índice} a partir da linha de cabeçalho (nomes em CABECALHOS)."""
+    indices = {}
+    for indice, nome in enumerate(cabecalho):
+        nome = normalizar(nome).replace('_', ' ')
+        for campo, aceitos in CABECALHOS.items():
+            if campo not in indices and (nome in aceitos or nome.replace(' ', '_') in aceitos):
+                indices[campo] = indice
+    if 'descricao' not in indices:
+        raise ValueError("Cabeçalho sem coluna de descrição (esperado: descrição/produto)")
+    return indices
+
+
+def _linhas_csv(caminho):
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        amostra = f.read(4096)
+        f.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+        except csv.Error:
+            dialeto = csv.excel
+        yield from csv.reader(f, dialeto)
+
+
+def _linhas_xlsx(caminho):
+    for _, celulas in leitor_modelo.iterar_linhas(caminho):
+        ultima = max(celulas)
+        yield [celulas.get(coluna) for coluna in range(1, ultima + 1)]
+
+
+def ler_produtos(caminho):
+    """Gera Produto de um .csv ou .xlsx, em streaming (primeira linha = cabeçalho)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        linhas = _linhas_csv(caminho)
+    elif extensao in ('.xlsx', '.xlsm'):
+        linhas = _linhas_xlsx(caminho)
+    else:
+        raise ValueError(f"Formato de catálogo não suportado: {extensao} (use .csv ou .xlsx)")
+    indices = None
+    for linha in linhas:
+        if indices is None:
+            indices = _colunas(linha)
+            continue
+
+        def campo(nome):
+            indice = indices.get(nome)
+            return linha[indice] if indice is not None and indice < len(linha) else None
+
+        descricao = str(campo('descricao') or "").strip()
+        if not descricao:
+            continue
+        codigo = campo('codigo')
+        yield Produto(str(codigo).strip() if codigo not in (None, "") else "",
+                      descricao, str(campo('und') or "").strip(), _preco(campo('preco')))
+
+
+class Catalogo:
+    """Catálogo em SQLite: importação em streaming e busca por prefixo/palavras."""
+
+    def __init__(self, caminho=ARQUIVO_PADRAO):
+        self.caminho = os.path.abspath(caminho)
+        self._lock = threading.Lock()
+        self._criado = False
+        self._conexao = None      # conexão das buscas (aberta na primeira)
+        self._vocabulario = None  # {(inicial, tamanho): [termos]}, para a busca aproximada
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False)
+        if not self._criado:
+            conexao.execute("PRAGMA journal_mode = WAL")
+            conexao.executescript(_ESQUEMA)
+            self._criado = True
+        return conexao
+
+    @contextmanager
+    def _consulta(self):
+        """Conexão única das buscas, sob trava (uma busca por vez, sem abrir arquivo a cada tecla)."""
+        with self._lock:
+            if self._conexao is None:
+                self._conexao = self._conectar()
+            yield self._conexao
+
+    def fechar(self):
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    def __len__(self):
+        with self._consulta() as conexao:
+            return conexao.execute("SELECT count(*) FROM produtos").fetchone()[0]
+
+    def importar(self, caminho_arquivo):
+        """Substitui o catálogo pelo conteúdo do arquivo; retorna quantos produtos entraram."""
+        total = 0
+        with self._lock:
+            conexao = self._conectar()
+        with closing(conexao), conexao:
+            conexao.execute("DELETE FROM produtos")
+            conexao.execute("DELETE FROM termos")
+            conexao.execute("DELETE FROM vocabulario")
+            lote, lote_termos, vocabulario = [], [], set()
+            proximo_id = 1
+            for produto in ler_produtos(caminho_arquivo):
+                lote.append((proximo_id,) + tuple(produto) + (normalizar(produto.descricao),))
+                lote_termos.extend((termo, proximo_id)
+                                   for termo in termos(f"{produto.descricao} {produto.codigo}"))
+                vocabulario.update(termos_aproximaveis(produto.descricao))
+                proximo_id += 1
+                if len(lote) >= TAMANHO_LOTE:
+                    self._gravar_lote(conexao, lote, lote_termos)
+                    total += len(lote)
+                    lote, lote_termos = [], []
+            self._gravar_lote(conexao, lote, lote_termos)
+            total += len(lote)
+            conexao.executemany("INSERT INTO vocabulario (termo) VALUES (?)", ((termo,) for termo in vocabulario))
+        with self._consulta() as conexao:
+            conexao.execute("ANALYZE")
+            self._vocabulario = None
+        return total
+
+    @staticmethod
+    def _gravar_lote(conexao, lote, lote_termos):
+        conexao.executemany("INSERT INTO produtos (id, codigo, descricao, und, preco, chave) VALUES (?, ?, ?, ?, ?, ?)", lote)
+        conexao.executemany("INSERT OR IGNORE INTO termos (termo, produto_id) VALUES (?, ?)", lote_termos)
+
+    # ---------- busca ----------
+
+    def _carregar_vocabulario(self, conexao):
+        """Vocabulário gravado na importação, agrupado por (inicial, tamanho).
+
+        Catálogo importado antes da tabela 'vocabulario' existir: monta-a uma vez a partir
+        das descrições.
+        """
+        linhas = conexao.execute("SELECT termo FROM vocabulario").fetchall()
+        if not linhas and conexao.execute("SELECT 1 FROM produtos LIMIT 1").fetchone():
+            vocabulario = set()
+            for (descricao,) in conexao.execute("SELECT descricao FROM produtos"):
+                vocabulario.update(termos_aproximaveis(descricao))
+            with conexao:
+                conexao.executemany("INSERT OR IGNORE INTO vocabulario (termo) VALUES (?)",
+                                    ((termo,) for termo in vocabulario))
+            linhas = [(termo,) for termo in vocabulario]
+        grupos = {}
+        for (termo,) in linhas:
+            grupos.setdefault((termo[0], len(termo)), []).append(termo)
+        return grupos
+
+    def _termos_aproximados(self, conexao, termo):
+        """Termos do catálogo parecidos com um termo que não existe (mesma inicial, tamanho próximo)."""
+        if len(termo) < TAMANHO_MINIMO_APROXIMADO or any(c.isdigit() for c in termo):
+            return []
+        if self._vocabulario is None:
+            self._vocabulario = self._carregar_vocabulario(conexao)
+        candidatos = [parecido for tamanho in _tamanhos_compativeis(len(termo))
+                      for parecido in self._vocabulario.get((termo[0], tamanho), ())]
+        return difflib.get_close_matches(termo, candidatos, n=3, cutoff=CORTE_APROXIMADO)
+
+    def _faixas(self, conexao, palavra):
+        """Faixas de termos para uma palavra: ela como prefixo ou, sem nenhum termo, os parecidos."""
+        if conexao.execute("SELECT 1 FROM termos WHERE termo >= ? AND termo < ? LIMIT 1",
+                           (palavra, palavra + _FIM)).fetchone():
+            return [(palavra, palavra + _FIM)]
+        return [(parecido, parecido + "\x00") for parecido in self._termos_aproximados(conexao, palavra)]
+
+    def _buscar_palavras(self, conexao, palavras, excluir, limite):
+        """Produtos com todas as palavras; percorre só os termos da palavra mais rara."""
+        faixas = []
+        for palavra in palavras:
+            alternativas = self._faixas(conexao, palavra)
+            if not alternativas:
+                return []
+            filtro = " OR ".join("(termo >= ? AND termo < ?)" for _ in alternativas)
+            parametros = [valor for par in alternativas for valor in par]
+            quantidade = conexao.execute(f"SELECT count(*) FROM (SELECT 1 FROM termos WHERE {filtro} LIMIT ?)",
+                                         parametros + [LIMITE_CONTAGEM]).fetchone()[0]
+            faixas.append((quantidade, filtro, parametros))
+        faixas.sort(key=lambda faixa: faixa[0])
+        _, filtro, parametros = faixas[0]
+        sql = (f"SELECT DISTINCT p.id, p.codigo, p.descricao, p.und, p.preco FROM termos t "
+               f"JOIN produtos p ON p.id = t.produto_id WHERE ({filtro.replace('termo', 't.termo')})")
+        for _, outro_filtro, outros_parametros in faixas[1:]:
+            sql += f" AND EXISTS (SELECT 1 FROM termos WHERE produto_id = p.id AND ({outro_filtro}))"
+            parametros = parametros + outros_parametros
+        if excluir:
+            sql += f" AND p.id NOT IN ({', '.join('?' * len(excluir))})"
+            parametros = parametros + list(excluir)
+        return conexao.execute(sql + " LIMIT ?", parametros + [limite]).fetchall()
+
+    def buscar(self, texto, limite=10):
+        """Produtos para o texto digitado: primeiro os de descrição que começa com o texto,
+        depois os que têm todas as palavras (cada uma como prefixo, em qualquer ordem)."""
+        chave = normalizar(texto)
+        palavras = termos(texto)
+        if not chave or not palavras:
+            return []
+        with self._consulta() as conexao:
+            encontrados = conexao.execute(
+                "SELECT id, codigo, descricao, und, preco FROM produtos WHERE chave >= ? AND chave < ? "
+                "ORDER BY chave LIMIT ?", (chave, chave + _FIM, limite)).fetchall()
+            if len(encontrados) < limite:
+                encontrados += self._buscar_palavras(conexao, palavras, [linha[0] for linha in encontrados],
+                                                     limite - len(encontrados))
+        return [Produto(*linha[1:]) for linha in encontrados]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catálogo de produtos para os itens do orçamento.")
+    parser.add_argument('--catalogo', default=ARQUIVO_PADRAO, help="Arquivo SQLite do catálogo")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    importar = comandos.add_parser('importar', help="Substitui o catálogo pelo conteúdo de um .csv/.xlsx")
+    importar.add_argument('arquivo')
+    buscar = comandos.add_parser('buscar', help="Mostra os produtos encontrados para um texto")
+    buscar.add_argument('texto')
+    buscar.add_argument('--limite', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    catalogo = Catalogo(args.catalogo)
+    if args.comando == 'importar':
+        total = catalogo.importar(args.arquivo)
+        logger.info("Catálogo importado: %d produto(s) de %s.", total, args.arquivo)
+        return 0
+    for produto in catalogo.buscar(args.texto, args.limite):
+        print(f"{produto.codigo:<12} {produto.descricao:<60} {produto.und:<6} {produto.preco:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
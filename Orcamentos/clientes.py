@@ -0,0 +1,113 @@
+"""Cadastro de clientes aprendido dos orçamentos gerados, com busca por prefixo.
+
+Os clientes vêm do banco local (banco.BancoOrcamentos): um por CNPJ (ou pelo nome,
+quando não há CNPJ), com os dados do orçamento mais recente. Para o autocompletar há
+dois índices ordenados, nome normalizado (sem acento, maiúsculo) e CNPJ só com
+dígitos; uma busca é um bisect até o início do prefixo e uma fatia de poucos itens,
+então fica bem abaixo de 1 ms mesmo com dezenas de milhares de clientes.
+
+carregar lê o banco fora da trava; o que for aprendido enquanto isso é guardado à parte
+e reaplicado sobre a foto lida, para não sumir quando os índices são trocados.
+"""
+import bisect
+import threading
+import unicodedata
+from collections import namedtuple
+
+from banco import somente_digitos
+
+Cliente = namedtuple('Cliente', 'cliente endereco cnpj telefone')
+CAMPOS = Cliente._fields
+
+
+def normalizar_nome(texto):
+    """'Padaria São João ' → 'PADARIA SAO JOAO' (chave do índice por nome)."""
+    texto = unicodedata.normalize('NFD', str(texto or "")).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.upper().split())
+
+
+def _chave_cliente(cliente):
+    return somente_digitos(cliente.cnpj) or normalizar_nome(cliente.cliente)
+
+
+class CadastroClientes:
+    """Clientes conhecidos + índices ordenados (nome e CNPJ) para sugestões por prefixo."""
+
+    def __init__(self, banco=None):
+        self.banco = banco
+        self._lock = threading.Lock()
+        self._clientes = {}       # chave → Cliente
+        self._por_nome = []       # [(nome normalizado, chave)] ordenado
+        self._por_cnpj = []       # [(dígitos, chave)] ordenado
+        self._aprendidos = None   # chave → Cliente aprendido durante um carregar (None fora dele)
+
+    def __len__(self):
+        return len(self._clientes)
+
+    def carregar(self):
+        """(Re)lê os clientes do banco; pode rodar fora da thread do Tk."""
+        with self._lock:
+            self._aprendidos = {}
+        por_chave, por_nome, por_cnpj = {}, [], []
+        for cliente, endereco, cnpj, telefone, digitos in self.banco.clientes():
+            nome = normalizar_nome(cliente)
+            chave = digitos or nome
+            if chave in por_chave:  # mesmo nome sem CNPJ com grafias diferentes
+                continue
+            por_chave[chave] = Cliente(cliente or "", endereco or "", cnpj or "", telefone or "")
+            if nome:
+                por_nome.append((nome, chave))
+            if digitos:
+                por_cnpj.append((digitos, chave))
+        por_nome.sort()
+        por_cnpj.sort()
+        with self._lock:  # troca os índices de uma vez: buscas em andamento veem o antigo ou o novo
+            self._clientes, self._por_nome, self._por_cnpj = por_chave, por_nome, por_cnpj
+            for chave, cliente in (self._aprendidos or {}).items():
+                self._incluir(chave, cliente)
+            self._aprendidos = None
+            return len(self._clientes)
+
+    def aprender(self, registro):
+        """Inclui/atualiza o cliente de um registro recém-gerado (sem reler o banco)."""
+        cliente = Cliente(*(str(registro.get(campo) or "").strip() for campo in CAMPOS))
+        chave = _chave_cliente(cliente)
+        if not chave:
+            return
+        with self._lock:
+            if self._aprendidos is not None:
+                self._aprendidos[chave] = cliente
+            self._incluir(chave, cliente)
+
+    def _incluir(self, chave, cliente):
+        """Troca a entrada da chave nos índices (chamar com a trava)."""
+        anterior = self._clientes.get(chave)
+        if anterior is not None:
+            self._remover(self._por_nome, (normalizar_nome(anterior.cliente), chave))
+            self._remover(self._por_cnpj, (somente_digitos(anterior.cnpj), chave))
+        self._clientes[chave] = cliente
+        if cliente.cliente:
+            bisect.insort(self._por_nome, (normalizar_nome(cliente.cliente), chave))
+        if somente_digitos(cliente.cnpj):
+            bisect.insort(self._por_cnpj, (somente_digitos(cliente.cnpj), chave))
+
+    @staticmethod
+    def _remover(indice, entrada):
+        posicao = bisect.bisect_left(indice, entrada)
+        if posicao < len(indice) and indice[posicao] == entrada:
+            del indice[posicao]
+
+    def sugestoes(self, texto, campo='cliente', limite=8):
+        """Clientes cujo nome (campo='cliente') ou CNPJ (campo='cnpj') começa com o texto."""
+        prefixo = somente_digitos(texto) if campo == 'cnpj' else normalizar_nome(texto)
+        if not prefixo:
+            return []
+        with self._lock:
+            indice = self._por_cnpj if campo == 'cnpj' else self._por_nome
+            inicio = bisect.bisect_left(indice, (prefixo,))
+            encontrados = []
+            for chave_indice, chave in indice[inicio:inicio + limite]:
+                if not chave_indice.startswith(prefixo):
+                    break
+                encontrados.append(self._clientes[chave])
+        return encontrados
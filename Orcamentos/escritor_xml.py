@@ -0,0 +1,550 @@
+"""Escritor rápido: gera cópias do modelo editando direto o XML da planilha.
+
+O .xlsx é um ZIP. Em vez de passar pelo openpyxl (que reconstrói o pacote inteiro e
+pode perder desenhos), o modelo é lido uma vez para a memória e, a cada cópia:
+  - só xl/worksheets/sheetN.xml (planilha ativa) e xl/sharedStrings.xml são reescritos;
+  - todos os outros membros (imagens, estilos, desenhos...) são copiados byte a byte,
+    sem descomprimir nem recomprimir.
+Só as linhas que contêm células mapeadas são remontadas; o resto do XML é reaproveitado
+como texto pronto.
+
+O zipfile não tem API pública para gravar um membro já comprimido: a cópia bruta mexe em
+atributos internos do ZipFile. Por isso ela é testada uma vez (copia_bruta_disponivel)
+e, se falhar nesta versão do Python, os membros são gravados pela API pública
+(writestr com o ZipInfo original), recomprimindo.
+"""
+import copy
+import functools
+import io
+import os
+import posixpath
+import re
+import struct
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from numeros import ID_FORMATO_MOEDA
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_RE_ROW = re.compile(r'<row\b[^>]*?(?:/>|>.*?</row>)', re.S)
+_RE_CELL = re.compile(r'<c\b[^>]*?(?:/>|>.*?</c>)', re.S)
+_RE_ATTR_R = re.compile(r'\sr="([A-Z]*)(\d+)"')
+_RE_ATTR_S = re.compile(r'\ss="(\d+)"')
+_RE_CELULA = re.compile(r'^([A-Z]+)(\d+)$')
+_RE_CONTROLE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Referência A1 (ou intervalo) dentro de fórmula/atributo; ignora nomes de função e outras planilhas
+_RE_REFERENCIA = re.compile(r"(?<![A-Za-z0-9_.!$'])(\$?[A-Z]{1,3}\$?)(\d+)(?::(\$?[A-Z]{1,3}\$?)(\d+))?(?![A-Za-z0-9_(!])")
+# Tudo o que carrega nº de linha no XML da planilha: <row r>, <c r>, fórmulas e ref/sqref
+_RE_DESLOCAR = re.compile(r'(<row\b[^>]*?\sr=")(\d+)|(<c\b[^>]*?\sr="[A-Z]+)(\d+)'
+                          r'|(<(?:f|formula\d?)\b[^>/]*>)([^<]*)|(\s(?:ref|sqref)=")([^"]*)')
+_RE_ANCORA_LINHA = re.compile(r'(<(?:\w+:)?row>)(\d+)(</(?:\w+:)?row>)')
+
+
+def _escapar(texto):
+    """Escapa &, < e > para texto de elemento XML (xml.sax.saxutils.escape puxa urllib/http no import)."""
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def coluna_para_indice(coluna):
+    """'A' → 1, 'AA' → 27."""
+    indice = 0
+    for letra in coluna:
+        indice = indice * 26 + (ord(letra) - 64)
+    return indice
+
+
+def indice_para_coluna(indice):
+    """1 → 'A', 27 → 'AA'."""
+    letras = ""
+    while indice > 0:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def separar_celula(celula):
+    """'B36' → ('B', 36)."""
+    match = _RE_CELULA.match(celula)
+    if not match:
+        raise ValueError(f"Célula inválida: {celula}")
+    return match.group(1), int(match.group(2))
+
+
+def deslocar_referencias(texto, linha, quantidade, expandir=False):
+    """Desloca as referências A1 do texto como o Excel ao inserir 'quantidade' linhas antes de 'linha'.
+
+    Com expandir=True (fórmulas), intervalos que terminam logo acima da inserção também
+    crescem: SUM(F13:F34) com linhas inseridas em 35 passa a somar os itens novos.
+    Trechos entre aspas (textos da fórmula) não são alterados.
+    """
+    def ajustar(match):
+        inicio, fim = int(match.group(2)), match.group(4)
+        novo_inicio = inicio + quantidade if inicio >= linha else inicio
+        if fim is None:
+            return f"{match.group(1)}{novo_inicio}"
+        fim = int(match.group(4))
+        if fim >= linha or (expandir and fim == linha - 1):
+            fim += quantidade
+        return f"{match.group(1)}{novo_inicio}:{match.group(3)}{fim}"
+
+    partes = texto.split('"')
+    for i in range(0, len(partes), 2):
+        partes[i] = _RE_REFERENCIA.sub(ajustar, partes[i])
+    return '"'.join(partes)
+
+
+def traduzir_formula(texto, linhas, colunas):
+    """Fórmula copiada 'linhas' abaixo e 'colunas' à direita (referências com $ não andam).
+
+    É como o Excel expande uma fórmula compartilhada: C13*E13 em F14 vira C14*E14.
+    """
+    def ajustar_ref(coluna, linha):
+        letras = coluna.strip('$')
+        if not coluna.startswith('$'):
+            letras = indice_para_coluna(coluna_para_indice(letras) + colunas)
+        if not coluna.endswith('$'):
+            linha = int(linha) + linhas
+        return f"{'$' if coluna.startswith('$') else ''}{letras}{'$' if coluna.endswith('$') else ''}{linha}"
+
+    def ajustar(match):
+        novo = ajustar_ref(match.group(1), match.group(2))
+        if match.group(3) is None:
+            return novo
+        return f"{novo}:{ajustar_ref(match.group(3), match.group(4))}"
+
+    partes = texto.split('"')
+    for i in range(0, len(partes), 2):
+        partes[i] = _RE_REFERENCIA.sub(ajustar, partes[i])
+    return '"'.join(partes)
+
+
+def localizar_planilha_ativa(zf):
+    """Membro do ZIP com a planilha ativa (ex.: 'xl/worksheets/sheet1.xml')."""
+    workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    view = workbook.find(f'{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView')
+    ativa = int(view.get('activeTab', 0)) if view is not None else 0
+    sheets = workbook.findall(f'{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet')
+    if not sheets:
+        raise ValueError("Workbook sem planilhas.")
+    rel_id = sheets[min(ativa, len(sheets) - 1)].get(f'{{{NS_REL}}}id')
+    rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.findall(f'{{{NS_PKG_REL}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            alvo = rel.get('Target')
+            if alvo.startswith('/'):
+                return alvo.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', alvo))
+    raise ValueError(f"Relação da planilha ativa não encontrada: {rel_id}")
+
+
+TAMANHO_CABECALHO_LOCAL = 30  # cabeçalho local de arquivo do ZIP (APPNOTE 4.3.7), sem nome e extra
+
+
+def copiar_membro_bruto(destino, info, cabecalho_e_dados):
+    """Grava no ZIP de destino um membro já comprimido (sem recomprimir).
+
+    Usa atributos internos do ZipFile: só chamar se copia_bruta_disponivel().
+    """
+    novo = copy.copy(info)
+    novo.header_offset = destino.fp.tell()
+    destino.fp.write(cabecalho_e_dados)
+    destino.filelist.append(novo)
+    destino.NameToInfo[novo.filename] = novo
+    destino.start_dir = destino.fp.tell()
+    destino._didModify = True
+
+
+def ler_membros_brutos(conteudo_zip):
+    """Lê {nome: (ZipInfo, cabeçalho local + dados comprimidos)} de um ZIP em memória."""
+    membros = {}
+    with zipfile.ZipFile(io.BytesIO(conteudo_zip)) as zf:
+        for info in zf.infolist():
+            inicio = info.header_offset
+            if conteudo_zip[inicio:inicio + 4] != b'PK\x03\x04':
+                raise zipfile.BadZipFile(f"Cabeçalho local inválido: {info.filename}")
+            tamanho_nome, tamanho_extra = struct.unpack_from('<HH', conteudo_zip, inicio + 26)
+            inicio_dados = inicio + TAMANHO_CABECALHO_LOCAL + tamanho_nome + tamanho_extra
+            dados = conteudo_zip[inicio_dados:inicio_dados + info.compress_size]
+            novo = copy.copy(info)
+            novo.flag_bits &= ~0x08  # CRC/tamanhos vão no cabeçalho local, sem data descriptor
+            membros[info.filename] = (novo, novo.FileHeader() + dados)
+    return membros
+
+
+@functools.lru_cache(maxsize=None)
+def copia_bruta_disponivel():
+    """True se a cópia bruta funciona neste Python (ZIP de teste gravado e relido byte a byte)."""
+    conteudo = b'copia bruta ' * 64
+    try:
+        origem = io.BytesIO()
+        with zipfile.ZipFile(origem, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('teste.txt', conteudo)
+        destino = io.BytesIO()
+        with zipfile.ZipFile(destino, 'w') as zout:
+            for info, bruto in ler_membros_brutos(origem.getvalue()).values():
+                copiar_membro_bruto(zout, info, bruto)
+        with zipfile.ZipFile(io.BytesIO(destino.getvalue())) as zf:
+            return zf.namelist() == ['teste.txt'] and zf.testzip() is None and zf.read('teste.txt') == conteudo
+    except Exception:
+        return False
+
+
+def ler_membros(conteudo_zip):
+    """{nome: (ZipInfo, conteúdo)} para gravar_membro: bruto se a cópia bruta funciona, senão descomprimido."""
+    if copia_bruta_disponivel():
+        return ler_membros_brutos(conteudo_zip)
+    with zipfile.ZipFile(io.BytesIO(conteudo_zip)) as zf:
+        return {info.filename: (info, zf.read(info)) for info in zf.infolist()}
+
+
+def gravar_membro(destino, info, conteudo):
+    """Grava um membro lido por ler_membros no ZIP de destino."""
+    if copia_bruta_disponivel():
+        copiar_membro_bruto(destino, info, conteudo)
+    else:
+        destino.writestr(copy.copy(info), conteudo)
+
+
+def midia_do_modelo(caminho_modelo):
+    """Membros xl/media/* do modelo, como em ler_membros: {nome: (ZipInfo, conteúdo)}."""
+    with open(caminho_modelo, 'rb') as f:
+        membros = ler_membros(f.read())
+    return {nome: membro for nome, membro in membros.items() if nome.startswith('xl/media/')}
+
+
+def reempacotar_com_midia(conteudo_zip, midia, destino):
+    """Grava o ZIP (em memória) em destino num único passo, com a mídia do modelo.
+
+    Membros de 'midia' com o mesmo nome substituem os do ZIP e os ausentes são
+    acrescentados: nenhuma entrada duplicada, sem pasta temporária e, com a cópia
+    bruta disponível, nada recomprimido. Retorna o nº de mídias do modelo gravadas.
+    """
+    membros = ler_membros(conteudo_zip)
+    membros.update(midia)
+    with zipfile.ZipFile(destino, 'w') as zout:
+        for info, conteudo in membros.values():
+            gravar_membro(zout, info, conteudo)
+    return len(midia)
+
+
+def _xml_texto(texto):
+    texto = _RE_CONTROLE.sub('', texto)
+    espaco = ' xml:space="preserve"' if texto != texto.strip() else ''
+    return f'<t{espaco}>{_escapar(texto)}</t>'
+
+
+class _LinhaModelo:
+    """Linha do modelo que contém células mapeadas, pronta para ser remontada."""
+
+    def __init__(self, numero, abertura, celulas_fixas, estilos):
+        self.numero = numero
+        self.abertura = abertura          # '<row r="13" ...>'
+        self.celulas_fixas = celulas_fixas  # [(indice_coluna, xml)] não mapeadas
+        self.estilos = estilos            # {coluna: ' s="N"'} das células mapeadas
+
+
+class ModeloXML:
+    """Modelo .xlsx mantido em memória; gera cópias reescrevendo só o XML necessário."""
+
+    preserva_midia = True
+
+    def __init__(self, caminho_modelo, celulas_mapeadas, celulas_moeda=()):
+        self.caminho = os.path.abspath(caminho_modelo)
+        self.nome_base = os.path.splitext(os.path.basename(caminho_modelo))[0]
+        with open(self.caminho, 'rb') as f:
+            conteudo = f.read()
+
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as zf:
+            nomes = zf.namelist()
+            self.caminho_planilha = localizar_planilha_ativa(zf)
+            xml_planilha = zf.read(self.caminho_planilha).decode('utf-8')
+            self._sst = None
+            if 'xl/sharedStrings.xml' in nomes:
+                self._preparar_shared_strings(zf.read('xl/sharedStrings.xml').decode('utf-8'))
+            self._substituicoes = {}
+            self._sem_calc_chain = self._remover_calc_chain(zf) if 'xl/calcChain.xml' in nomes else {}
+            if self._preparar_planilha(xml_planilha, celulas_mapeadas):
+                self._substituicoes.update(self._sem_calc_chain)
+            self._desenhos = self._ler_desenhos(zf, nomes)
+            if celulas_moeda and 'xl/styles.xml' in nomes:
+                self._aplicar_formato_moeda(zf.read('xl/styles.xml').decode('utf-8'), celulas_moeda)
+
+        self.tem_imagens = any(n.startswith('xl/media/') for n in nomes)
+        self._membros = ler_membros(conteudo)
+        self._ordem = nomes
+
+    # ---------- preparação (uma vez por modelo) ----------
+
+    def _preparar_shared_strings(self, xml_sst):
+        abertura = re.search(r'<sst\b[^>]*>', xml_sst)
+        fim = xml_sst.rfind('</sst>')
+        if not abertura or fim < 0:
+            return  # <sst/> vazio ou fora do padrão: usa inlineStr
+        unique = re.search(r'uniqueCount="(\d+)"', abertura.group(0))
+        total = len(re.findall(r'<si\b', xml_sst)) if not unique else int(unique.group(1))
+        tag = re.sub(r'\s(?:count|uniqueCount)="\d+"', '', abertura.group(0))
+        self._sst = {
+            'antes': xml_sst[:abertura.start()],
+            'tag': tag[:-1].rstrip('/').rstrip(),
+            'corpo': xml_sst[abertura.end():fim],
+            'depois': xml_sst[fim:],
+            'total': total,
+        }
+
+    def _remover_calc_chain(self, zf):
+        """Substituições que removem o calcChain (fórmulas mapeadas viram valores ou linhas
+        são inseridas); sem isso o Excel acusa reparo."""
+        tipos = zf.read('[Content_Types].xml').decode('utf-8')
+        tipos = re.sub(r'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', '', tipos)
+        rels = zf.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+        rels = re.sub(r'<Relationship\b[^>]*Target="[^"]*calcChain\.xml"[^>]*/>', '', rels)
+        return {
+            '[Content_Types].xml': tipos.encode('utf-8'),
+            'xl/_rels/workbook.xml.rels': rels.encode('utf-8'),
+            'xl/calcChain.xml': None,
+        }
+
+    def _aplicar_formato_moeda(self, xml_estilos, celulas_moeda):
+        """Troca o estilo das células de moeda por uma cópia com numFmtId 4 ('#,##0.00').
+
+        Cada estilo original ganha um único clone no fim de <cellXfs>; styles.xml é
+        reescrito uma vez aqui, não a cada cópia.
+        """
+        bloco = re.search(r'(<cellXfs\b[^>]*>)(.*?)(</cellXfs>)', xml_estilos, re.S)
+        if not bloco:
+            return
+        xfs = re.findall(r'<xf\b[^>]*?(?:/>|>.*?</xf>)', bloco.group(2), re.S)
+        clones = {}
+        for linha in self._linhas.values():
+            for col, estilo in linha.estilos.items():
+                if f"{col}{linha.numero}" not in celulas_moeda:
+                    continue
+                indice = int(_RE_ATTR_S.search(estilo).group(1)) if estilo else 0
+                if indice not in clones:
+                    if indice >= len(xfs):
+                        continue
+                    xf = re.sub(r'\s(?:numFmtId|applyNumberFormat)="[^"]*"', '', xfs[indice])
+                    xfs.append(re.sub(r'^<xf\b', f'<xf numFmtId="{ID_FORMATO_MOEDA}" applyNumberFormat="1"', xf))
+                    clones[indice] = len(xfs) - 1
+                linha.estilos[col] = f' s="{clones[indice]}"'
+        if not clones:
+            return
+        abertura = re.sub(r'\scount="\d+"', '', bloco.group(1))[:-1] + f' count="{len(xfs)}">'
+        novo = xml_estilos[:bloco.start()] + abertura + ''.join(xfs) + bloco.group(3) + xml_estilos[bloco.end():]
+        self._substituicoes['xl/styles.xml'] = novo.encode('utf-8')
+
+    def _ler_desenhos(self, zf, nomes):
+        """{membro: xml} dos desenhos da planilha ativa (âncoras mudam se linhas forem inseridas)."""
+        pasta, arquivo = posixpath.split(self.caminho_planilha)
+        caminho_rels = posixpath.join(pasta, '_rels', arquivo + '.rels')
+        if caminho_rels not in nomes:
+            return {}
+        desenhos = {}
+        rels = ElementTree.fromstring(zf.read(caminho_rels))
+        for rel in rels.findall(f'{{{NS_PKG_REL}}}Relationship'):
+            if not rel.get('Type', '').endswith('/drawing'):
+                continue
+            alvo = rel.get('Target')
+            nome = alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join(pasta, alvo))
+            if nome in nomes:
+                desenhos[nome] = zf.read(nome).decode('utf-8')
+        return desenhos
+
+    def _preparar_planilha(self, xml, celulas_mapeadas):
+        """Divide o XML em partes fixas + linhas a remontar. Retorna True se havia fórmula mapeada."""
+        por_linha = {}
+        for celula in celulas_mapeadas:
+            col, linha = separar_celula(celula)
+            por_linha.setdefault(linha, set()).add(col)
+
+        ini_dados = re.search(r'<sheetData\b[^>]*?(/?)>', xml)
+        if not ini_dados:
+            raise ValueError("Planilha sem <sheetData> (prefixo de namespace não suportado).")
+        if ini_dados.group(1):  # <sheetData/>
+            xml = xml[:ini_dados.start()] + '<sheetData></sheetData>' + xml[ini_dados.end():]
+            ini_dados = re.search(r'<sheetData\b[^>]*>', xml)
+        fim_dados = xml.index('</sheetData>', ini_dados.end())
+
+        partes = []
+        cursor = 0
+        tem_formula = False
+        pendentes = sorted(por_linha)
+
+        def inserir_ausentes(ate_linha, posicao):
+            nonlocal cursor
+            while pendentes and (ate_linha is None or pendentes[0] < ate_linha):
+                numero = pendentes.pop(0)
+                partes.append(xml[cursor:posicao])
+                cursor = posicao
+                estilos = {col: '' for col in por_linha[numero]}
+                partes.append(_LinhaModelo(numero, f'<row r="{numero}">', [], estilos))
+
+        for match in _RE_ROW.finditer(xml, ini_dados.end(), fim_dados):
+            bloco = match.group(0)
+            abertura = re.match(r'<row\b[^>]*?/?>', bloco).group(0)
+            r = re.search(r'\sr="(\d+)"', abertura)
+            if not r:
+                raise ValueError("Linha sem atributo r no XML do modelo.")
+            numero = int(r.group(1))
+            inserir_ausentes(numero, match.start())
+            if numero not in por_linha:
+                continue
+            pendentes.remove(numero)
+            colunas = por_linha[numero]
+            fixas, estilos = [], {col: '' for col in colunas}
+            for cel in _RE_CELL.finditer(bloco):
+                xml_cel = cel.group(0)
+                ref = _RE_ATTR_R.search(xml_cel[:xml_cel.find('>') + 1])
+                if not ref:
+                    raise ValueError(f"Célula sem atributo r na linha {numero}.")
+                col = ref.group(1)
+                if col in colunas:
+                    s = _RE_ATTR_S.search(xml_cel[:xml_cel.find('>') + 1])
+                    estilos[col] = f' s="{s.group(1)}"' if s else ''
+                    tem_formula = tem_formula or '<f' in xml_cel
+                else:
+                    fixas.append((coluna_para_indice(col), xml_cel))
+            if abertura.endswith('/>'):
+                abertura = abertura[:-2].rstrip() + '>'
+            partes.append(xml[cursor:match.start()])
+            partes.append(_LinhaModelo(numero, abertura, fixas, estilos))
+            cursor = match.end()
+
+        inserir_ausentes(None, fim_dados)
+        partes.append(xml[cursor:])
+        self._partes = partes
+        self._linhas = {parte.numero: parte for parte in partes if isinstance(parte, _LinhaModelo)}
+        return tem_formula
+
+    # ---------- geração (a cada cópia) ----------
+
+    def _celula_xml(self, ref, estilo, valor, novas_strings):
+        if valor is None or valor == "":
+            return f'<c r="{ref}"{estilo}/>'
+        if isinstance(valor, Decimal):
+            return f'<c r="{ref}"{estilo}><v>{valor:f}</v></c>'
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return f'<c r="{ref}"{estilo}><v>{valor}</v></c>'
+        texto = str(valor)
+        if self._sst is None:
+            return f'<c r="{ref}"{estilo} t="inlineStr"><is>{_xml_texto(texto)}</is></c>'
+        indice = novas_strings.setdefault(texto, self._sst['total'] + len(novas_strings))
+        return f'<c r="{ref}"{estilo} t="s"><v>{indice}</v></c>'
+
+    def _montar_linha(self, linha, celulas, novas_strings):
+        lista = list(linha.celulas_fixas)
+        for col, estilo in linha.estilos.items():
+            ref = f"{col}{linha.numero}"
+            lista.append((coluna_para_indice(col), self._celula_xml(ref, estilo, celulas.get(ref), novas_strings)))
+        lista.sort(key=lambda par: par[0])
+        return linha.abertura + ''.join(xml for _, xml in lista) + '</row>'
+
+    def _clonar_linha(self, modelo, numero):
+        """Linha nova com o estilo da linha 'modelo' (só estilos; valores fixos não são copiados)."""
+        abertura = re.sub(r'(\sr=")\d+', rf'\g<1>{numero}', modelo.abertura, count=1)
+        fixas = []
+        for indice, xml_cel in modelo.celulas_fixas:
+            tag = xml_cel[:xml_cel.find('>') + 1]
+            s = _RE_ATTR_S.search(tag)
+            col = _RE_ATTR_R.search(tag).group(1)
+            fixas.append((indice, f'<c r="{col}{numero}"{s.group(0) if s else ""}/>'))
+        return _LinhaModelo(numero, abertura, fixas, modelo.estilos)
+
+    def _inserir_linhas(self, xml, linha, quantidade, celulas, novas_strings):
+        """Insere 'quantidade' linhas antes de 'linha' num único passo sobre o XML.
+
+        Um só re.sub renumera linhas/células abaixo, fórmulas e ref/sqref (mescladas,
+        dimensão, validações...); as linhas novas herdam o estilo da linha anterior.
+        """
+        modelo = self._linhas.get(linha - 1)
+        if modelo is None:
+            raise ValueError(f"Linha {linha - 1} não é mapeada no modelo; não é possível inserir linhas.")
+
+        def ajustar(match):
+            if match.group(2) is not None:
+                numero = int(match.group(2))
+                return f"{match.group(1)}{numero + quantidade if numero >= linha else numero}"
+            if match.group(4) is not None:
+                numero = int(match.group(4))
+                return f"{match.group(3)}{numero + quantidade if numero >= linha else numero}"
+            if match.group(5) is not None:
+                tag = re.sub(r'(\sref=")([^"]*)',
+                             lambda m: m.group(1) + deslocar_referencias(m.group(2), linha, quantidade),
+                             match.group(5))
+                return tag + deslocar_referencias(match.group(6), linha, quantidade, expandir=True)
+            return match.group(7) + deslocar_referencias(match.group(8), linha, quantidade)
+
+        xml = _RE_DESLOCAR.sub(ajustar, xml)
+        novas = ''.join(self._montar_linha(self._clonar_linha(modelo, linha + i), celulas, novas_strings)
+                        for i in range(quantidade))
+        anterior = re.search(rf'<row\b[^>]*?\sr="{linha - 1}"', xml)
+        fim = xml.index('</row>', anterior.end()) + len('</row>')
+        return xml[:fim] + novas + xml[fim:]
+
+    def _desenhos_deslocados(self, linha, quantidade):
+        """Âncoras de imagens/formas abaixo da inserção descem junto (linhas 0-based no XML)."""
+        alterados = {}
+        for nome, xml in self._desenhos.items():
+            novo = _RE_ANCORA_LINHA.sub(
+                lambda m: f"{m.group(1)}{int(m.group(2)) + quantidade}{m.group(3)}"
+                if int(m.group(2)) + 1 >= linha else m.group(0), xml)
+            if novo != xml:
+                alterados[nome] = novo.encode('utf-8')
+        return alterados
+
+    def renderizar(self, celulas, insercao=None):
+        """Retorna {membro: bytes} dos XMLs reescritos para as células informadas.
+
+        insercao=(linha, quantidade) insere linhas antes de 'linha' (itens além da
+        capacidade do modelo); as células já vêm nas posições finais, deslocadas.
+        """
+        novas_strings = {}
+        inseridas = {}
+        if insercao:
+            linha, quantidade = insercao
+            base = {}
+            for ref, valor in celulas.items():
+                col, numero = separar_celula(ref)
+                if numero >= linha + quantidade:
+                    base[f"{col}{numero - quantidade}"] = valor
+                elif numero >= linha:
+                    inseridas[ref] = valor
+                else:
+                    base[ref] = valor
+            celulas = base
+        xml = ''.join(parte if isinstance(parte, str) else self._montar_linha(parte, celulas, novas_strings)
+                      for parte in self._partes)
+        alterados = dict(self._substituicoes)
+        if insercao:
+            xml = self._inserir_linhas(xml, linha, quantidade, inseridas, novas_strings)
+            alterados.update(self._sem_calc_chain)
+            alterados.update(self._desenhos_deslocados(linha, quantidade))
+        alterados[self.caminho_planilha] = xml.encode('utf-8')
+        if self._sst is not None:
+            sst = self._sst
+            total = sst['total'] + len(novas_strings)
+            novas = ''.join(f'<si>{_xml_texto(texto)}</si>' for texto in novas_strings)
+            alterados['xl/sharedStrings.xml'] = (
+                f'{sst["antes"]}{sst["tag"]} count="{total}" uniqueCount="{total}">'
+                f'{sst["corpo"]}{novas}{sst["depois"]}'
+            ).encode('utf-8')
+        return alterados
+
+    def salvar_copia(self, celulas, destino, insercao=None):
+        """Grava a cópia em destino (caminho ou arquivo binário). Retorna nº de células gravadas."""
+        alterados = self.renderizar(celulas, insercao)
+        with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for nome in self._ordem:
+                info, bruto = self._membros[nome]
+                if nome not in alterados:
+                    gravar_membro(zout, info, bruto)
+                elif alterados[nome] is not None:
+                    novo = zipfile.ZipInfo(nome, date_time=info.date_time)
+                    novo.compress_type = zipfile.ZIP_DEFLATED
+                    novo.external_attr = info.external_attr
+                    zout.writestr(novo, alterados[nome])
+        return len(celulas)
@@ -0,0 +1,259 @@
+"""Tabela de itens virtualizada para a interface (Tkinter).
+
+Os valores ficam numa lista de dicts (um por linha do orçamento); só existem widgets
+para as linhas visíveis. Ao rolar, os mesmos Entry são reaproveitados e recebem os
+valores das novas linhas, então 22 ou 2.000 itens custam o mesmo número de widgets.
+
+Cada célula tem um placeholder (cinza, vindo do modelo) e um valor real (preto,
+digitado). Só o valor real é devolvido por itens()/coluna().
+"""
+import tkinter as tk
+from tkinter import ttk
+
+COR_PAR, COR_IMPAR = '#f8f9fa', '#ffffff'
+
+
+class GradeItens(tk.Frame):
+    """Grade de itens que renderiza só as linhas visíveis e reaproveita os widgets."""
+
+    def __init__(self, master, colunas, linhas=22, placeholders_padrao=None, altura=300,
+                 ao_alterar=None, ao_criar_linha=None, cor_placeholder='#7f8c8d', fonte=('Arial', 9), **kwargs):
+        kwargs.setdefault('bg', '#f0f0f0')
+        super().__init__(master, **kwargs)
+        self.chaves = [chave for chave, _ in colunas]
+        self.larguras = dict(colunas)
+        self.placeholders_padrao = placeholders_padrao or {}
+        self.ao_alterar = ao_alterar
+        self.ao_criar_linha = ao_criar_linha  # recebe {chave: Entry} de cada linha criada no pool
+        self.cor_placeholder = cor_placeholder
+        self.fonte = fonte
+        self.valores = [{} for _ in range(linhas)]       # valores reais digitados
+        self.placeholders = [{} for _ in range(linhas)]  # placeholders vindos do modelo
+        self.primeira = 0
+        self._pool = []           # [(frame, {chave: Entry})] reaproveitados na rolagem
+        self._altura_linha = None
+
+        self.area = tk.Frame(self, bg=kwargs['bg'], height=altura)
+        self.area.grid_propagate(False)
+        self.area.pack_propagate(False)
+        self.barra = ttk.Scrollbar(self, orient='vertical', command=self._rolar, style='TScrollbar')
+        self.area.pack(side='left', fill='both', expand=True)
+        self.barra.pack(side='right', fill='y')
+        self.area.bind('<Configure>', self._redimensionar)
+        for widget in (self.area, self.barra):
+            self._bind_roda(widget)
+
+    # ---------- dados ----------
+
+    @property
+    def quantidade(self):
+        return len(self.valores)
+
+    def adicionar_linhas(self, quantidade=1):
+        self.valores.extend({} for _ in range(quantidade))
+        self.placeholders.extend({} for _ in range(quantidade))
+        self._redesenhar()
+
+    def placeholder(self, linha, chave):
+        texto = self.placeholders[linha].get(chave)
+        if texto is None:
+            texto = self.placeholders_padrao.get(chave, "").format(n=linha + 1)
+        return texto
+
+    def definir_placeholders(self, placeholders):
+        """Define placeholders de várias linhas de uma vez: {linha: {chave: texto}}."""
+        for linha, valores in placeholders.items():
+            if linha >= self.quantidade:
+                self.adicionar_linhas(linha + 1 - self.quantidade)
+            self.placeholders[linha].update({chave: texto for chave, texto in valores.items() if texto})
+        self._redesenhar()
+
+    def obter(self, linha, chave):
+        return self.valores[linha].get(chave, "")
+
+    def definir(self, linha, chave, valor):
+        if valor:
+            self.valores[linha][chave] = valor
+        else:
+            self.valores[linha].pop(chave, None)
+        self._redesenhar()
+
+    def preencher(self, linha, valores):
+        """Define vários valores da linha (ex.: produto escolhido) e avisa ao_alterar de cada um."""
+        alterados = []
+        for chave, valor in valores.items():
+            if valor != self.valores[linha].get(chave, ""):
+                self.valores[linha][chave] = valor
+                alterados.append(chave)
+        self._redesenhar()
+        if self.ao_alterar:
+            for chave in alterados:
+                self.ao_alterar(linha, chave)
+
+    def coluna(self, chave):
+        return [valores.get(chave, "") for valores in self.valores]
+
+    def itens(self):
+        """Lista de dicts (valores reais), sem as linhas vazias do final."""
+        ultima = max((i for i, valores in enumerate(self.valores) if any(valores.values())), default=-1)
+        return [{chave: self.valores[i].get(chave, "") for chave in self.chaves} for i in range(ultima + 1)]
+
+    # ---------- widgets ----------
+
+    def _criar_linha(self):
+        frame = tk.Frame(self.area, bg=self['bg'])
+        entradas = {}
+        for idx, chave in enumerate(self.chaves):
+            entrada = tk.Entry(frame, width=self.larguras[chave], relief='solid', bd=1, font=self.fonte)
+            entrada.grid(row=0, column=idx, padx=1, pady=1, sticky='ew')
+            entrada.linha = None
+            entrada.chave = chave
+            entrada.bind('<FocusIn>', self._ao_focar)
+            entrada.bind('<FocusOut>', self._ao_desfocar)
+            entrada.bind('<KeyRelease>', self._ao_digitar)
+            entrada.bind('<Down>', lambda e: self._mover(e.widget, 1))
+            entrada.bind('<Return>', lambda e: self._mover(e.widget, 1))
+            entrada.bind('<Up>', lambda e: self._mover(e.widget, -1))
+            self._bind_roda(entrada)
+            entradas[chave] = entrada
+        self._default_fg = entradas[self.chaves[0]]['fg']
+        self._pool.append((frame, entradas))
+        if self.ao_criar_linha:
+            self.ao_criar_linha(entradas)
+        return frame
+
+    def _linhas_visiveis(self):
+        if self._altura_linha is None:
+            return 1
+        return max(1, self.area.winfo_height() // self._altura_linha)
+
+    def _redimensionar(self, event=None):
+        if not self._pool:
+            self._criar_linha().grid(row=0, column=0, sticky='w')
+            self.area.update_idletasks()
+            self._altura_linha = max(1, self._pool[0][0].winfo_reqheight())
+        necessarias = min(self._linhas_visiveis(), max(1, self.quantidade))
+        while len(self._pool) < necessarias:
+            self._criar_linha()
+        for posicao, (frame, _) in enumerate(self._pool):
+            if posicao < necessarias:
+                frame.grid(row=posicao, column=0, sticky='w')
+            else:
+                frame.grid_remove()
+        self._redesenhar()
+
+    def _redesenhar(self):
+        """Liga os widgets do pool às linhas primeira..primeira+visíveis."""
+        visiveis = min(self._linhas_visiveis(), len(self._pool))
+        self.primeira = max(0, min(self.primeira, self.quantidade - visiveis))
+        for posicao, (frame, entradas) in enumerate(self._pool[:visiveis]):
+            linha = self.primeira + posicao
+            if linha >= self.quantidade:
+                frame.grid_remove()
+                continue
+            frame.grid()
+            cor = COR_PAR if linha % 2 == 0 else COR_IMPAR
+            for chave, entrada in entradas.items():
+                entrada.linha = linha
+                self._mostrar(entrada, cor)
+        total = max(1, self.quantidade)
+        self.barra.set(self.primeira / total, min(1.0, (self.primeira + visiveis) / total))
+
+    def _mostrar(self, entrada, cor=None):
+        valor = self.valores[entrada.linha].get(entrada.chave, "")
+        entrada.delete(0, tk.END)
+        if valor or entrada is self.focus_get():
+            entrada.insert(0, valor)
+            entrada.config(fg=self._default_fg)
+        else:
+            entrada.insert(0, self.placeholder(entrada.linha, entrada.chave))
+            entrada.config(fg=self.cor_placeholder)
+        if cor:
+            entrada.config(bg=cor)
+
+    def _em_placeholder(self, entrada):
+        return entrada['fg'] == self.cor_placeholder
+
+    def _gravar(self, entrada):
+        if entrada.linha is None or self._em_placeholder(entrada):
+            return
+        texto = entrada.get()
+        anterior = self.valores[entrada.linha].get(entrada.chave, "")
+        if texto == anterior:
+            return
+        if texto:
+            self.valores[entrada.linha][entrada.chave] = texto
+        else:
+            self.valores[entrada.linha].pop(entrada.chave, None)
+        if self.ao_alterar:
+            self.ao_alterar(entrada.linha, entrada.chave)
+
+    def _ao_focar(self, event):
+        entrada = event.widget
+        if self._em_placeholder(entrada):
+            entrada.delete(0, tk.END)
+            entrada.config(fg=self._default_fg)
+
+    def _ao_desfocar(self, event):
+        entrada = event.widget
+        self._gravar(entrada)
+        if not entrada.get():
+            self._mostrar(entrada)
+
+    def _ao_digitar(self, event):
+        entrada = event.widget
+        self._gravar(entrada)
+        if len(entrada.get()) > entrada.cget('width'):
+            entrada.xview_moveto(1.0)
+
+    # ---------- rolagem e navegação ----------
+
+    def mostrar_linha(self, linha):
+        """Rola o mínimo necessário para a linha ficar visível."""
+        visiveis = min(self._linhas_visiveis(), len(self._pool)) or 1
+        if linha < self.primeira:
+            self.primeira = linha
+        elif linha >= self.primeira + visiveis:
+            self.primeira = linha - visiveis + 1
+        else:
+            return
+        self._redesenhar()
+
+    def _mover(self, entrada, delta):
+        self._gravar(entrada)
+        destino = entrada.linha + delta
+        if not 0 <= destino < self.quantidade:
+            return 'break'
+        self.focus_set()  # tira o foco antes de reaproveitar os widgets
+        self.mostrar_linha(destino)
+        for _, entradas in self._pool:
+            alvo = entradas[entrada.chave]
+            if alvo.linha == destino:
+                alvo.focus_set()
+                break
+        return 'break'
+
+    def _rolar(self, acao, quantidade, unidade=None):
+        visiveis = min(self._linhas_visiveis(), len(self._pool)) or 1
+        if acao == 'moveto':
+            self.primeira = int(round(float(quantidade) * self.quantidade))
+        elif acao == 'scroll':
+            passo = visiveis if unidade == 'pages' else 1
+            self.primeira += int(quantidade) * passo
+        foco = self.focus_get()
+        if foco is not None and getattr(foco, 'linha', None) is not None and foco.master in [f for f, _ in self._pool]:
+            self._gravar(foco)
+            self.focus_set()
+        self._redesenhar()
+
+    def _roda(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self._rolar('scroll', -3)
+        else:
+            self._rolar('scroll', 3)
+        return 'break'
+
+    def _bind_roda(self, widget):
+        widget.bind('<MouseWheel>', self._roda)
+        widget.bind('<Button-4>', self._roda)
+        widget.bind('<Button-5>', self._roda)
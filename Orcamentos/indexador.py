@@ -0,0 +1,197 @@
+"""Indexador de pastas com orçamentos já gerados (*_copia_*.xlsx) para o banco local.
+
+Uso:
+    python indexador.py pasta_dos_orcamentos [--banco orcamentos.db] [--workers N]
+
+Percorre a árvore de pastas, lê cada cópia em streaming (leitor_modelo, sem abrir o
+workbook no openpyxl) e grava número (A5), cliente (B6-B9), prazo/pagamento/condições,
+itens e total no banco (banco.BancoOrcamentos), com a data do arquivo como data do
+orçamento. A leitura roda num ProcessPoolExecutor, em blocos de arquivos.
+
+É incremental e retomável: cada arquivo indexado fica registrado com mtime e tamanho,
+e só arquivos novos ou alterados são lidos de novo. Os resultados são gravados bloco a
+bloco, então interromper no meio não perde o que já foi indexado.
+
+As cópias têm o layout do modelo de origem: o bloco de itens é detectado pelo
+cabeçalho/rodapé como em motor.detectar_bloco_itens, e B36-B39 descem junto com as
+linhas de itens inseridas. Para modelos com outro layout, passe o .mapa.json com --mapa.
+"""
+import argparse
+import datetime
+import fnmatch
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+import leitor_modelo
+import logs
+import mapa_celulas
+import motor
+import numeros
+from banco import ARQUIVO_PADRAO, BancoOrcamentos
+
+logger = logs.obter_logger('indexador')
+
+PADRAO_ARQUIVOS = '*_copia_*.xlsx'
+_RE_NUMERO_ARQUIVO = re.compile(r'_copia_(\d+)\.xlsx$', re.IGNORECASE)
+
+_mapas = {}  # caminho do .mapa.json (ou None) → MapaCelulas, por processo
+
+
+def listar_arquivos(pasta, padrao=PADRAO_ARQUIVOS):
+    """Gera (caminho absoluto, mtime_ns, tamanho) dos arquivos da árvore que casam com o padrão."""
+    pendentes = [os.path.abspath(pasta)]
+    while pendentes:
+        try:
+            entradas = os.scandir(pendentes.pop())
+        except OSError as e:
+            logger.warning("Pasta ignorada: %s", e)
+            continue
+        with entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    pendentes.append(entrada.path)
+                elif (entrada.is_file() and not entrada.name.startswith('~$')
+                      and fnmatch.fnmatch(entrada.name.lower(), padrao.lower())):
+                    info = entrada.stat()
+                    yield entrada.path, info.st_mtime_ns, info.st_size
+
+
+def _obter_mapa(caminho_mapa):
+    mapa = _mapas.get(caminho_mapa)
+    if mapa is None:
+        mapa = mapa_celulas.carregar_mapa(caminho_mapa, motor.MAPA_PADRAO) if caminho_mapa else motor.MAPA_PADRAO
+        _mapas[caminho_mapa] = mapa
+    return mapa
+
+
+def _texto_item(valor, chave):
+    """Valor de uma célula de item como texto BR (como seria digitado na interface)."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        texto = motor.valor_texto(valor)
+        return "" if texto.startswith('=') else texto  # fórmula do modelo: sem valor digitado
+    numero = Decimal(repr(valor)) if isinstance(valor, float) else Decimal(valor)
+    if chave in mapa_celulas.CHAVES_MOEDA:
+        return numeros.formatar_br(numero)
+    if chave == 'quant':
+        return numeros.formatar_quantidade(numero)
+    return str(valor)
+
+
+def extrair_orcamento(caminho, mapa=motor.MAPA_PADRAO):
+    """Lê uma cópia gerada e devolve (registro no formato do motor, número do orçamento).
+
+    O número vem de A5 (motor.extrair_numero); sem número em A5, do nome do arquivo.
+    """
+    linhas = list(leitor_modelo.iterar_linhas(caminho))
+    celulas = {(numero, coluna): valor for numero, valores in linhas for coluna, valor in valores.items()}
+
+    def valor(ref, extras=0):
+        linha, coluna = mapa_celulas.posicao(mapa.deslocar(ref, extras))
+        return celulas.get((linha, coluna))
+
+    bloco = motor.bloco_nas_linhas(linhas)
+    inicial, final = (bloco[0], bloco[1]) if bloco else (mapa.linha_inicial, mapa.linha_final)
+    extras = final - mapa.linha_final  # linhas de itens inseridas na geração
+
+    numero = motor.extrair_numero(motor.valor_texto(valor(mapa.numero)))
+    if numero is None:
+        encontrado = _RE_NUMERO_ARQUIVO.search(os.path.basename(caminho))
+        if encontrado is None:
+            raise ValueError(f"Número do orçamento não encontrado ({mapa.numero} vazio)")
+        numero = int(encontrado.group(1))
+
+    registro = {chave: motor.valor_texto(valor(ref)) for chave, ref in mapa.cliente}
+    registro.update({chave: motor.valor_texto(valor(ref, extras)) for chave, ref in mapa.adicionais})
+    colunas = [(chave, mapa_celulas.posicao(f"{letra}1")[1]) for chave, letra in mapa.colunas_itens]
+    itens = [{chave: _texto_item(celulas.get((linha, coluna)), chave) for chave, coluna in colunas}
+             for linha in range(inicial, final + 1)]
+    while itens and not any(itens[-1].values()):
+        itens.pop()
+    registro['itens'] = itens
+    return registro, numero
+
+
+def _extrair_bloco(tarefas, caminho_mapa=None):
+    """Extrai um bloco de (caminho, mtime_ns, tamanho); falhas viram erro do arquivo, sem parar o bloco."""
+    mapa = _obter_mapa(caminho_mapa)
+    resultados = []
+    for caminho, mtime_ns, tamanho in tarefas:
+        try:
+            registro, numero = extrair_orcamento(caminho, mapa)
+            pdf = os.path.splitext(caminho)[0] + ".pdf"
+            criado_em = datetime.datetime.fromtimestamp(mtime_ns / 1e9).isoformat(timespec='seconds')
+            entrada = (registro, numero, caminho, pdf if os.path.exists(pdf) else None, None, criado_em)
+            resultados.append((caminho, mtime_ns, tamanho, entrada, None))
+        except Exception as e:
+            resultados.append((caminho, mtime_ns, tamanho, None, str(e) or type(e).__name__))
+    return resultados
+
+
+def indexar(pasta, banco, workers=1, chunk=64, caminho_mapa=None, padrao=PADRAO_ARQUIVOS, forcar=False):
+    """Indexa os arquivos novos/alterados da pasta. Retorna (indexados, falhas, inalterados).
+
+    Com forcar=True relê todos os arquivos, mesmo os que não mudaram.
+    """
+    conhecidos = {} if forcar else banco.arquivos_indexados()
+    tarefas, inalterados = [], 0
+    for caminho, mtime_ns, tamanho in listar_arquivos(pasta, padrao):
+        if conhecidos.get(caminho) == (mtime_ns, tamanho):
+            inalterados += 1
+        else:
+            tarefas.append((caminho, mtime_ns, tamanho))
+    blocos = [tarefas[i:i + chunk] for i in range(0, len(tarefas), max(1, chunk))]
+    logger.info("Indexação: %d arquivo(s) novo(s)/alterado(s), %d inalterado(s), %d worker(s).",
+                len(tarefas), inalterados, workers)
+
+    contagem = {'indexados': 0, 'falhas': 0}
+
+    def gravar(resultados):
+        banco.indexar_arquivos(resultados)
+        for caminho, _, _, entrada, erro in resultados:
+            if entrada is None:
+                contagem['falhas'] += 1
+                logger.warning("Não indexado: %s (%s)", caminho, erro)
+            else:
+                contagem['indexados'] += 1
+        logger.info("Progresso: %d/%d", contagem['indexados'] + contagem['falhas'], len(tarefas))
+
+    if workers <= 1:
+        for bloco in blocos:
+            gravar(_extrair_bloco(bloco, caminho_mapa))
+    elif blocos:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(_extrair_bloco, bloco, caminho_mapa) for bloco in blocos]
+            for futuro in as_completed(futuros):
+                gravar(futuro.result())
+    return contagem['indexados'], contagem['falhas'], inalterados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexa orçamentos .xlsx já gerados no banco local.")
+    parser.add_argument('pasta', help="Pasta (percorrida recursivamente) com os orçamentos")
+    parser.add_argument('--banco', default=ARQUIVO_PADRAO, help="Arquivo SQLite dos orçamentos")
+    parser.add_argument('--mapa', default=None, help="<modelo>.mapa.json do modelo de origem (padrão: mapa padrão)")
+    parser.add_argument('--padrao', default=PADRAO_ARQUIVOS, help="Padrão dos nomes de arquivo")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processos de leitura (1 = sem paralelismo; padrão: nº de núcleos)")
+    parser.add_argument('--chunk', type=int, default=64, help="Arquivos por tarefa enviada a cada worker")
+    parser.add_argument('--forcar', action='store_true', help="Relê também os arquivos que não mudaram")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    indexados, falhas, inalterados = indexar(args.pasta, BancoOrcamentos(args.banco), args.workers, args.chunk,
+                                             os.path.abspath(args.mapa) if args.mapa else None,
+                                             args.padrao, args.forcar)
+    duracao = time.perf_counter() - inicio
+    taxa = indexados / duracao if duracao > 0 else 0.0
+    logger.info("Indexação concluída: %d indexado(s), %d falha(s), %d inalterado(s) em %.2fs (%.1f arquivos/s).",
+                indexados, falhas, inalterados, duracao, taxa)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Leitura rápida (em streaming) dos valores do modelo, sem abrir o workbook no openpyxl.
+
+Para preencher a interface bastam ~150 células das primeiras 39 linhas. A planilha
+ativa é lida direto do ZIP com iterparse, linha a linha, e a leitura para logo depois
+da última linha pedida: estilos, tema, outras planilhas e o resto da planilha nem são
+abertos. Das shared strings só se lê até o maior índice usado.
+
+Valores como o openpyxl devolve sem data_only: texto, int/float, bool e fórmulas como
+'=...'. Toda célula com <f> sai como fórmula, inclusive as que seguem uma fórmula
+compartilhada (<f t="shared" si="0"/>, sem texto): recebem a fórmula do mestre deslocada,
+nunca o valor em cache. Datas saem como número serial (as células mapeadas são texto).
+"""
+import zipfile
+from xml.etree import ElementTree
+
+from escritor_xml import NS_MAIN, coluna_para_indice, localizar_planilha_ativa, traduzir_formula
+
+_ROW = f'{{{NS_MAIN}}}row'
+_C = f'{{{NS_MAIN}}}c'
+_V = f'{{{NS_MAIN}}}v'
+_F = f'{{{NS_MAIN}}}f'
+_IS = f'{{{NS_MAIN}}}is'
+_T = f'{{{NS_MAIN}}}t'
+_R = f'{{{NS_MAIN}}}r'
+_SI = f'{{{NS_MAIN}}}si'
+
+
+def _texto_rico(elemento):
+    """Texto de <si>/<is>: <t> direto ou runs <r><t> (ignora a fonética <rPh>)."""
+    partes = []
+    for filho in elemento:
+        if filho.tag == _T:
+            partes.append(filho.text or "")
+        elif filho.tag == _R:
+            t = filho.find(_T)
+            if t is not None:
+                partes.append(t.text or "")
+    return ''.join(partes)
+
+
+def _numero(texto):
+    try:
+        return int(texto)
+    except ValueError:
+        return float(texto)
+
+
+class _SharedStrings:
+    """Shared strings lidas sob demanda: avança o arquivo só até o índice pedido."""
+
+    def __init__(self, zf):
+        self._textos = []
+        self._arquivo = zf.open('xl/sharedStrings.xml') if 'xl/sharedStrings.xml' in zf.namelist() else None
+        self._eventos = ElementTree.iterparse(self._arquivo) if self._arquivo else None
+
+    def __getitem__(self, indice):
+        while len(self._textos) <= indice and self._eventos is not None:
+            try:
+                _, elem = next(self._eventos)
+            except StopIteration:
+                self._eventos = None
+                break
+            if elem.tag == _SI:
+                self._textos.append(_texto_rico(elem))
+                elem.clear()
+        return self._textos[indice] if indice < len(self._textos) else None
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+
+def _formula(elemento, compartilhadas, linha, coluna):
+    """'=...' de um <f>; quem segue uma fórmula compartilhada recebe a do mestre deslocada."""
+    texto = elemento.text
+    if elemento.get('t') == 'shared':
+        si = elemento.get('si')
+        if texto:
+            compartilhadas[si] = (texto, linha, coluna)
+        elif si in compartilhadas:
+            mestre, linha_mestre, coluna_mestre = compartilhadas[si]
+            texto = traduzir_formula(mestre, linha - linha_mestre, coluna - coluna_mestre)
+    return '=' + (texto or '')
+
+
+def _valor(celula, strings, compartilhadas, linha, coluna):
+    tipo = celula.get('t', 'n')
+    formula = celula.find(_F)
+    if formula is not None:
+        return _formula(formula, compartilhadas, linha, coluna)
+    if tipo == 'inlineStr':
+        texto = celula.find(_IS)
+        return _texto_rico(texto) if texto is not None else None
+    v = celula.find(_V)
+    if v is None or v.text is None:
+        return None
+    if tipo == 's':
+        return strings[int(v.text)]
+    if tipo == 'b':
+        return v.text == '1'
+    if tipo == 'n':
+        return _numero(v.text)
+    return v.text  # 'str', 'e', 'd'
+
+
+def iterar_linhas(caminho_modelo, ate_linha=None):
+    """Gera (nº da linha, {coluna 1-based: valor}) da planilha ativa, em ordem.
+
+    Com ate_linha, para de ler o arquivo assim que passa dessa linha. Linhas sem
+    nenhuma célula não são geradas.
+    """
+    with zipfile.ZipFile(caminho_modelo) as zf:
+        planilha = localizar_planilha_ativa(zf)
+        strings = _SharedStrings(zf)
+        compartilhadas = {}  # si → (fórmula do mestre, linha, coluna)
+        try:
+            with zf.open(planilha) as arquivo:
+                numero = 0
+                for _, elem in ElementTree.iterparse(arquivo):
+                    if elem.tag != _ROW:
+                        continue
+                    r = elem.get('r')
+                    numero = int(r) if r else numero + 1
+                    if ate_linha is not None and numero > ate_linha:
+                        break
+                    celulas = {}
+                    coluna = 0
+                    for cel in elem.iter(_C):
+                        ref = cel.get('r')
+                        coluna = coluna_para_indice(ref.rstrip('0123456789')) if ref else coluna + 1
+                        valor = _valor(cel, strings, compartilhadas, numero, coluna)
+                        if valor is not None:
+                            celulas[coluna] = valor
+                    elem.clear()
+                    if celulas:
+                        yield numero, celulas
+        finally:
+            strings.fechar()
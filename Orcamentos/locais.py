@@ -0,0 +1,21 @@
+"""Onde ficam os arquivos de dados do programa (bancos SQLite de orçamentos e catálogo).
+
+Ao lado do programa, e não na pasta de onde ele foi chamado: a pasta do executável
+(PyInstaller) ou a destes módulos. ORCAMENTO_DADOS escolhe outra pasta.
+"""
+import os
+import sys
+
+
+def pasta_dados():
+    pasta = os.environ.get('ORCAMENTO_DADOS')
+    if pasta:
+        return os.path.abspath(pasta)
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def caminho_dados(nome):
+    """Caminho de um arquivo de dados (ex.: 'orcamentos.db') na pasta de dados."""
+    return os.path.join(pasta_dados(), nome)
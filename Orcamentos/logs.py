@@ -0,0 +1,180 @@
+"""Log do projeto: níveis, formatação preguiçosa e escrita fora da thread que gera.
+
+Os módulos pegam um logger com obter_logger('motor') e chamam com argumentos no
+estilo %: logger.info("Cópia salva: %s", nome). A mensagem só é montada se o nível
+estiver ativo. O registro vai para uma fila (QueueHandler) e uma thread própria
+(QueueListener) formata e escreve, então quem gera não espera o terminal/arquivo.
+
+Configuração por variáveis de ambiente (ou configurar(...)):
+  ORCAMENTO_LOG_NIVEL    TRACE, DEBUG, INFO (padrão), WARNING ou ERROR
+  ORCAMENTO_LOG_JSON     1 = uma linha JSON por evento (para o coletor de logs)
+  ORCAMENTO_LOG_ARQUIVO  grava no arquivo em vez do terminal (escrita em blocos)
+
+TRACE é o rastreamento por célula; fica desligado por padrão. Em laços, proteja com
+'if logger.isEnabledFor(TRACE):' para não custar nada quando desligado.
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+RAIZ = 'orcamento'
+# Com saída em arquivo, acumula até N eventos antes de escrever (erros saem na hora)
+CAPACIDADE_BUFFER = 256
+
+_lock = threading.Lock()
+_listener = None
+_pid = None
+
+
+class FormatadorTexto(logging.Formatter):
+    """'[HH:MM:SS] mensagem' (nível indicado só fora do INFO)."""
+
+    def format(self, registro):
+        hora = datetime.datetime.fromtimestamp(registro.created).strftime("%H:%M:%S")
+        mensagem = registro.getMessage()
+        if registro.levelno != logging.INFO:
+            mensagem = f"{registro.levelname}: {mensagem}"
+        if registro.exc_text:
+            mensagem = f"{mensagem}\n{registro.exc_text}"
+        return f"[{hora}] {mensagem}"
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por evento; campos extras via extra={'campos': {...}}."""
+
+    def format(self, registro):
+        dados = {
+            'ts': datetime.datetime.fromtimestamp(registro.created).isoformat(timespec='milliseconds'),
+            'nivel': registro.levelname,
+            'logger': registro.name,
+            'msg': registro.getMessage(),
+            'pid': registro.process,
+            'thread': registro.threadName,
+        }
+        campos = getattr(registro, 'campos', None)
+        if isinstance(campos, dict):
+            dados.update(campos)
+        if registro.exc_text:
+            dados['exc'] = registro.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _HandlerFila(logging.handlers.QueueHandler):
+    """QueueHandler que preserva args/exc_text para o formatador da thread de escrita."""
+
+    def prepare(self, registro):
+        if registro.exc_info and not registro.exc_text:
+            registro.exc_text = logging.Formatter().formatException(registro.exc_info)
+        registro.msg = registro.getMessage()
+        registro.args = None
+        registro.exc_info = None
+        return registro
+
+
+def _nivel(valor):
+    if isinstance(valor, int):
+        return valor
+    nome = str(valor).strip().upper()
+    nivel = logging.getLevelName(nome)
+    if not isinstance(nivel, int):
+        raise ValueError(f"Nível de log inválido: {valor}")
+    return nivel
+
+
+def configurar(nivel=None, json_saida=None, arquivo=None):
+    """(Re)configura o log do projeto. Sem argumentos, usa as variáveis de ambiente."""
+    global _listener, _pid
+    with _lock:
+        if _listener is not None and _pid == os.getpid():
+            _parar(_listener)
+        if nivel is not None:
+            nivel = _nivel(nivel)
+        else:
+            try:
+                nivel = _nivel(os.environ.get('ORCAMENTO_LOG_NIVEL', 'INFO'))
+            except ValueError:
+                nivel = logging.INFO
+        if json_saida is None:
+            json_saida = os.environ.get('ORCAMENTO_LOG_JSON', '').strip().lower() in ('1', 'true', 'sim')
+        arquivo = arquivo or os.environ.get('ORCAMENTO_LOG_ARQUIVO') or None
+
+        if arquivo:
+            saida = logging.handlers.MemoryHandler(CAPACIDADE_BUFFER, flushLevel=logging.ERROR,
+                                                   target=logging.FileHandler(arquivo, encoding='utf-8'))
+            saida.target.setFormatter(FormatadorJSON() if json_saida else FormatadorTexto())
+        else:
+            saida = logging.StreamHandler(sys.stdout)
+            saida.setFormatter(FormatadorJSON() if json_saida else FormatadorTexto())
+
+        fila = queue.SimpleQueue()
+        raiz = logging.getLogger(RAIZ)
+        for handler in list(raiz.handlers):
+            raiz.removeHandler(handler)
+        raiz.addHandler(_HandlerFila(fila))
+        raiz.setLevel(nivel)
+        raiz.propagate = False
+        _listener = logging.handlers.QueueListener(fila, saida)
+        _listener.start()
+        _pid = os.getpid()
+
+
+def _parar(listener):
+    listener.stop()
+    for handler in listener.handlers:
+        alvo = getattr(handler, 'target', None)
+        handler.flush()
+        handler.close()
+        if alvo is not None:
+            alvo.close()
+
+
+def encerrar():
+    """Escreve o que estiver na fila/buffer e para a thread de escrita."""
+    global _listener
+    with _lock:
+        if _listener is None or _pid != os.getpid():
+            return
+        _parar(_listener)
+        _listener = None
+
+
+def _apos_fork():
+    # O processo filho (fork) herda a fila, mas não a thread de escrita: cria outra
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        configurar()
+
+
+def obter_logger(nome):
+    """Logger 'orcamento.<nome>' (configura o log na primeira chamada do processo)."""
+    if _listener is None or _pid != os.getpid():
+        configurar()
+    return logging.getLogger(f"{RAIZ}.{nome}")
+
+
+class _GanchoProcesso:
+    """Referência para o multiprocessing chamar _ao_iniciar_processo em cada worker."""
+
+
+def _ao_iniciar_processo(_gancho):
+    # Workers do multiprocessing saem com os._exit (sem atexit): esvazia o buffer antes
+    multiprocessing.util.Finalize(None, encerrar, exitpriority=10)
+
+
+_gancho_processo = _GanchoProcesso()
+multiprocessing.util.register_after_fork(_gancho_processo, _ao_iniciar_processo)
+atexit.register(encerrar)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
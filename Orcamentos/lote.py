@@ -0,0 +1,269 @@
+"""Geração em lote (sem interface): modelo .xlsx + registros CSV/JSON/JSONL → um .xlsx por registro.
+
+Uso:
+    python lote.py modelo.xlsx registros.csv --saida pasta_saida
+
+Formato dos registros (chaves): numero (opcional), cliente, endereco, cnpj, telefone,
+prazo, pagamento, condicoes e itens (lista de dicts item/desc/quant/und/vlr_uni/total).
+No CSV os itens vêm em colunas numeradas (item_1, desc_1, quant_1, ..., total_22)
+ou numa coluna 'itens' com a lista em JSON.
+
+Um número (explícito ou do contador) que já tem orçamento emitido, com o .xlsx na pasta
+de saída ou registrado no banco, não é gerado de novo: o registro falha sem sobrescrever
+nada. Os números são reservados antes da geração, então registros que falham deixam o
+seu número sem orçamento (lacuna na numeração); o resumo final lista esses números.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import logs
+import motor
+import pdf
+from banco import ARQUIVO_PADRAO, BancoOrcamentos
+from numeracao import AlocadorNumeros
+
+logger = logs.obter_logger('lote')
+
+
+def _itens_csv(linha):
+    """Extrai itens de uma linha CSV (coluna 'itens' em JSON ou colunas numeradas)."""
+    if linha.get('itens'):
+        return json.loads(linha['itens'])
+    itens = []
+    n = 1
+    while any(f"{chave}_{n}" in linha for chave, _ in motor.COLUNAS_ITENS):
+        item = {chave: linha.get(f"{chave}_{n}", "") for chave, _ in motor.COLUNAS_ITENS}
+        itens.append(item)
+        n += 1
+    # Remove linhas vazias do final
+    while itens and not any(itens[-1].values()):
+        itens.pop()
+    return itens
+
+
+def ler_registros(caminho):
+    """Lê registros de .csv, .json (lista ou {'orcamentos': [...]}) ou .jsonl."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        if extensao == '.csv':
+            registros = []
+            for linha in csv.DictReader(f):
+                registro = {k: v for k, v in linha.items() if k}
+                registro['itens'] = _itens_csv(registro)
+                registros.append(registro)
+            return registros
+        if extensao == '.jsonl':
+            return [json.loads(l) for l in f if l.strip()]
+        if extensao == '.json':
+            dados = json.load(f)
+            return dados.get('orcamentos', []) if isinstance(dados, dict) else dados
+    raise ValueError(f"Formato de registros não suportado: {extensao} (use .csv, .json ou .jsonl)")
+
+
+def numeros_explicitos(registros):
+    """Números informados nos registros ('numero'); ValueError se algum se repetir."""
+    explicitos = {}
+    for idx, registro in enumerate(registros, start=1):
+        if registro.get('numero'):
+            numero = int(registro['numero'])
+            if numero in explicitos:
+                raise ValueError(f"Número {numero} repetido nos registros {explicitos[numero]} e {idx}.")
+            explicitos[numero] = idx
+    return set(explicitos)
+
+
+def atribuir_numeros(registros, numero_inicial):
+    """Distribui os números antes da geração (sequenciais a partir do contador).
+
+    Registros com 'numero' explícito mantêm o seu, e os sequenciais pulam esses números:
+    dois registros nunca gravam o mesmo arquivo. ValueError se um número explícito se
+    repetir. Retorna (números, próximo número livre).
+    """
+    explicitos = numeros_explicitos(registros)
+    numeros = []
+    numero = numero_inicial
+    for registro in registros:
+        if registro.get('numero'):
+            numeros.append(int(registro['numero']))
+            continue
+        while numero in explicitos:
+            numero += 1
+        numeros.append(numero)
+        numero += 1
+    proximo = max([numero] + [n + 1 for n in numeros])
+    return numeros, proximo
+
+
+def numeros_emitidos(caminho_modelo, pasta_saida, numeros, banco=None):
+    """Números que já têm orçamento: .xlsx na pasta de saída ou registro no banco."""
+    nome_base = os.path.splitext(os.path.basename(caminho_modelo))[0]
+    emitidos = {numero for numero in numeros
+                if os.path.exists(os.path.join(pasta_saida, motor.nome_copia(nome_base, numero)))}
+    if banco is not None:
+        emitidos |= banco.numeros_emitidos(numeros)
+    return emitidos
+
+
+def _iniciar_worker(caminho_modelo, modo, pdf_nativo=False):
+    """Inicializador do processo: deixa o modelo (e o layout do PDF) carregado no cache do worker."""
+    motor.obter_modelo(caminho_modelo, modo)
+    if pdf_nativo:
+        motor.obter_pdf_nativo(caminho_modelo)
+
+
+def _renderizar_bloco(caminho_modelo, pasta_saida, modo, tarefas, pdf_nativo=False):
+    """Renderiza um bloco de (índice, registro, número). Falhas não interrompem o bloco."""
+    resultados = []
+    for idx, registro, numero in tarefas:
+        try:
+            caminho = motor.gerar_orcamento(caminho_modelo, registro, numero, pasta_saida, modo, pdf_nativo)
+            resultados.append((idx, caminho, None))
+        except Exception as e:
+            resultados.append((idx, None, str(e)))
+    return resultados
+
+
+def gerar_lote(caminho_modelo, registros, pasta_saida, numero_inicial, modo='xml', workers=1, chunk=16,
+               ao_gerar=None, pdf_nativo=False, banco=None, com_pdf=None):
+    """Gera um orçamento por registro. Retorna (gerados, falhas, próximo número livre).
+
+    falhas: [(índice do registro, número, erro)].
+
+    Com workers > 1 a renderização é distribuída num ProcessPoolExecutor em blocos de
+    'chunk' registros; os números são atribuídos antes, então os nomes não colidem.
+    ao_gerar(caminho) é chamado assim que cada .xlsx fica pronto (ex: enfileirar o PDF).
+    Com pdf_nativo=True cada worker desenha também o PDF (renderizador nativo).
+    Com banco (BancoOrcamentos), os gerados são gravados no fim, numa única transação;
+    com_pdf (padrão: pdf_nativo) diz se o caminho do PDF vai junto. Registros cujo
+    número já foi emitido (ver numeros_emitidos) falham sem ser renderizados.
+    """
+    numeros, proximo = atribuir_numeros(registros, numero_inicial)
+    emitidos = numeros_emitidos(caminho_modelo, pasta_saida, numeros, banco)
+    total = len(registros)
+    resultados = [(idx, None, f"Orçamento {numero} já foi emitido (arquivo na saída ou no banco)")
+                  for idx, numero in enumerate(numeros, start=1) if numero in emitidos]
+    tarefas = [(idx, registro, numero) for idx, (registro, numero) in enumerate(zip(registros, numeros), start=1)
+               if numero not in emitidos]
+    blocos = [tarefas[i:i + chunk] for i in range(0, len(tarefas), max(1, chunk))]
+
+    def receber(bloco_resultados):
+        resultados.extend(bloco_resultados)
+        if ao_gerar:
+            for _, caminho, erro in bloco_resultados:
+                if erro is None:
+                    ao_gerar(caminho)
+
+    if workers <= 1:
+        for bloco in blocos:
+            receber(_renderizar_bloco(caminho_modelo, pasta_saida, modo, bloco, pdf_nativo))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                                 initargs=(caminho_modelo, modo, pdf_nativo)) as executor:
+            futuros = {executor.submit(_renderizar_bloco, caminho_modelo, pasta_saida, modo, bloco, pdf_nativo): bloco
+                       for bloco in blocos}
+            for futuro in as_completed(futuros):
+                try:
+                    receber(futuro.result())
+                except Exception as e:  # worker morreu: o bloco inteiro falha, o resto segue
+                    receber([(idx, None, f"Falha no worker: {e}") for idx, _, _ in futuros[futuro]])
+                logger.info("Progresso: %d/%d", len(resultados), total)
+
+    gerados, falhas, entradas_banco = [], [], []
+    com_pdf = pdf_nativo if com_pdf is None else com_pdf
+    for idx, caminho, erro in sorted(resultados):
+        if erro is None:
+            gerados.append(caminho)
+            caminho_pdf = os.path.splitext(caminho)[0] + ".pdf" if com_pdf else None
+            entradas_banco.append((registros[idx - 1], numeros[idx - 1], caminho, caminho_pdf, caminho_modelo, None))
+        else:
+            falhas.append((idx, numeros[idx - 1], erro))
+            logger.error("[%d/%d] Erro no registro (número %d): %s", idx, total, numeros[idx - 1], erro)
+    if banco is not None and entradas_banco:
+        banco.registrar_varios(entradas_banco)
+        logger.info("%d orçamento(s) gravado(s) em %s.", len(entradas_banco), banco.caminho)
+    return gerados, falhas, proximo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera orçamentos .xlsx em lote a partir de um modelo.")
+    parser.add_argument('modelo', help="Arquivo modelo .xlsx")
+    parser.add_argument('registros', help="Registros (.csv, .json ou .jsonl)")
+    parser.add_argument('--saida', default=None, help="Pasta de saída (padrão: pasta do modelo)")
+    parser.add_argument('--config', default='config.json', help="config.json com proximo_numero")
+    parser.add_argument('--numero-inicial', type=int, default=None,
+                        help="Número inicial mínimo (padrão: próximo livre em config.json)")
+    parser.add_argument('--modo', choices=motor.MODOS, default='xml',
+                        help="xml: edita o XML direto (rápido, preserva imagens); openpyxl: caminho completo")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processos de renderização (1 = sem paralelismo; padrão: nº de núcleos)")
+    parser.add_argument('--chunk', type=int, default=16, help="Registros por tarefa enviada a cada worker")
+    parser.add_argument('--banco', default=ARQUIVO_PADRAO,
+                        help="Banco SQLite onde os orçamentos gerados são registrados (vazio = não registra)")
+    parser.add_argument('--pdf', nargs='?', const='nativo', choices=('nativo', 'conversor'), default=None,
+                        help="Gera também o PDF de cada orçamento: nativo (padrão, desenhado direto nos workers) "
+                             "ou conversor (Excel persistente, em segundo plano; o LibreOffice só fica aberto "
+                             "entre conversões com o módulo uno, senão abre um soffice por grupo de arquivos)")
+    args = parser.parse_args(argv)
+
+    pasta_saida = args.saida or os.path.dirname(os.path.abspath(args.modelo))
+    os.makedirs(pasta_saida, exist_ok=True)
+    registros = ler_registros(args.registros)
+    try:
+        explicitos = numeros_explicitos(registros)
+    except ValueError as e:
+        logger.error("Registros inválidos: %s", e)
+        return 1
+    # Reserva de uma vez os números dos registros sem 'numero' (trava + escrita atômica),
+    # pulando os explícitos que caírem no bloco
+    alocador = AlocadorNumeros(args.config)
+    sem_numero = sum(1 for registro in registros if not registro.get('numero'))
+    try:
+        numero_inicial = alocador.reservar(sem_numero, minimo=args.numero_inicial, pular=explicitos).start
+    except ValueError as e:
+        logger.error("Numeração indisponível: %s", e)
+        return 1
+
+    logger.info("Lote: %d registro(s), modelo %s, início em %d, %d worker(s).",
+                len(registros), args.modelo, numero_inicial, args.workers)
+    fila_pdf, futuros_pdf = None, []
+    if args.pdf == 'conversor':
+        fila_pdf = pdf.FilaPDF(log=logger.error)
+        logger.info("PDF em segundo plano via %s.", fila_pdf.conversor.nome)
+        if not getattr(fila_pdf.conversor, 'persistente', True):
+            logger.warning("Módulo uno indisponível: sem LibreOffice persistente, cada grupo de PDFs abre um "
+                           "soffice novo (instale python3-uno ou use --pdf nativo).")
+
+    inicio = time.perf_counter()
+    gerados, falhas, proximo = gerar_lote(args.modelo, registros, pasta_saida, numero_inicial,
+                                        args.modo, args.workers, args.chunk,
+                                        ao_gerar=(lambda caminho: futuros_pdf.append(fila_pdf.submeter(caminho))) if fila_pdf else None,
+                                        pdf_nativo=args.pdf == 'nativo',
+                                        banco=BancoOrcamentos(args.banco) if args.banco else None,
+                                        com_pdf=args.pdf is not None)
+    duracao = time.perf_counter() - inicio
+    proximo = alocador.garantir_minimo(proximo)
+
+    taxa = len(gerados) / duracao if duracao > 0 else 0.0
+    logger.info("Lote concluído: %d gerado(s), %d falha(s) em %.2fs (%.1f orçamentos/s). Próximo: %d",
+                len(gerados), len(falhas), duracao, taxa, proximo)
+    if falhas:
+        logger.warning("Números reservados sem orçamento (registros que falharam): %s",
+                       ", ".join(str(numero) for _, numero, _ in falhas))
+
+    falhas_pdf = 0
+    if fila_pdf:
+        fila_pdf.fechar(esperar=True)
+        falhas_pdf = sum(1 for futuro in futuros_pdf if futuro.exception())
+        duracao_total = time.perf_counter() - inicio
+        logger.info("PDFs: %d gerado(s), %d falha(s); total com PDF %.2fs.",
+                    len(futuros_pdf) - falhas_pdf, falhas_pdf, duracao_total)
+    return 1 if falhas or falhas_pdf else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
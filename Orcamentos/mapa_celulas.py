@@ -0,0 +1,178 @@
+"""Mapa declarativo das células do modelo, compilado uma vez em tabelas (linha, coluna).
+
+Cada modelo pode ter ao lado um '<modelo>.mapa.json' dizendo onde fica cada campo.
+Chaves ausentes usam o mapa padrão (A5, B6-B9, itens A-F nas linhas 13-34, total F35,
+B36/B37/B39):
+
+    {
+      "numero": "A5",
+      "cliente": {"cliente": "B6", "endereco": "B7", "cnpj": "B8", "telefone": "B9"},
+      "adicionais": {"prazo": "B36", "pagamento": "B37", "condicoes": "B39"},
+      "itens": {"linha_inicial": 13, "linha_final": 34,
+                "colunas": {"item": "A", "desc": "B", "quant": "C", "und": "D", "vlr_uni": "E", "total": "F"}},
+      "total": "F35"
+    }
+
+Na compilação saem as posições numéricas de cada célula, a tabela de endereços das
+linhas de itens e a área retangular que cobre tudo; leitura (ler) é um único iter_rows
+sobre essa área (ou, em ler_arquivo, uma leitura em streaming do .xlsx) e escrita
+(aplicar) vai direto por ws.cell(linha, coluna), sem montar nem interpretar endereços
+por célula.
+"""
+import functools
+import json
+import os
+import threading
+
+import leitor_modelo
+from escritor_xml import coluna_para_indice, separar_celula
+
+EXTENSAO = '.mapa.json'
+# Colunas de itens gravadas com formato de moeda (além da célula do total)
+CHAVES_MOEDA = ('vlr_uni', 'total')
+
+
+@functools.lru_cache(maxsize=65536)
+def posicao(celula):
+    """'B36' → (36, 2), com cache (endereços se repetem em todas as cópias)."""
+    col, linha = separar_celula(celula)
+    return linha, coluna_para_indice(col)
+
+
+class MapaCelulas:
+    """Mapa compilado: campos, colunas dos itens, bloco de itens e total.
+
+    Com mais itens que o bloco comporta, as linhas extras entram logo após o bloco e
+    as células abaixo dele (total, adicionais) descem junto; ver insercao/deslocar.
+    """
+
+    def __init__(self, numero, cliente, adicionais, colunas_itens, linha_inicial, linha_final, total, origem=None):
+        self.numero = numero
+        self.cliente = tuple(cliente)            # ((chave, célula), ...)
+        self.adicionais = tuple(adicionais)
+        self.colunas_itens = tuple(colunas_itens)  # ((chave, letra), ...)
+        self.linha_inicial = linha_inicial
+        self.linha_final = linha_final
+        self.celula_total = total
+        self.origem = origem                     # arquivo .mapa.json (None = padrão/detectado)
+        if linha_final < linha_inicial:
+            raise ValueError(f"Bloco de itens inválido: {linha_inicial}-{linha_final}")
+
+        self._campos = {chave: celula for chave, celula in self.cliente + self.adicionais}
+        self._tabela_itens = []
+        self._lock = threading.Lock()
+        self.linhas_itens(self.capacidade)
+        self.celulas_mapeadas = tuple([numero] + list(self._campos.values())
+                                      + [ref for refs in self._tabela_itens for ref in refs] + [total])
+        moeda = [i for i, (chave, _) in enumerate(self.colunas_itens) if chave in CHAVES_MOEDA]
+        self.celulas_moeda = frozenset([refs[i] for refs in self._tabela_itens for i in moeda] + [total])
+        self.posicoes = {ref: posicao(ref) for ref in self.celulas_mapeadas}
+        linhas = [lin for lin, _ in self.posicoes.values()]
+        colunas = [col for _, col in self.posicoes.values()]
+        self._area = (min(linhas), max(linhas), min(colunas), max(colunas))
+        self._por_linha = {}
+        for ref, (lin, col) in self.posicoes.items():
+            self._por_linha.setdefault(lin, []).append((col - self._area[2], ref))
+
+    # ---------- bloco de itens ----------
+
+    @property
+    def limites(self):
+        """(última linha, última coluna) das células mapeadas no modelo."""
+        return self._area[1], self._area[3]
+
+    @property
+    def capacidade(self):
+        return self.linha_final - self.linha_inicial + 1
+
+    def insercao(self, quantidade_itens):
+        """(linha, quantidade) de linhas a inserir para caber os itens, ou None."""
+        extras = quantidade_itens - self.capacidade
+        return (self.linha_final + 1, extras) if extras > 0 else None
+
+    def deslocar(self, celula, extras):
+        """Posição final de uma célula do modelo quando 'extras' linhas são inseridas."""
+        if not extras:
+            return celula
+        col, linha = separar_celula(celula)
+        return f"{col}{linha + extras}" if linha > self.linha_final else celula
+
+    def linhas_itens(self, quantidade):
+        """Tabela [(endereço por coluna)] das linhas de itens; cresce sob demanda e fica em cache."""
+        tabela = self._tabela_itens
+        if len(tabela) < quantidade:
+            with self._lock:
+                for i in range(len(tabela), quantidade):
+                    linha = self.linha_inicial + i
+                    tabela.append(tuple(f"{letra}{linha}" for _, letra in self.colunas_itens))
+        return tabela
+
+    def celula(self, chave):
+        """Célula de um campo (cliente/adicionais) no modelo, ou None se não mapeado."""
+        return self._campos.get(chave)
+
+    def com_bloco(self, linha_inicial, linha_final, total):
+        """Cópia do mapa com outro bloco de itens/total (ex.: detectado no modelo)."""
+        return MapaCelulas(self.numero, self.cliente, self.adicionais, self.colunas_itens,
+                           linha_inicial, linha_final, total, self.origem)
+
+    # ---------- leitura/escrita em lote ----------
+
+    def ler(self, ws):
+        """{célula: valor} das células mapeadas, num único iter_rows sobre a área do mapa.
+
+        Funciona também com planilhas abertas em read_only.
+        """
+        min_linha, max_linha, min_col, max_col = self._area
+        valores = {}
+        linhas = ws.iter_rows(min_row=min_linha, max_row=max_linha, min_col=min_col, max_col=max_col,
+                              values_only=True)
+        for numero, linha in enumerate(linhas, start=min_linha):
+            for indice, ref in self._por_linha.get(numero, ()):
+                valores[ref] = linha[indice] if indice < len(linha) else None
+        return valores
+
+    def ler_arquivo(self, caminho_modelo):
+        """Como ler(), mas direto do .xlsx em streaming, parando na última linha do mapa."""
+        min_linha, max_linha, min_col, _ = self._area
+        valores = dict.fromkeys(self.posicoes)
+        for numero, celulas in leitor_modelo.iterar_linhas(caminho_modelo, max_linha):
+            for indice, ref in self._por_linha.get(numero, ()):
+                valores[ref] = celulas.get(indice + min_col)
+        return valores
+
+    def aplicar(self, ws, celulas):
+        """Grava {célula: valor} por posição numérica (pré-compilada; demais via cache)."""
+        posicoes = self.posicoes
+        for ref, valor in celulas.items():
+            linha, coluna = posicoes.get(ref) or posicao(ref)
+            ws.cell(row=linha, column=coluna).value = valor
+
+    def __repr__(self):
+        return (f"MapaCelulas(itens {self.linha_inicial}-{self.linha_final}, total={self.celula_total}, "
+                f"origem={os.path.basename(self.origem) if self.origem else 'padrão'})")
+
+
+def caminho_mapa(caminho_modelo):
+    """'orcamento.xlsx' → 'orcamento.mapa.json' (na mesma pasta)."""
+    return os.path.splitext(caminho_modelo)[0] + EXTENSAO
+
+
+def carregar_mapa(caminho, padrao):
+    """Lê e compila um .mapa.json; chaves ausentes vêm do mapa 'padrao'."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    if not isinstance(dados, dict):
+        raise ValueError(f"Mapa inválido (esperado objeto JSON): {caminho}")
+    itens = dados.get('itens') or {}
+    colunas = itens.get('colunas')
+    return MapaCelulas(
+        numero=dados.get('numero', padrao.numero),
+        cliente=list(dados['cliente'].items()) if 'cliente' in dados else padrao.cliente,
+        adicionais=list(dados['adicionais'].items()) if 'adicionais' in dados else padrao.adicionais,
+        colunas_itens=list(colunas.items()) if colunas else padrao.colunas_itens,
+        linha_inicial=int(itens.get('linha_inicial', padrao.linha_inicial)),
+        linha_final=int(itens.get('linha_final', padrao.linha_final)),
+        total=dados.get('total', padrao.celula_total),
+        origem=os.path.abspath(caminho),
+    )
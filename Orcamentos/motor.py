@@ -0,0 +1,471 @@
+"""Motor headless de orçamentos: aplica registros no modelo .xlsx sem depender do Tkinter."""
+import os
+import io
+import copy
+import re
+import threading
+import unicodedata
+from types import MappingProxyType
+
+import leitor_modelo
+import logs
+import mapa_celulas
+import numeros
+from escritor_xml import (ModeloXML, deslocar_referencias, indice_para_coluna, midia_do_modelo,
+                          reempacotar_com_midia, separar_celula)
+from mapa_celulas import MapaCelulas
+from pdf_nativo import obter_modelo_pdf
+
+logger = logs.obter_logger('motor')
+
+# Mapa padrão do modelo; um '<modelo>.mapa.json' ao lado do .xlsx substitui (ver mapa_celulas)
+CELULA_NUMERO = 'A5'
+CAMPOS_CLIENTE = [('cliente', 'B6'), ('endereco', 'B7'), ('cnpj', 'B8'), ('telefone', 'B9')]
+CAMPOS_ADICIONAIS = [('prazo', 'B36'), ('pagamento', 'B37'), ('condicoes', 'B39')]
+COLUNAS_ITENS = [('item', 'A'), ('desc', 'B'), ('quant', 'C'), ('und', 'D'), ('vlr_uni', 'E'), ('total', 'F')]
+LINHA_INICIAL_ITENS = 13
+LINHA_FINAL_ITENS = 34
+CELULA_TOTAL = 'F35'
+# Quantas linhas do modelo são varridas procurando o cabeçalho dos itens e o rodapé
+LIMITE_DETECCAO = 200
+
+
+def log(mensagem, *args):
+    """Atalho para logger.info (formatação só se o nível estiver ativo)."""
+    logger.info(mensagem, *args)
+
+
+def texto_numero(numero):
+    """Texto gravado em A5 (ex: 'N° do Orçamento 5')."""
+    return f"N° do Orçamento {numero}"
+
+
+def nome_copia(nome_base, numero):
+    """Nome do arquivo gerado para o número informado."""
+    return f"{nome_base}_copia_{numero}.xlsx"
+
+
+def valor_texto(valor):
+    """Texto de um valor lido da planilha ('' para célula vazia)."""
+    if valor is None:
+        return ""
+    return str(valor).strip()
+
+
+def extrair_numero(texto):
+    """Primeiro número de um texto ('N° do Orçamento 5' → 5, 'N° 10' → 10), ou None."""
+    encontrado = re.search(r'\d+', texto or "")
+    return int(encontrado.group()) if encontrado else None
+
+
+def converter_numero_br(texto):
+    """Converte texto BR ('1.234,56') em float. Retorna None se inválido (ver numeros.converter_br)."""
+    if not texto or texto == "0,00":
+        return None
+    valor = numeros.converter_br(texto)
+    return float(valor) if valor is not None else None
+
+
+def formatar_numero_br(valor):
+    """Formata número no padrão BR (pontos milhar, vírgula decimal)."""
+    return numeros.formatar_br(valor)
+
+
+def normalizar_item(item):
+    """Aceita item como dict (chaves de COLUNAS_ITENS) ou lista na ordem A-F."""
+    if isinstance(item, dict):
+        return {chave: str(item.get(chave) or "").strip() for chave, _ in COLUNAS_ITENS}
+    valores = list(item or [])
+    return {chave: str(valores[idx] if idx < len(valores) and valores[idx] is not None else "").strip()
+            for idx, (chave, _) in enumerate(COLUNAS_ITENS)}
+
+
+def colunas_numericas(itens):
+    """ColunasItens dos itens (já normalizados), avisando textos que não são número."""
+    colunas = numeros.ColunasItens(itens)
+    for linha, chave, texto in colunas.invalidos:
+        logger.warning("Valor inválido item %d (%s): %s.", linha + 1, chave, texto)
+    return colunas
+
+
+def calcular_total(itens):
+    """Soma de F (C × E quando ambos são números; senão o total digitado), formato BR."""
+    return numeros.formatar_br(colunas_numericas([normalizar_item(item) for item in itens]).soma())
+
+
+MAPA_PADRAO = MapaCelulas(CELULA_NUMERO, CAMPOS_CLIENTE, CAMPOS_ADICIONAIS, COLUNAS_ITENS,
+                          LINHA_INICIAL_ITENS, LINHA_FINAL_ITENS, CELULA_TOTAL)
+
+
+def _texto_normalizado(valor):
+    texto = unicodedata.normalize('NFD', str(valor or "")).encode('ascii', 'ignore').decode('ascii')
+    return texto.strip().upper()
+
+
+def detectar_bloco_itens(caminho_modelo):
+    """Acha o bloco de itens pelo cabeçalho ('DESCRIÇÃO') e o rodapé pelo rótulo 'TOTAL'.
+
+    Retorna (linha_inicial, linha_final, célula_total) ou None: os itens vão da linha
+    seguinte ao cabeçalho até a anterior ao rodapé; o total fica à direita do rótulo.
+    """
+    linhas = leitor_modelo.iterar_linhas(caminho_modelo, LIMITE_DETECCAO)
+    try:
+        return bloco_nas_linhas(linhas)
+    finally:
+        linhas.close()
+
+
+def bloco_nas_linhas(linhas):
+    """detectar_bloco_itens sobre linhas já lidas: (nº, {coluna: valor}) em ordem."""
+    cabecalho = None
+    for numero, celulas in linhas:
+        textos = {_texto_normalizado(valor): coluna for coluna, valor in sorted(celulas.items(), reverse=True)}
+        if cabecalho is None:
+            if 'DESCRICAO' in textos:
+                cabecalho = numero
+        elif 'TOTAL' in textos and numero > cabecalho + 1:
+            coluna = textos['TOTAL'] + 1  # célula à direita do rótulo
+            return cabecalho + 1, numero - 1, f"{indice_para_coluna(coluna)}{numero}"
+    return None
+
+
+def celulas_do_registro(registro, numero, mapa=MAPA_PADRAO):
+    """Monta {célula: valor} de um registro (A5, B6-B9, A13-F34, F35, B36/B37/B39 no mapa padrão).
+
+    Itens além da capacidade do modelo ocupam linhas novas; total e B36-B39 descem o
+    mesmo número de linhas (ver MapaCelulas.insercao).
+    """
+    itens = [normalizar_item(item) for item in registro.get('itens') or []]
+    extras = max(0, len(itens) - mapa.capacidade)
+    celulas = {mapa.numero: texto_numero(numero)}
+
+    for chave, celula in mapa.cliente + mapa.adicionais:
+        celulas[mapa.deslocar(celula, extras)] = str(registro.get(chave) or "").strip()
+
+    # C, E e F viram números (F = C × E); textos não numéricos ficam como texto
+    colunas = colunas_numericas(itens)
+    for i, (q, u, t) in enumerate(zip(colunas.quant, colunas.vlr_uni, colunas.total)):
+        item = itens[i]
+        if q is not None:
+            item['quant'] = q
+        if u is not None:
+            item['vlr_uni'] = u
+        if t is not None:
+            item['total'] = t
+
+    vazio = normalizar_item({})
+    chaves = [chave for chave, _ in mapa.colunas_itens]
+    for i, refs in enumerate(mapa.linhas_itens(mapa.capacidade + extras)[:mapa.capacidade + extras]):
+        item = itens[i] if i < len(itens) else vazio
+        celulas.update(zip(refs, map(item.__getitem__, chaves)))
+
+    celulas[mapa.deslocar(mapa.celula_total, extras)] = colunas.soma()
+    return celulas
+
+
+def aplicar_celulas(ws, celulas, mapa=MAPA_PADRAO):
+    """Grava {célula: valor} na planilha (por posição numérica, ver MapaCelulas.aplicar)."""
+    mapa.aplicar(ws, celulas)
+
+
+MODOS = ('xml', 'openpyxl')
+
+
+class ModeloCache:
+    """Modelo .xlsx parseado uma única vez e reaproveitado em todas as cópias.
+
+    Guarda os valores originais das células mapeadas (somente leitura). Cada cópia
+    grava apenas as células que diferem do modelo, salva e restaura essas células,
+    de modo que o workbook em memória volta sempre ao estado do modelo. A saída do
+    openpyxl é reempacotada em memória com a mídia original do modelo (xl/media/*)
+    antes de ir para o disco.
+    """
+
+    def __init__(self, caminho_modelo, mapa=MAPA_PADRAO):
+        self.caminho = os.path.abspath(caminho_modelo)
+        self.nome_base = os.path.splitext(os.path.basename(caminho_modelo))[0]
+        self.mapa = mapa
+        self._lock = threading.Lock()
+        from openpyxl import load_workbook  # só quando um modelo é aberto: importar o openpyxl é caro
+        self._wb = load_workbook(self.caminho)
+        self._ws = self._wb.active
+        self.valores_originais = MappingProxyType(mapa.ler(self._ws))
+        for celula in mapa.celulas_moeda:  # números gravados aparecem como 1.234,56
+            self._ws.cell(*mapa.posicoes[celula]).number_format = numeros.FORMATO_MOEDA
+        self.midia = midia_do_modelo(self.caminho)  # xl/media/* do modelo (ver escritor_xml.ler_membros)
+        self.tem_imagens = bool(self.midia) or bool(getattr(self._ws, '_images', None))
+        self.preserva_midia = True
+        # openpyxl fecha o buffer da imagem a cada save; guarda os bytes para reabrir
+        self._imagens = [(img, img._data()) for img in getattr(self._ws, '_images', [])]
+
+    def celulas_alteradas(self, celulas):
+        """Filtra {célula: valor} mantendo só o que difere do modelo."""
+        alteradas = {}
+        for celula, valor in celulas.items():
+            original = self.valores_originais.get(celula)
+            if (original if original is not None else "") != valor:
+                alteradas[celula] = valor
+        return alteradas
+
+    def _inserir_linhas(self, linha, quantidade):
+        """Insere linhas antes de 'linha' (insert_rows move as células num único passo) e
+        ajusta o que o openpyxl não ajusta. Retorna a função que desfaz a inserção."""
+        ws = self._ws
+        formulas = []
+        for cel in ws._cells.values():
+            if isinstance(cel.value, str) and cel.value.startswith('='):
+                novo = deslocar_referencias(cel.value, linha, quantidade, expandir=True)
+                if novo != cel.value:
+                    formulas.append((cel, cel.value))
+                    cel.value = novo
+        alturas = {n: dim.height for n, dim in ws.row_dimensions.items() if n >= linha - 1 and dim.height}
+        ws.insert_rows(linha, quantidade)
+
+        # Linhas novas herdam o estilo da última linha de itens
+        estilos = [(c, copy.copy(cel._style)) for (r, c), cel in ws._cells.items() if r == linha - 1 and cel.has_style]
+        for numero in range(linha, linha + quantidade):
+            for c, estilo in estilos:
+                ws.cell(row=numero, column=c)._style = copy.copy(estilo)
+        self._deslocar_alturas(alturas, linha, quantidade)
+        mescladas = [faixa for faixa in ws.merged_cells.ranges if faixa.min_row >= linha]
+        for faixa in mescladas:
+            faixa.shift(0, quantidade)
+        ancoras = [img.anchor._from for img, _ in self._imagens
+                   if hasattr(img.anchor, '_from') and img.anchor._from.row + 1 >= linha]
+        for marcador in ancoras:
+            marcador.row += quantidade
+
+        def desfazer():
+            ws.delete_rows(linha, quantidade)
+            for faixa in mescladas:
+                faixa.shift(0, -quantidade)
+            for marcador in ancoras:
+                marcador.row -= quantidade
+            for n in list(ws.row_dimensions):
+                if n >= linha:
+                    ws.row_dimensions[n].height = None
+            for n, altura in alturas.items():
+                ws.row_dimensions[n].height = altura
+            for cel, valor in formulas:
+                cel.value = valor
+        return desfazer
+
+    def _deslocar_alturas(self, alturas, linha, quantidade):
+        dims = self._ws.row_dimensions
+        for n in alturas:
+            if n >= linha:
+                dims[n].height = None
+        for n, altura in alturas.items():
+            if n >= linha:
+                dims[n + quantidade].height = altura
+        if linha - 1 in alturas:
+            for n in range(linha, linha + quantidade):
+                dims[n].height = alturas[linha - 1]
+
+    def pacote_openpyxl(self, celulas, insercao=None):
+        """Salva o workbook com as células num buffer (sem a mídia do modelo). Retorna (bytes, nº gravadas)."""
+        inseridas = {}
+        if insercao:
+            linha, quantidade = insercao
+            base = {}
+            for ref, valor in celulas.items():
+                col, numero = separar_celula(ref)
+                if numero >= linha + quantidade:
+                    base[f"{col}{numero - quantidade}"] = valor
+                elif numero >= linha:
+                    inseridas[ref] = valor
+                else:
+                    base[ref] = valor
+            celulas = base
+        alteradas = self.celulas_alteradas(celulas)
+        with self._lock:
+            desfazer = None
+            try:
+                self.mapa.aplicar(self._ws, alteradas)
+                if insercao:
+                    desfazer = self._inserir_linhas(*insercao)
+                    self.mapa.aplicar(self._ws, inseridas)
+                for img, dados in self._imagens:
+                    img.ref = io.BytesIO(dados)
+                saida = io.BytesIO()
+                self._wb.save(saida)
+            finally:
+                if desfazer is not None:
+                    desfazer()
+                for celula in alteradas:
+                    self._ws[celula] = self.valores_originais.get(celula)
+        return saida.getvalue(), len(alteradas) + len(inseridas)
+
+    def salvar_copia(self, celulas, novo_caminho, insercao=None):
+        """Salva uma cópia do modelo com as células informadas. Retorna nº de células gravadas.
+
+        insercao=(linha, quantidade): ver MapaCelulas.insercao.
+        """
+        conteudo, gravadas = self.pacote_openpyxl(celulas, insercao)
+        if self.midia:
+            reempacotar_com_midia(conteudo, self.midia, novo_caminho)
+        else:
+            with open(novo_caminho, 'wb') as f:
+                f.write(conteudo)
+        return gravadas
+
+    def fechar(self):
+        self._wb.close()
+
+
+_modelos = {}
+_mapas = {}
+_modelos_lock = threading.Lock()
+
+
+def _assinatura(caminho):
+    try:
+        stat = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def obter_mapa(caminho_modelo):
+    """MapaCelulas do modelo, compilado e em cache (refeito só se o modelo ou o .mapa.json mudarem).
+
+    Com '<modelo>.mapa.json' ao lado, usa o arquivo; sem ele, o mapa padrão com o bloco
+    de itens detectado no modelo.
+    """
+    caminho = os.path.abspath(caminho_modelo)
+    arquivo_mapa = mapa_celulas.caminho_mapa(caminho)
+    chave = (_assinatura(caminho), _assinatura(arquivo_mapa))
+    if chave[0] is None:
+        raise FileNotFoundError(caminho)
+    entrada = _mapas.get(caminho)
+    if entrada and entrada[0] == chave:
+        return entrada[1]
+    if chave[1] is not None:
+        mapa = mapa_celulas.carregar_mapa(arquivo_mapa, MAPA_PADRAO)
+    else:
+        bloco = detectar_bloco_itens(caminho)
+        if bloco is None:
+            logger.warning("Cabeçalho/rodapé dos itens não encontrados em %s; usando linhas %d-%d.",
+                           os.path.basename(caminho), LINHA_INICIAL_ITENS, LINHA_FINAL_ITENS)
+            mapa = MAPA_PADRAO
+        else:
+            mapa = MAPA_PADRAO.com_bloco(*bloco)
+    _mapas[caminho] = (chave, mapa)
+    return mapa
+
+
+_inspecoes = {}
+
+
+def inspecionar_modelo(caminho_modelo):
+    """(mapa, {célula: valor}) das células mapeadas do modelo, para a interface.
+
+    Leitura em streaming que para na última linha do mapa (sem carregar o workbook),
+    em cache por caminho + mtime + tamanho: reabrir o mesmo modelo não relê o arquivo.
+    """
+    caminho = os.path.abspath(caminho_modelo)
+    mapa = obter_mapa(caminho)
+    chave = _assinatura(caminho)
+    entrada = _inspecoes.get(caminho)
+    if entrada and entrada[0] == chave and entrada[1] is mapa:
+        return mapa, entrada[2]
+    valores = MappingProxyType(mapa.ler_arquivo(caminho))
+    _inspecoes[caminho] = (chave, mapa, valores)
+    return mapa, valores
+
+
+def obter_modelo(caminho_modelo, modo='xml'):
+    """Retorna o modelo em cache (recarrega só se o modelo ou o seu mapa mudarem).
+
+    modo 'xml': ModeloXML (edita o XML direto, preserva mídia); se o modelo não for
+    suportado, cai para 'openpyxl' (ModeloCache).
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo} (use {', '.join(MODOS)})")
+    caminho = os.path.abspath(caminho_modelo)
+    stat = os.stat(caminho)
+    chave = (stat.st_mtime_ns, stat.st_size)
+    with _modelos_lock:
+        mapa = obter_mapa(caminho)
+        entrada = _modelos.get((caminho, modo))
+        if entrada and entrada[0] == chave and entrada[1].mapa is mapa:
+            return entrada[1]
+        modelo = None
+        if modo == 'xml':
+            try:
+                modelo = ModeloXML(caminho, mapa.celulas_mapeadas, mapa.celulas_moeda)
+                modelo.mapa = mapa
+            except Exception as e:
+                logger.warning("Escrita direta em XML indisponível para %s: %s. Usando openpyxl.",
+                               os.path.basename(caminho), e)
+        if modelo is None:
+            modelo = ModeloCache(caminho, mapa)
+        _modelos[(caminho, modo)] = (chave, modelo)
+        logger.info("Modelo carregado em cache (%s, %r): %s", type(modelo).__name__, mapa, os.path.basename(caminho))
+        return modelo
+
+
+def obter_pdf_nativo(caminho_modelo):
+    """ModeloPDF do modelo em cache, com o bloco de itens detectado e a área cobrindo todo o mapa."""
+    mapa = obter_mapa(caminho_modelo)
+    return obter_modelo_pdf(caminho_modelo, mapa.celulas_mapeadas, (mapa.linha_inicial, mapa.linha_final),
+                            mapa.celulas_moeda, mapa.limites)
+
+
+def gerar_pdf_nativo(caminho_modelo, celulas, caminho_pdf, insercao=None):
+    """Desenha o PDF do orçamento direto (sem Excel/LibreOffice) com o layout do modelo.
+
+    Com linhas inseridas (insercao), os itens continuam em páginas seguintes.
+    """
+    return obter_pdf_nativo(caminho_modelo).renderizar(celulas, caminho_pdf, insercao)
+
+
+def _pedido(caminho_modelo, registro, numero, pasta_saida):
+    """(caminho do .xlsx, caminho do PDF, células, inserção) de um orçamento."""
+    mapa = obter_mapa(caminho_modelo)
+    nome_base = os.path.splitext(os.path.basename(caminho_modelo))[0]
+    novo_caminho = os.path.join(pasta_saida, nome_copia(nome_base, numero))
+    caminho_pdf = os.path.splitext(novo_caminho)[0] + ".pdf"
+    celulas = celulas_do_registro(registro, numero, mapa)
+    return novo_caminho, caminho_pdf, celulas, mapa.insercao(len(registro.get('itens') or []))
+
+
+def restaurar_do_cache(cache, caminho_modelo, registro, numero, pasta_saida, modo='xml', pdf_nativo=False):
+    """Copia do cache as saídas de um pedido idêntico a um já gerado, sem gerar nada.
+
+    Retorna o caminho do .xlsx, ou None se o pedido (ou o seu PDF) não estiver no cache.
+    """
+    novo_caminho, caminho_pdf, celulas, insercao = _pedido(caminho_modelo, registro, numero, pasta_saida)
+    chave = cache.chave(caminho_modelo, celulas, numero, insercao, modo)
+    if not cache.obter(chave, 'xlsx', novo_caminho):
+        return None
+    if pdf_nativo and not cache.obter(chave, 'pdf', caminho_pdf):
+        return None
+    return novo_caminho
+
+
+def gerar_orcamento(caminho_modelo, registro, numero, pasta_saida, modo='xml', pdf_nativo=False, cache=None):
+    """Gera uma cópia preenchida do modelo (usando o cache) e retorna o caminho do .xlsx.
+
+    Com pdf_nativo=True grava também '<nome>.pdf' ao lado, pelo renderizador nativo.
+    Com cache (cache_saida.CacheSaida), um pedido idêntico a um já gerado (mesmo modelo,
+    valores e número) reaproveita os arquivos em vez de gerar de novo.
+    """
+    novo_caminho, caminho_pdf, celulas, insercao = _pedido(caminho_modelo, registro, numero, pasta_saida)
+
+    def salvar():
+        obter_modelo(caminho_modelo, modo).salvar_copia(celulas, novo_caminho, insercao)
+
+    def desenhar_pdf():
+        gerar_pdf_nativo(caminho_modelo, celulas, caminho_pdf, insercao)
+
+    if cache is None:
+        salvar()
+        if pdf_nativo:
+            desenhar_pdf()
+        return novo_caminho
+    chave = cache.chave(caminho_modelo, celulas, numero, insercao, modo)
+    cache.obter_ou_gerar(chave, 'xlsx', novo_caminho, salvar)
+    if pdf_nativo:
+        cache.obter_ou_gerar(chave, 'pdf', caminho_pdf, desenhar_pdf)
+    return novo_caminho
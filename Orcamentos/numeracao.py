@@ -0,0 +1,108 @@
+"""Alocação de números de orçamento segura entre processos (config.json com trava + troca atômica).
+
+Cada operação abre uma trava exclusiva em '<config>.lock', lê proximo_numero, grava o
+novo valor num arquivo temporário e faz os.replace (atômico). Reservar N números custa
+uma única escrita, então lotes paralelos não pagam um fsync por orçamento.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _trava_exclusiva(caminho_lock):
+    with open(caminho_lock, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AlocadorNumeros:
+    """Contador proximo_numero persistido em config.json, seguro para uso concorrente."""
+
+    def __init__(self, config_file="config.json"):
+        self.config_file = os.path.abspath(config_file)
+        self.lock_file = self.config_file + ".lock"
+
+    def _ler_config(self):
+        """Conteúdo do config.json ({} se ainda não existe).
+
+        Um config.json corrompido levanta ValueError: tratá-lo como vazio voltaria o
+        contador para 1 e reemitiria números já entregues.
+        """
+        if not os.path.exists(self.config_file):
+            return {}
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            try:
+                config = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{self.config_file} inválido ({e}); corrija o proximo_numero "
+                                 f"antes de reservar números") from None
+        if not isinstance(config, dict):
+            raise ValueError(f"{self.config_file} inválido: esperado um objeto JSON")
+        return config
+
+    def _gravar_config(self, config):
+        pasta = os.path.dirname(self.config_file)
+        fd, temporario = tempfile.mkstemp(prefix='.config_', suffix='.tmp', dir=pasta)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.config_file)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def ler(self):
+        """Próximo número livre (sem reservar)."""
+        return int(self._ler_config().get('proximo_numero', 1))
+
+    def reservar(self, quantidade=1, minimo=None, pular=()):
+        """Reserva 'quantidade' números consecutivos e retorna o range reservado.
+
+        Se minimo for informado (ex: número digitado na UI), a reserva começa em
+        max(proximo_numero, minimo). Nunca devolve um número já entregue. Números em
+        'pular' (ex: os explícitos de um lote) não contam: o range cresce até ter
+        'quantidade' números fora deles.
+        """
+        pular = set(pular)
+        with _trava_exclusiva(self.lock_file):
+            config = self._ler_config()
+            inicio = max(int(config.get('proximo_numero', 1)), int(minimo or 0))
+            fim, livres = inicio, 0
+            while livres < quantidade:
+                livres += fim not in pular
+                fim += 1
+            config['proximo_numero'] = fim
+            self._gravar_config(config)
+        return range(inicio, fim)
+
+    def garantir_minimo(self, minimo):
+        """Avança proximo_numero até pelo menos 'minimo' (sem reservar). Retorna o valor atual."""
+        with _trava_exclusiva(self.lock_file):
+            config = self._ler_config()
+            atual = int(config.get('proximo_numero', 1))
+            if atual < minimo:
+                config['proximo_numero'] = atual = int(minimo)
+                self._gravar_config(config)
+        return atual
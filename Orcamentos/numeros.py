@@ -0,0 +1,140 @@
+"""Núcleo numérico dos itens: números BR ('1.234,56') → Decimal, F = C × E e soma do total.
+
+Os textos digitados são convertidos uma única vez (com cache) para colunas tipadas
+(ColunasItens); o recálculo de F e da soma roda sobre essas listas, com arredondamento
+exato em centavos (ROUND_HALF_UP, como o Excel), sem float no caminho.
+
+Na planilha, quantidade, valor unitário, total e a soma vão como números de verdade;
+valores e totais com o formato '#,##0.00' (embutido no Excel, nº 4), que o Excel em
+português mostra como 1.234,56.
+"""
+import functools
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENTAVOS = Decimal('0.01')
+ZERO = Decimal('0.00')
+FORMATO_MOEDA = '#,##0.00'
+ID_FORMATO_MOEDA = 4  # numFmtId embutido do '#,##0.00'
+
+
+def converter_br(texto):
+    """'1.234,56' / 'R$ 2.000,00' / '3' → Decimal. Retorna None se vazio ou inválido.
+
+    Números passam direto; bool não é número (None). Só textos vão ao cache: valores
+    iguais de tipos diferentes (1, 1.0, True, Decimal('1.00')) têm o mesmo hash e
+    trocariam de resultado entre si numa chave de cache comum.
+    """
+    if texto is None or isinstance(texto, bool):
+        return None
+    if isinstance(texto, (int, Decimal)):
+        return Decimal(texto)
+    if isinstance(texto, float):
+        return Decimal(repr(texto))
+    return _converter_texto(str(texto))
+
+
+@functools.lru_cache(maxsize=65536)
+def _converter_texto(texto):
+    limpo = texto.replace('R$', '').replace(' ', '').replace('\xa0', '').strip()
+    if not limpo:
+        return None
+    try:
+        valor = Decimal(limpo.replace('.', '').replace(',', '.'))
+    except InvalidOperation:
+        return None
+    return valor if valor.is_finite() else None
+
+
+def arredondar(valor):
+    """Arredonda em centavos (meio para cima, como o Excel)."""
+    return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def formatar_br(valor):
+    """Decimal/float → '1.234,56' (pontos de milhar, vírgula decimal)."""
+    if isinstance(valor, float):
+        valor = Decimal(repr(valor))
+    texto = f"{arredondar(Decimal(valor)):,.2f}"
+    return texto.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def formatar_quantidade(valor):
+    """Quantidade sem zeros à direita: Decimal('2') → '2', Decimal('2.50') → '2,5'."""
+    texto = format(valor, 'f')
+    if '.' in texto:
+        texto = texto.rstrip('0').rstrip('.')
+    return texto.replace('.', ',')
+
+
+def total_da_linha(quant, vlr_uni, total_informado):
+    """F da linha: C × E se ambos forem números; senão o total informado (ou None)."""
+    if quant is not None and vlr_uni is not None:
+        return arredondar(quant * vlr_uni)
+    return arredondar(total_informado) if total_informado is not None else None
+
+
+class ColunasItens:
+    """Colunas tipadas (quant, vlr_uni, total) dos itens, para recálculo em lote.
+
+    Cada lista tem uma posição por linha; None = vazio ou não numérico. 'invalidos'
+    guarda (linha, chave, texto) de textos preenchidos que não são número.
+    """
+
+    CHAVES = ('quant', 'vlr_uni', 'total')
+
+    def __init__(self, itens=()):
+        itens = list(itens)
+        self.invalidos = []
+        colunas = []
+        for chave in self.CHAVES:
+            textos = [item.get(chave) or "" for item in itens]
+            valores = list(map(converter_br, textos))
+            self.invalidos.extend((linha, chave, texto) for linha, (texto, valor)
+                                  in enumerate(zip(textos, valores)) if valor is None and texto)
+            colunas.append(valores)
+        self.quant, self.vlr_uni, self.total_informado = colunas
+        self.invalidos.sort()
+        self.recalcular()
+
+    def __len__(self):
+        return len(self.total)
+
+    def recalcular(self):
+        """Recalcula F (C × E) de todas as linhas de uma vez."""
+        self.total = list(map(total_da_linha, self.quant, self.vlr_uni, self.total_informado))
+        return self.total
+
+    def soma(self):
+        """Soma de F (o total do orçamento), em centavos."""
+        return arredondar(sum((t for t in self.total if t is not None), ZERO))
+
+
+class SomaIncremental:
+    """Soma de F mantida por linha: editar uma linha ajusta a soma pela diferença dela.
+
+    Guarda o F de cada linha (Decimal ou None); atualizar() recalcula só a linha
+    alterada e soma/subtrai a diferença, sem reler as demais.
+    """
+
+    def __init__(self, itens=()):
+        self.recarregar(itens)
+
+    def recarregar(self, itens):
+        """Recomeça a partir de uma lista de itens (dicts com quant/vlr_uni/total)."""
+        colunas = ColunasItens(itens)
+        self._totais = colunas.total
+        self._soma = sum((t for t in self._totais if t is not None), ZERO)
+
+    def atualizar(self, linha, item):
+        """Recalcula o F da linha e ajusta a soma; devolve a diferença aplicada."""
+        if linha >= len(self._totais):
+            self._totais.extend([None] * (linha + 1 - len(self._totais)))
+        novo = total_da_linha(*(converter_br(item.get(chave) or "") for chave in ColunasItens.CHAVES))
+        anterior = self._totais[linha]
+        self._totais[linha] = novo
+        diferenca = (novo or ZERO) - (anterior or ZERO)
+        self._soma += diferenca
+        return diferenca
+
+    def soma(self):
+        return arredondar(self._soma)
@@ -0,0 +1,305 @@
+"""Exportação de PDF em segundo plano com um conversor persistente.
+
+A geração do .xlsx só enfileira o arquivo (FilaPDF.submeter) e segue; uma thread
+dedicada consome a fila usando um único conversor mantido aberto entre conversões:
+  - Windows: uma instância do Excel (pywin32), aberta uma vez e reaproveitada;
+  - Linux/macOS: um LibreOffice 'soffice --headless' escutando via UNO.
+
+O módulo 'uno' vem com o Python do sistema (pacote python3-uno) e normalmente não existe
+num venv ou numa instalação via pip. Sem ele NÃO há conversor persistente: cada grupo de
+arquivos pendentes é convertido por uma chamada nova de 'soffice --convert-to', pagando a
+abertura do LibreOffice a cada grupo (ConversorLibreOffice.persistente diz qual é o caso).
+"""
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+
+# pywin32 e uno são importados só quando um conversor é criado (o import do pywin32
+# sozinho pesa no início do programa)
+win32 = pythoncom = None
+uno = PropertyValue = None
+
+
+@lru_cache(maxsize=None)
+def _carregar_excel():
+    """True se o pywin32 está disponível (importado na primeira chamada)."""
+    global win32, pythoncom
+    try:
+        import win32com.client as win32
+        import pythoncom
+    except ImportError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def _carregar_uno():
+    """True se o módulo uno do LibreOffice está disponível (importado na primeira chamada)."""
+    global uno, PropertyValue
+    try:
+        import uno
+        from com.sun.star.beans import PropertyValue
+    except ImportError:
+        return False
+    return True
+
+
+def _caminho_pdf(caminho_xlsx, pasta_saida=None):
+    pasta = pasta_saida or os.path.dirname(os.path.abspath(caminho_xlsx))
+    nome_base = os.path.splitext(os.path.basename(caminho_xlsx))[0]
+    return os.path.join(pasta, f"{nome_base}.pdf")
+
+
+def localizar_soffice():
+    """Caminho do executável do LibreOffice (None se não instalado)."""
+    for nome in ('soffice', 'libreoffice'):
+        caminho = shutil.which(nome)
+        if caminho:
+            return caminho
+    for caminho in (r"C:\Program Files\LibreOffice\program\soffice.exe",
+                    "/Applications/LibreOffice.app/Contents/MacOS/soffice"):
+        if os.path.exists(caminho):
+            return caminho
+    return None
+
+
+class ConversorExcel:
+    """Excel.Application aberto uma vez (na thread da fila) e reaproveitado."""
+
+    nome = "Excel"
+
+    def __init__(self):
+        self.excel = None
+
+    def iniciar(self):
+        pythoncom.CoInitialize()
+
+    def _aplicacao(self):
+        if self.excel is None:
+            self.excel = win32.DispatchEx("Excel.Application")
+            self.excel.Visible = False
+            self.excel.DisplayAlerts = False
+        return self.excel
+
+    def converter(self, tarefas):
+        resultados = []
+        for caminho_xlsx, caminho_pdf in tarefas:
+            try:
+                wb = self._aplicacao().Workbooks.Open(os.path.abspath(caminho_xlsx))
+                try:
+                    wb.ActiveSheet.ExportAsFixedFormat(0, caminho_pdf)  # 0 = PDF
+                finally:
+                    wb.Close(SaveChanges=False)
+                resultados.append((caminho_pdf, None))
+            except Exception as e:
+                resultados.append((None, e))
+                self._fechar_excel()  # recria o Excel na próxima conversão
+        return resultados
+
+    def _fechar_excel(self):
+        if self.excel is not None:
+            try:
+                self.excel.Quit()
+            except Exception:
+                pass
+            self.excel = None
+
+    def encerrar(self):
+        self._fechar_excel()
+        pythoncom.CoUninitialize()
+
+
+class ConversorLibreOffice:
+    """soffice --headless mantido aberto; conversões via UNO (ou em grupo, sem UNO)."""
+
+    nome = "LibreOffice"
+
+    @property
+    def persistente(self):
+        """True se há um soffice aberto entre conversões (precisa do módulo uno)."""
+        return _carregar_uno()
+
+    def __init__(self, soffice):
+        self.soffice = soffice
+        self.processo = None
+        self.desktop = None
+        self.perfil = tempfile.mkdtemp(prefix="orcamento_lo_")
+
+    def iniciar(self):
+        if not _carregar_uno():
+            return
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            porta = s.getsockname()[1]
+        self.processo = subprocess.Popen(
+            [self.soffice, '--headless', '--invisible', '--norestore', '--nologo',
+             f'-env:UserInstallation=file:///{self.perfil.lstrip("/")}',
+             f'--accept=socket,host=127.0.0.1,port={porta};urp;StarOffice.ComponentContext'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        limite = time.monotonic() + 30
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:socket,host=127.0.0.1,port={porta};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if time.monotonic() > limite or self.processo.poll() is not None:
+                    # Sem isso o soffice seguiria vivo segurando o perfil, e a conversão em
+                    # grupo (que usa o mesmo perfil) falharia
+                    self._parar_processo()
+                    raise RuntimeError("LibreOffice não respondeu na porta UNO.")
+                time.sleep(0.25)
+        self.desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+    @staticmethod
+    def _propriedade(nome, valor):
+        prop = PropertyValue()
+        prop.Name, prop.Value = nome, valor
+        return prop
+
+    def converter(self, tarefas):
+        if self.desktop is None:
+            return self._converter_em_grupo(tarefas)
+        resultados = []
+        for caminho_xlsx, caminho_pdf in tarefas:
+            try:
+                doc = self.desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(os.path.abspath(caminho_xlsx)), "_blank", 0,
+                    (self._propriedade("Hidden", True),))
+                try:
+                    doc.storeToURL(uno.systemPathToFileUrl(os.path.abspath(caminho_pdf)),
+                                   (self._propriedade("FilterName", "calc_pdf_Export"),))
+                finally:
+                    doc.close(True)
+                resultados.append((caminho_pdf, None))
+            except Exception as e:
+                resultados.append((None, e))
+        return resultados
+
+    def _converter_em_grupo(self, tarefas):
+        """Sem UNO: uma chamada do soffice por pasta de saída, com todos os arquivos pendentes."""
+        por_pasta = {}
+        for caminho_xlsx, caminho_pdf in tarefas:
+            por_pasta.setdefault(os.path.dirname(caminho_pdf), []).append(caminho_xlsx)
+        for pasta, arquivos in por_pasta.items():
+            subprocess.run([self.soffice, '--headless', '--norestore',
+                            f'-env:UserInstallation=file:///{self.perfil.lstrip("/")}',
+                            '--convert-to', 'pdf', '--outdir', pasta] + arquivos,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=600)
+        resultados = []
+        for caminho_xlsx, caminho_pdf in tarefas:
+            gerado = _caminho_pdf(caminho_xlsx, os.path.dirname(caminho_pdf))
+            if os.path.exists(gerado):
+                if gerado != caminho_pdf:
+                    os.replace(gerado, caminho_pdf)
+                resultados.append((caminho_pdf, None))
+            else:
+                resultados.append((None, RuntimeError(f"soffice não gerou PDF para {caminho_xlsx}")))
+        return resultados
+
+    def encerrar(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.processo is not None:
+            try:
+                self.processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._parar_processo()
+            self.processo = None
+        shutil.rmtree(self.perfil, ignore_errors=True)
+
+    def _parar_processo(self):
+        """Mata o soffice (se ainda estiver rodando) e espera ele liberar o perfil."""
+        if self.processo is None:
+            return
+        if self.processo.poll() is None:
+            self.processo.kill()
+            try:
+                self.processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+        self.processo = None
+
+
+def criar_conversor():
+    """Conversor disponível nesta máquina (Excel no Windows, senão LibreOffice). None se nenhum."""
+    if _carregar_excel():
+        return ConversorExcel()
+    soffice = localizar_soffice()
+    if soffice:
+        return ConversorLibreOffice(soffice)
+    return None
+
+
+@lru_cache(maxsize=None)
+def suporte_pdf():
+    return _carregar_excel() or localizar_soffice() is not None
+
+
+class FilaPDF:
+    """Fila de conversão xlsx → PDF atendida por uma thread com conversor persistente."""
+
+    def __init__(self, conversor=None, log=print):
+        self.conversor = conversor or criar_conversor()
+        if self.conversor is None:
+            raise RuntimeError("Nenhum conversor de PDF disponível (instale pywin32 + Excel ou LibreOffice).")
+        self.log = log
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, name="fila-pdf", daemon=True)
+        self._thread.start()
+
+    def submeter(self, caminho_xlsx, pasta_saida=None):
+        """Enfileira a conversão e retorna um Future com o caminho do PDF."""
+        futuro = Future()
+        self._fila.put((caminho_xlsx, _caminho_pdf(caminho_xlsx, pasta_saida), futuro))
+        return futuro
+
+    def _executar(self):
+        try:
+            self.conversor.iniciar()
+        except Exception as e:
+            self.log(f"Erro ao iniciar conversor PDF ({self.conversor.nome}): {e}")
+        encerrar = False
+        while not encerrar:
+            pendentes = [self._fila.get()]
+            # Junta o que já estiver na fila (o soffice sem UNO converte em grupo)
+            while True:
+                try:
+                    pendentes.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            if None in pendentes:
+                encerrar = True
+                pendentes = [p for p in pendentes if p is not None]
+            if not pendentes:
+                continue
+            tarefas = [(xlsx, pdf) for xlsx, pdf, _ in pendentes]
+            try:
+                resultados = self.conversor.converter(tarefas)
+            except Exception as e:
+                resultados = [(None, e)] * len(tarefas)
+            for (caminho_xlsx, _, futuro), (caminho_pdf, erro) in zip(pendentes, resultados):
+                if erro is None:
+                    futuro.set_result(caminho_pdf)
+                else:
+                    self.log(f"Erro PDF ({os.path.basename(caminho_xlsx)}): {erro}")
+                    futuro.set_exception(erro)
+        self.conversor.encerrar()
+
+    def fechar(self, esperar=True):
+        """Encerra a thread após converter o que já está na fila."""
+        self._fila.put(None)
+        if esperar:
+            self._thread.join()
@@ -0,0 +1,475 @@
+"""Renderizador de PDF nativo (Python puro): desenha o orçamento direto em PDF, sem Excel/LibreOffice.
+
+O layout vem do próprio modelo .xlsx, lido uma única vez: larguras de coluna, alturas de
+linha, fontes (tamanho/negrito), alinhamento, preenchimentos, bordas, células mescladas,
+textos fixos (cabeçalho, rótulos) e o logo. Tudo o que não muda entre orçamentos é
+pré-gerado como um trecho de content stream; a cada orçamento só os textos das células
+mapeadas (A5, B6-B9, A13-F34, F35, B36-B39) são desenhados por cima.
+
+Itens além da capacidade do modelo (linhas inseridas) seguem em páginas de continuação
+com o mesmo layout; o rodapé (tudo abaixo do bloco de itens: total, B36-B39, rótulos e
+assinatura) sai só na última página. O trecho fixo fica em dois streams gravados uma vez
+no PDF: cabeçalho/corpo, compartilhado por todas as páginas, e rodapé, só na última.
+
+Textos não quebram linha: como no Excel, um texto maior que a célula avança pelas
+células vizinhas vazias (nem mescladas, nem mapeadas); se ainda não couber, é cortado
+com reticências dentro desse espaço, sem invadir as células ao lado.
+
+Fontes: Helvetica/Helvetica-Bold (fontes padrão do PDF, WinAnsiEncoding), como no Excel
+com Arial. O logo precisa do Pillow; sem ele o PDF sai sem imagem.
+"""
+import datetime
+import io
+import os
+import threading
+import unicodedata
+import zlib
+from decimal import Decimal
+
+import numeros
+from escritor_xml import indice_para_coluna
+
+# A4 retrato (pt) e margens padrão do Excel
+LARGURA_PAGINA, ALTURA_PAGINA = 595.28, 841.89
+ALTURA_LINHA_PADRAO = 15.0
+LARGURA_COLUNA_PADRAO = 8.43
+
+# Larguras (1/1000 em) de Helvetica e Helvetica-Bold para ASCII 32-126
+_LARGURAS = {
+    False: [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+            556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+            1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+            667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+            333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+            556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    True: [278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+           975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+           333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+           611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+_ESPESSURA_BORDA = {'thin': 0.5, 'hair': 0.25, 'dotted': 0.5, 'dashed': 0.5, 'medium': 1.0,
+                    'mediumDashed': 1.0, 'double': 1.5, 'thick': 1.5}
+
+
+def largura_texto(texto, tamanho, negrito=False):
+    """Largura do texto em pt (métricas Helvetica; acentuados usam a letra base)."""
+    tabela = _LARGURAS[negrito]
+    total = 0
+    for ch in texto:
+        codigo = ord(ch)
+        if ch == '…':  # reticências dos textos cortados
+            total += 1000
+            continue
+        if not 32 <= codigo <= 126:
+            base = unicodedata.normalize('NFD', ch)[0]
+            codigo = ord(base) if 32 <= ord(base) <= 126 else 110  # 'n' como média
+        total += tabela[codigo - 32]
+    return total * tamanho / 1000.0
+
+
+def _texto_pdf(texto):
+    dados = texto.encode('cp1252', errors='replace')
+    return dados.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _largura_coluna_pt(caracteres):
+    # Excel: pixels = largura*7 + 5 (Calibri/Arial 11); 1 px = 0,75 pt
+    return (caracteres * 7 + 5) * 0.75
+
+
+def _cor(cor):
+    """'FFRRGGBB' → 'r g b' (0-1) ou None."""
+    rgb = getattr(cor, 'rgb', None)
+    if not isinstance(rgb, str) or len(rgb) < 6:
+        return None
+    rgb = rgb[-6:]
+    try:
+        return ' '.join(f"{int(rgb[i:i + 2], 16) / 255:.3f}" for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+
+class _EstiloCelula:
+    __slots__ = ('tamanho', 'negrito', 'alinhamento', 'cor_texto')
+
+    def __init__(self, cel):
+        self.tamanho = float(cel.font.sz or 11)
+        self.negrito = bool(cel.font.b)
+        self.alinhamento = cel.alignment.horizontal
+        self.cor_texto = _cor(cel.font.color)
+
+
+class ModeloPDF:
+    """Layout do modelo preparado uma vez; renderizar() gera o PDF de cada orçamento."""
+
+    def __init__(self, caminho_modelo, celulas_mapeadas, bloco_itens=None, celulas_moeda=(), limites=None):
+        self.caminho = os.path.abspath(caminho_modelo)
+        self.mapeadas = set(celulas_mapeadas)
+        self.moeda = frozenset(celulas_moeda)  # números como 1.234,56 (demais sem zeros à direita)
+        self.bloco_itens = bloco_itens  # (linha_inicial, linha_final) dos itens no modelo
+        from openpyxl import load_workbook  # import caro: só na primeira prévia/PDF
+        wb = load_workbook(self.caminho)
+        try:
+            ws = wb.active
+            self._preparar(ws, *self._area(ws, limites))
+        finally:
+            wb.close()
+
+    # ---------- preparação (uma vez por modelo) ----------
+
+    def _area(self, ws, limites):
+        """(última linha, última coluna) desenhadas.
+
+        A área de impressão do modelo ou, sem ela, as células com texto, borda ou
+        preenchimento (e as mescladas); sempre cobrindo as células mapeadas e os
+        limites (linha, coluna) pedidos.
+        """
+        linhas, colunas = [1], [1]
+        if limites:
+            linhas.append(limites[0])
+            colunas.append(limites[1])
+        for ref in self.mapeadas:
+            linha, coluna = self._linha_coluna(ref)
+            linhas.append(linha)
+            colunas.append(coluna)
+        if ws.print_area:
+            from openpyxl.utils.cell import range_boundaries
+            for faixa in ws.print_area.split(','):
+                _, _, max_col, max_linha = range_boundaries(faixa.rsplit('!', 1)[-1].replace('$', ''))
+                linhas.append(max_linha)
+                colunas.append(max_col)
+            return max(linhas), max(colunas)
+        for faixa in ws.merged_cells.ranges:
+            linhas.append(faixa.max_row)
+            colunas.append(faixa.max_col)
+        for linha in ws.iter_rows():
+            for cel in linha:
+                valor = cel.value
+                if ((valor is not None and str(valor).strip()) or self._bordas(cel.border, 0, 0, 0, 0)
+                        or (cel.fill is not None and cel.fill.fill_type == 'solid')):
+                    linhas.append(cel.row)
+                    colunas.append(cel.column)
+        return max(linhas), max(colunas)
+
+    def _preparar(self, ws, ultima_linha, ultima_coluna):
+        margens = ws.page_margins
+        margem_esq = (margens.left or 0.7) * 72
+        margem_topo = (margens.top or 0.75) * 72
+        disponivel = LARGURA_PAGINA - margem_esq - (margens.right or 0.7) * 72
+
+        larguras = {}
+        for dim in ws.column_dimensions.values():
+            if dim.width and dim.min and dim.max:
+                for c in range(dim.min, min(dim.max, ultima_coluna) + 1):
+                    larguras[c] = dim.width
+        larguras_pt = [_largura_coluna_pt(larguras.get(c, LARGURA_COLUNA_PADRAO)) for c in range(1, ultima_coluna + 1)]
+        escala = min(1.0, disponivel / sum(larguras_pt))
+        self.escala = escala
+
+        self.x = [margem_esq]
+        for largura in larguras_pt:
+            self.x.append(self.x[-1] + largura * escala)
+        # y[n] = topo da linha n (coordenadas PDF, origem embaixo)
+        self.y = [None, ALTURA_PAGINA - margem_topo]
+        for linha in range(1, ultima_linha + 1):
+            altura = ws.row_dimensions[linha].height if linha in ws.row_dimensions else None
+            self.y.append(self.y[-1] - (altura or ALTURA_LINHA_PADRAO) * escala)
+        self.ultima_linha, self.ultima_coluna = ultima_linha, ultima_coluna
+
+        # Mescladas: canto superior esquerdo → (linha_fim, coluna_fim); demais cobertas
+        self.mescladas, cobertas = {}, set()
+        for faixa in ws.merged_cells.ranges:
+            if faixa.min_row > ultima_linha or faixa.min_col > ultima_coluna:
+                continue
+            self.mescladas[(faixa.min_row, faixa.min_col)] = (min(faixa.max_row, ultima_linha),
+                                                              min(faixa.max_col, ultima_coluna))
+            for r in range(faixa.min_row, faixa.max_row + 1):
+                for c in range(faixa.min_col, faixa.max_col + 1):
+                    if (r, c) != (faixa.min_row, faixa.min_col):
+                        cobertas.add((r, c))
+
+        # Trecho fixo em duas partes: até o fim do bloco de itens (todas as páginas) e rodapé
+        fim_corpo = self.bloco_itens[1] if self.bloco_itens else ultima_linha
+        fixo, rodape = [], []
+        self.estilos, self.valores_modelo = {}, {}
+        ocupadas = set(cobertas) | set(self.mescladas)
+        for linha in range(1, ultima_linha + 1):
+            for coluna in range(1, ultima_coluna + 1):
+                if (linha, coluna) in cobertas:
+                    continue
+                cel = ws.cell(row=linha, column=coluna)
+                ref = f"{indice_para_coluna(coluna)}{linha}"
+                x0, x1, y0, y1 = self._caixa(linha, coluna)
+                destino = fixo if linha <= fim_corpo else rodape
+                if cel.fill is not None and cel.fill.fill_type == 'solid':
+                    cor = _cor(cel.fill.fgColor)
+                    if cor:
+                        destino.append(f"{cor} rg {x0:.2f} {y0:.2f} {x1 - x0:.2f} {y1 - y0:.2f} re f")
+                destino.extend(self._bordas(cel.border, x0, x1, y0, y1))
+                estilo = _EstiloCelula(cel)
+                self.estilos[ref] = estilo
+                self.valores_modelo[ref] = cel.value
+                if ref in self.mapeadas or (cel.value is not None and str(cel.value).strip()):
+                    ocupadas.add((linha, coluna))
+        self.coordenadas = {ref: self._caixa(*self._linha_coluna(ref)) for ref in self.estilos}
+        self.espacos = {ref: self._espaco(ref, ocupadas) for ref in self.estilos}
+
+        # Textos fixos (células não mapeadas) entram no trecho pré-gerado
+        for ref in self.estilos:
+            if ref not in self.mapeadas:
+                texto = self._desenhar_texto(ref, self._formatar(self.valores_modelo[ref]), self.valores_modelo)
+                if texto:
+                    (fixo if self._linha_coluna(ref)[0] <= fim_corpo else rodape).append(texto)
+        self._imagem = self._preparar_logo(ws)
+        if self._imagem:
+            x, y, w, h = self._imagem['caixa']
+            (fixo if self._imagem['linha'] <= fim_corpo else rodape).append(
+                f"q {w:.2f} 0 0 {h:.2f} {x:.2f} {y:.2f} cm /Im1 Do Q")
+        self._fixo = ('\n'.join(fixo) + '\n').encode('latin-1')
+        self._rodape = ('\n'.join(rodape) + '\n').encode('latin-1') if rodape else b''
+
+    def _espaco(self, ref, ocupadas):
+        """(x inicial, x final) onde o texto da célula pode ir: a célula e as vizinhas vazias.
+
+        Célula mesclada não transborda (como no Excel).
+        """
+        linha, coluna = self._linha_coluna(ref)
+        x0, x1, _, _ = self.coordenadas[ref]
+        if (linha, coluna) in self.mescladas:
+            return x0, x1
+        esquerda = coluna - 1
+        while esquerda >= 1 and (linha, esquerda) not in ocupadas:
+            esquerda -= 1
+        direita = coluna + 1
+        while direita <= self.ultima_coluna and (linha, direita) not in ocupadas:
+            direita += 1
+        return self.x[esquerda], self.x[direita - 1]
+
+    @staticmethod
+    def _linha_coluna(ref):
+        letras = ''.join(ch for ch in ref if ch.isalpha())
+        coluna = 0
+        for letra in letras:
+            coluna = coluna * 26 + ord(letra) - 64
+        return int(ref[len(letras):]), coluna
+
+    def _caixa(self, linha, coluna):
+        linha_fim, coluna_fim = self.mescladas.get((linha, coluna), (linha, coluna))
+        return self.x[coluna - 1], self.x[coluna_fim], self.y[linha_fim + 1], self.y[linha]
+
+    @staticmethod
+    def _bordas(borda, x0, x1, y0, y1):
+        ops = []
+        for lado, (xa, ya, xb, yb) in (('left', (x0, y0, x0, y1)), ('right', (x1, y0, x1, y1)),
+                                        ('top', (x0, y1, x1, y1)), ('bottom', (x0, y0, x1, y0))):
+            estilo = getattr(getattr(borda, lado, None), 'style', None)
+            if estilo:
+                ops.append(f"{_ESPESSURA_BORDA.get(estilo, 0.5):.2f} w {xa:.2f} {ya:.2f} m {xb:.2f} {yb:.2f} l S")
+        return ops
+
+    def _preparar_logo(self, ws):
+        imagens = getattr(ws, '_images', None)
+        if not imagens:
+            return None
+        try:
+            from PIL import Image as PILImage  # só quando o modelo tem logo
+        except ImportError:
+            return None
+        img = imagens[0]
+        try:
+            pil = PILImage.open(io.BytesIO(img._data()))
+            if pil.mode in ('RGBA', 'LA', 'P'):
+                pil = pil.convert('RGBA')
+                fundo = PILImage.new('RGB', pil.size, (255, 255, 255))
+                fundo.paste(pil, mask=pil.split()[-1])
+                pil = fundo
+            else:
+                pil = pil.convert('RGB')
+        except Exception:
+            return None
+        marcador = img.anchor._from
+        linha, coluna = marcador.row + 1, marcador.col + 1
+        x = self.x[min(coluna, self.ultima_coluna) - 1] + marcador.colOff / 12700.0 * self.escala
+        topo = self.y[min(linha, self.ultima_linha)] - marcador.rowOff / 12700.0 * self.escala
+        w, h = img.width * 0.75 * self.escala, img.height * 0.75 * self.escala
+        return {'caixa': (x, topo - h, w, h), 'linha': linha, 'tamanho': pil.size,
+                'dados': zlib.compress(pil.tobytes(), 6)}
+
+    # ---------- geração (a cada orçamento) ----------
+
+    @staticmethod
+    def _formatar(valor, moeda=False):
+        if valor is None:
+            return ""
+        if isinstance(valor, str):
+            if valor.upper().startswith('=TODAY()'):
+                return datetime.date.today().strftime("%d/%m/%Y")
+            return "" if valor.startswith('=') else valor
+        if isinstance(valor, Decimal):
+            return numeros.formatar_br(valor) if moeda else numeros.formatar_quantidade(valor)
+        if isinstance(valor, float):
+            return numeros.formatar_br(valor)
+        if isinstance(valor, (datetime.date, datetime.datetime)):
+            return valor.strftime("%d/%m/%Y")
+        return str(valor)
+
+    @staticmethod
+    def _encurtar(texto, disponivel, tamanho, negrito):
+        """Texto cortado com '…' para caber em 'disponivel' pt (o próprio texto se já couber)."""
+        if largura_texto(texto, tamanho, negrito) <= disponivel:
+            return texto
+        disponivel -= largura_texto('…', tamanho, negrito)
+        inicio, fim = 0, len(texto)
+        while inicio < fim:  # maior prefixo que cabe
+            meio = (inicio + fim + 1) // 2
+            if largura_texto(texto[:meio], tamanho, negrito) <= disponivel:
+                inicio = meio
+            else:
+                fim = meio - 1
+        return texto[:inicio].rstrip() + '…'
+
+    def _desenhar_texto(self, ref, texto, valores):
+        if not texto:
+            return ""
+        estilo = self.estilos[ref]
+        x0, x1, y0, _ = self.coordenadas[ref]
+        espaco_x0, espaco_x1 = self.espacos[ref]
+        tamanho = estilo.tamanho * self.escala
+        alinhamento = estilo.alinhamento
+        if alinhamento is None and not isinstance(valores.get(ref), str) and valores.get(ref) is not None:
+            alinhamento = 'right'  # números alinham à direita no Excel
+        # Espaço útil (2 pt de folga de cada lado): direita avança à esquerda, esquerda à direita,
+        # centralizado para os dois lados por igual
+        centro = (x0 + x1) / 2
+        if alinhamento == 'right':
+            disponivel = x1 - espaco_x0 - 4
+        elif alinhamento in ('center', 'centerContinuous'):
+            disponivel = 2 * min(centro - espaco_x0, espaco_x1 - centro) - 4
+        else:
+            disponivel = espaco_x1 - x0 - 4
+        texto = self._encurtar(texto, disponivel, tamanho, estilo.negrito)
+        largura = largura_texto(texto, tamanho, estilo.negrito)
+        if alinhamento == 'right':
+            x = x1 - 2 - largura
+        elif alinhamento in ('center', 'centerContinuous'):
+            x = centro - largura / 2
+        else:
+            x = x0 + 2
+        cor = estilo.cor_texto or '0 0 0'
+        fonte = '/F2' if estilo.negrito else '/F1'
+        return (f"BT {cor} rg {fonte} {tamanho:.2f} Tf {x:.2f} {y0 + 3 * self.escala:.2f} Td "
+                f"({_texto_pdf(texto).decode('latin-1')}) Tj ET")
+
+    def _textos(self, celulas):
+        textos = [self._desenhar_texto(ref, self._formatar(valor, ref in self.moeda), celulas)
+                  for ref, valor in celulas.items() if ref in self.estilos]
+        return '\n'.join(t for t in textos if t).encode('latin-1')
+
+    def conteudo(self, celulas):
+        """Content stream de uma página única (com o rodapé) para as células informadas."""
+        return self._fixo + self._rodape + self._textos(celulas)
+
+    def paginas(self, celulas, insercao=None):
+        """Divide as células em páginas, já nas posições do modelo.
+
+        Sem insercao, uma página. Com insercao=(linha, quantidade), cada página leva
+        até 'capacidade' itens; cabeçalho em todas, rodapé só na última.
+        """
+        if not insercao:
+            return [celulas]
+        if self.bloco_itens is None:
+            raise ValueError("Modelo PDF sem bloco de itens definido; não é possível paginar.")
+        inicial, final = self.bloco_itens
+        linha, quantidade = insercao
+        capacidade = final - inicial + 1
+        total_paginas = -(-(linha + quantidade - inicial) // capacidade)
+        paginas = [{} for _ in range(total_paginas)]
+        for ref, valor in celulas.items():
+            numero, _ = self._linha_coluna(ref)
+            col = ref[:len(ref) - len(str(numero))]
+            if numero < inicial:
+                for pagina in paginas:
+                    pagina[ref] = valor
+            elif numero < linha + quantidade:
+                indice, deslocamento = divmod(numero - inicial, capacidade)
+                paginas[indice][f"{col}{inicial + deslocamento}"] = valor
+            else:
+                paginas[-1][f"{col}{numero - quantidade}"] = valor
+        return paginas
+
+    def renderizar(self, celulas, destino, insercao=None):
+        """Gera o PDF em destino (caminho ou arquivo binário)."""
+        paginas = self.paginas(celulas, insercao)
+        fixo = zlib.compress(self._fixo, 6)
+        # Objetos: 1 catálogo, 2 páginas, 3-4 fontes, 5 trecho fixo, [imagem], [rodapé], páginas
+        proximo = 6
+        numero_imagem = numero_rodape = None
+        if self._imagem:
+            numero_imagem, proximo = proximo, proximo + 1
+        if self._rodape:
+            numero_rodape, proximo = proximo, proximo + 1
+        primeira = proximo
+        recursos = (f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >>"
+                    f"{f' /XObject << /Im1 {numero_imagem} 0 R >>' if self._imagem else ''} >>")
+        kids = ' '.join(f"{primeira + 2 * i} 0 R" for i in range(len(paginas)))
+        objetos = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>".encode('ascii'),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(fixo) + fixo + b"\nendstream",
+        ]
+        if self._imagem:
+            w, h = self._imagem['tamanho']
+            dados = self._imagem['dados']
+            objetos.append(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                           b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (w, h, len(dados))
+                           + dados + b"\nendstream")
+        if self._rodape:
+            rodape = zlib.compress(self._rodape, 6)
+            objetos.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(rodape) + rodape + b"\nendstream")
+        for i, pagina in enumerate(paginas):
+            textos = zlib.compress(b"\n" + self._textos(pagina), 6)
+            ultima = i == len(paginas) - 1
+            conteudos = f"5 0 R {f'{numero_rodape} 0 R ' if ultima and self._rodape else ''}{primeira + 2 * i + 1} 0 R"
+            objetos.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {LARGURA_PAGINA} {ALTURA_PAGINA}] "
+                            f"{recursos} /Contents [{conteudos}] >>").encode('ascii'))
+            objetos.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(textos) + textos + b"\nendstream")
+
+        saida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        posicoes = []
+        for numero, objeto in enumerate(objetos, start=1):
+            posicoes.append(len(saida))
+            saida += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+        inicio_xref = len(saida)
+        saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+        saida += b"".join(b"%010d 00000 n \n" % pos for pos in posicoes)
+        saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+
+        if hasattr(destino, 'write'):
+            destino.write(saida)
+        else:
+            with open(destino, 'wb') as f:
+                f.write(saida)
+        return destino
+
+
+_modelos = {}
+_modelos_lock = threading.Lock()
+
+
+def obter_modelo_pdf(caminho_modelo, celulas_mapeadas, bloco_itens=None, celulas_moeda=(), limites=None):
+    """ModeloPDF em cache por arquivo (recarrega se mtime/tamanho ou o mapa mudarem)."""
+    caminho = os.path.abspath(caminho_modelo)
+    stat = os.stat(caminho)
+    chave = (stat.st_mtime_ns, stat.st_size, bloco_itens, tuple(celulas_mapeadas), frozenset(celulas_moeda),
+             limites)
+    with _modelos_lock:
+        entrada = _modelos.get(caminho)
+        if entrada and entrada[0] == chave:
+            return entrada[1]
+        modelo = ModeloPDF(caminho, celulas_mapeadas, bloco_itens, celulas_moeda, limites)
+        _modelos[caminho] = (chave, modelo)
+        return modelo
@@ -0,0 +1,420 @@
+"""Serviço HTTP/JSON local de geração de orçamentos (para ERP, formulários web etc.).
+
+Uso:
+    python servico.py --modelos pasta_dos_modelos --saida pasta_saida [--porta 8765] [--workers N]
+
+Endpoints (JSON, exceto os arquivos):
+    GET  /modelos                     IDs dos modelos (nome do .xlsx sem extensão)
+    POST /orcamentos                  {"modelo": "06_exemplo", "orcamento": {...}, "pdf": true}
+         ?assincrono=1                  202 + {"trabalho": id} sem esperar a geração
+         ?retorno=xlsx | pdf            devolve o arquivo gerado em vez do JSON
+    GET  /trabalhos/<id>              situação: na_fila, processando, concluido ou erro
+    GET  /trabalhos/<id>/xlsx | /pdf  arquivo gerado
+    GET  /saude                       workers, fila e trabalhos pendentes
+
+O orçamento tem o formato do lote (lote.py): cliente, endereco, cnpj, telefone, prazo,
+pagamento, condicoes, itens e, opcionalmente, numero; sem numero, o próximo é reservado
+em config.json. Um numero explícito que já está em geração, já consta no banco ou já tem
+o .xlsx na pasta de saída é recusado com 409 (o serviço não sobrescreve um orçamento
+emitido nem gera o mesmo número duas vezes ao mesmo tempo). A exceção é o reenvio
+idêntico (mesmo modelo, dados e número) de um orçamento emitido: as saídas vêm do cache
+(--cache), sem passar pelos workers, e a resposta é 200 em vez de 201. O PDF é desenhado pelo renderizador nativo, sem Excel/LibreOffice.
+
+A renderização roda num ProcessPoolExecutor com os modelos já carregados em cada worker
+(e mantidos em cache entre requisições; um modelo alterado é relido sozinho). Cabem no
+máximo workers + --fila trabalhos pendentes; além disso o serviço responde 503 com
+Retry-After, em vez de acumular requisições sem limite. Escuta só em 127.0.0.1 por padrão.
+Para teste de carga, veja carga_servico.py.
+"""
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import logs
+import motor
+from banco import ARQUIVO_PADRAO, BancoOrcamentos
+from cache_saida import LIMITE_PADRAO_MB, PASTA_PADRAO, CacheSaida
+from numeracao import AlocadorNumeros
+
+logger = logs.obter_logger('servico')
+
+PORTA_PADRAO = 8765
+TAMANHO_MAXIMO_CORPO = 2 * 1024 * 1024
+TRABALHOS_GUARDADOS = 1000  # concluídos mantidos para consulta (os mais antigos saem)
+ESPERA_MAXIMA = 120.0  # segundos que uma requisição síncrona espera pela geração
+TIPOS_ARQUIVO = {'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                 'pdf': 'application/pdf'}
+
+
+_cache = None  # CacheSaida do worker (definido em _iniciar_worker)
+
+
+class ErroRequisicao(Exception):
+    """Erro do cliente: vira resposta HTTP com o status e a mensagem."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _iniciar_worker(caminhos_modelos, pasta_cache=None, limite_cache_mb=LIMITE_PADRAO_MB):
+    """Inicializador do processo: deixa os modelos (e o layout do PDF) no cache do worker."""
+    global _cache
+    _cache = CacheSaida(pasta_cache, limite_cache_mb) if pasta_cache else None
+    for caminho in caminhos_modelos:
+        try:
+            motor.obter_modelo(caminho)
+            motor.obter_pdf_nativo(caminho)
+        except Exception as e:
+            logger.warning("Modelo não pré-carregado (%s): %s", os.path.basename(caminho), e)
+
+
+def _renderizar(caminho_modelo, registro, numero, pasta_saida, com_pdf):
+    """Gera o .xlsx (e o PDF) no worker; retorna (caminho do .xlsx, caminho do PDF ou None, ms)."""
+    inicio = time.perf_counter()
+    caminho = motor.gerar_orcamento(caminho_modelo, registro, numero, pasta_saida, pdf_nativo=com_pdf, cache=_cache)
+    caminho_pdf = os.path.splitext(caminho)[0] + ".pdf" if com_pdf else None
+    return caminho, caminho_pdf, (time.perf_counter() - inicio) * 1000
+
+
+class Trabalho:
+    """Uma geração pedida ao serviço (situação consultável por /trabalhos/<id>)."""
+
+    def __init__(self, modelo, numero):
+        self.id = uuid.uuid4().hex
+        self.modelo = modelo
+        self.numero = numero
+        self.futuro = None
+        self.pronto = threading.Event()  # resultado (ou erro) já preenchido
+        self.xlsx = self.pdf = self.erro = None
+        self.duracao_ms = None
+        self.reaproveitado = False  # saídas vindas do cache (reenvio idêntico)
+
+    def situacao(self):
+        if not self.pronto.is_set():
+            return 'processando' if self.futuro is not None and self.futuro.running() else 'na_fila'
+        return 'erro' if self.erro else 'concluido'
+
+    def como_dict(self):
+        dados = {'trabalho': self.id, 'situacao': self.situacao(), 'modelo': self.modelo, 'numero': self.numero}
+        if self.xlsx:
+            dados['xlsx'] = f"/trabalhos/{self.id}/xlsx"
+            dados['arquivo'] = os.path.basename(self.xlsx)
+        if self.pdf:
+            dados['pdf'] = f"/trabalhos/{self.id}/pdf"
+        if self.duracao_ms is not None:
+            dados['duracao_ms'] = round(self.duracao_ms, 1)
+        if self.erro:
+            dados['erro'] = self.erro
+        if self.reaproveitado:
+            dados['cache'] = True
+        return dados
+
+
+class ServicoOrcamentos:
+    """Pool de workers + fila limitada + registro dos trabalhos (independente do HTTP)."""
+
+    def __init__(self, pasta_modelos, pasta_saida, workers=1, fila=None, config='config.json', banco=None,
+                 pasta_cache=PASTA_PADRAO, limite_cache_mb=LIMITE_PADRAO_MB):
+        self.pasta_modelos = os.path.abspath(pasta_modelos)
+        self.pasta_saida = os.path.abspath(pasta_saida)
+        os.makedirs(self.pasta_saida, exist_ok=True)
+        self.workers = max(1, workers)
+        self.capacidade = self.workers + (self.workers * 4 if fila is None else max(0, fila))
+        self.alocador = AlocadorNumeros(config)
+        self.banco = banco
+        self.cache = CacheSaida(pasta_cache, limite_cache_mb) if pasta_cache else None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._em_geracao = set()  # números com trabalho ainda não concluído
+        self._trabalhos = OrderedDict()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_iniciar_worker,
+                                             initargs=([self.caminho_modelo(m) for m in self.modelos()],
+                                                       pasta_cache, limite_cache_mb))
+        for _ in range(self.workers):  # sobe os workers (e carrega os modelos) antes da primeira requisição
+            self._executor.submit(int)
+
+    def modelos(self):
+        """IDs dos modelos disponíveis (relidos a cada chamada: modelos novos entram sem reiniciar)."""
+        nomes = (os.path.basename(caminho) for caminho in glob.glob(os.path.join(self.pasta_modelos, '*.xlsx')))
+        return sorted(os.path.splitext(nome)[0] for nome in nomes
+                      if not nome.startswith('~$') and '_copia_' not in nome)
+
+    def caminho_modelo(self, modelo):
+        if not isinstance(modelo, str) or not modelo or os.path.basename(modelo) != modelo or modelo.startswith('.'):
+            raise ErroRequisicao(400, f"ID de modelo inválido: {modelo!r}")
+        caminho = os.path.join(self.pasta_modelos, modelo + '.xlsx')
+        if not os.path.isfile(caminho):
+            raise ErroRequisicao(404, f"Modelo não encontrado: {modelo}")
+        return caminho
+
+    def pendentes(self):
+        return self._pendentes
+
+    def _numero_emitido(self, modelo, numero):
+        """True se o número já foi gerado: registrado no banco ou com o .xlsx na pasta de saída."""
+        if os.path.exists(os.path.join(self.pasta_saida, motor.nome_copia(modelo, numero))):
+            return True
+        return self.banco is not None and bool(self.banco.buscar(numero=numero, limite=1))
+
+    def submeter(self, modelo, registro, com_pdf=True):
+        """Enfileira a geração; ErroRequisicao(503) se a fila estiver cheia, 409 se o número já foi usado."""
+        caminho_modelo = self.caminho_modelo(modelo)
+        if not isinstance(registro, dict):
+            raise ErroRequisicao(400, "'orcamento' deve ser um objeto JSON")
+        if not isinstance(registro.get('itens', []), list):
+            raise ErroRequisicao(400, "'itens' deve ser uma lista")
+        try:
+            numero = int(registro['numero']) if registro.get('numero') else None
+        except (TypeError, ValueError):
+            raise ErroRequisicao(400, f"Número inválido: {registro['numero']!r}") from None
+        with self._lock:
+            if self._pendentes >= self.capacidade:
+                raise ErroRequisicao(503, f"Fila cheia ({self.capacidade} trabalhos pendentes); tente novamente")
+            if numero is not None:
+                # Reserva o número já sob a trava: dois pedidos com o mesmo número não passam juntos
+                if numero in self._em_geracao:
+                    raise ErroRequisicao(409, f"Orçamento {numero} já está sendo gerado")
+                self._em_geracao.add(numero)
+            self._pendentes += 1
+        try:
+            if numero is None:
+                numero = self.alocador.reservar(1).start
+                with self._lock:
+                    self._em_geracao.add(numero)
+            elif self._numero_emitido(modelo, numero):
+                trabalho = self._reaproveitar(modelo, caminho_modelo, registro, numero, com_pdf)
+                if trabalho is None:
+                    raise ErroRequisicao(409, f"Orçamento {numero} já foi emitido")
+                self._liberar_vaga(numero)
+                with self._lock:
+                    self._trabalhos[trabalho.id] = trabalho
+                    self._descartar_antigos()
+                return trabalho
+            else:
+                self.alocador.garantir_minimo(numero + 1)
+            trabalho = Trabalho(modelo, numero)
+            trabalho.futuro = self._executor.submit(_renderizar, caminho_modelo, registro, numero,
+                                                    self.pasta_saida, com_pdf)
+        except BaseException:
+            self._liberar_vaga(numero)
+            raise
+        with self._lock:
+            self._trabalhos[trabalho.id] = trabalho
+            self._descartar_antigos()
+        trabalho.futuro.add_done_callback(lambda futuro: self._concluir(trabalho, registro, caminho_modelo))
+        return trabalho
+
+    def _reaproveitar(self, modelo, caminho_modelo, registro, numero, com_pdf):
+        """Trabalho já concluído com as saídas do cache, se o pedido é idêntico ao que emitiu o número."""
+        if self.cache is None:
+            return None
+        inicio = time.perf_counter()
+        caminho = motor.restaurar_do_cache(self.cache, caminho_modelo, registro, numero, self.pasta_saida,
+                                           pdf_nativo=com_pdf)
+        if caminho is None:
+            return None
+        trabalho = Trabalho(modelo, numero)
+        trabalho.xlsx = caminho
+        trabalho.pdf = os.path.splitext(caminho)[0] + ".pdf" if com_pdf else None
+        trabalho.duracao_ms = (time.perf_counter() - inicio) * 1000
+        trabalho.reaproveitado = True
+        trabalho.pronto.set()
+        logger.debug("Orçamento %d reenviado sem alterações: saídas do cache.", numero)
+        return trabalho
+
+    def _liberar_vaga(self, numero=None):
+        with self._lock:
+            self._pendentes -= 1
+            self._em_geracao.discard(numero)
+
+    def _concluir(self, trabalho, registro, caminho_modelo):
+        """Callback do futuro (thread do executor): preenche o trabalho, libera a vaga e grava no banco."""
+        try:
+            trabalho.xlsx, trabalho.pdf, trabalho.duracao_ms = trabalho.futuro.result()
+        except Exception as e:
+            trabalho.erro = str(e) or type(e).__name__
+            logger.error("Trabalho %s (número %d) falhou: %s", trabalho.id, trabalho.numero, trabalho.erro)
+        finally:
+            self._liberar_vaga(trabalho.numero)
+            trabalho.pronto.set()
+        if trabalho.erro is None:
+            logger.debug("Orçamento %d gerado: %s (%.0f ms)", trabalho.numero, os.path.basename(trabalho.xlsx),
+                        trabalho.duracao_ms)
+            if self.banco is not None:
+                try:
+                    self.banco.registrar(registro, trabalho.numero, trabalho.xlsx, trabalho.pdf, caminho_modelo)
+                except Exception as e:
+                    logger.warning("Orçamento %d não registrado no banco: %s", trabalho.numero, e)
+
+    def _descartar_antigos(self):
+        excesso = len(self._trabalhos) - TRABALHOS_GUARDADOS
+        for chave in list(self._trabalhos)[:max(0, excesso)]:
+            if self._trabalhos[chave].pronto.is_set():
+                del self._trabalhos[chave]
+
+    def trabalho(self, id_trabalho):
+        with self._lock:
+            trabalho = self._trabalhos.get(id_trabalho)
+        if trabalho is None:
+            raise ErroRequisicao(404, f"Trabalho não encontrado: {id_trabalho}")
+        return trabalho
+
+    def saude(self):
+        return {'workers': self.workers, 'capacidade': self.capacidade, 'pendentes': self.pendentes(),
+                'modelos': len(self.modelos())}
+
+    def fechar(self):
+        self._executor.shutdown(wait=True)
+        if self.cache is not None:
+            self.cache.fechar()
+
+
+class ManipuladorHTTP(BaseHTTPRequestHandler):
+    """Rotas do serviço; o ServicoOrcamentos fica em self.server.servico."""
+
+    server_version = "ServicoOrcamentos/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive: o cliente de carga reaproveita a conexão
+
+    def log_message(self, formato, *args):
+        logger.debug("%s - %s", self.address_string(), formato % args)
+
+    def _responder_json(self, status, dados, cabecalhos=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _responder_arquivo(self, caminho, tipo):
+        if not caminho or not os.path.isfile(caminho):
+            raise ErroRequisicao(404, f"Arquivo {tipo} não disponível")
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', TIPOS_ARQUIVO[tipo])
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(caminho)}"')
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def _tratar(self, rota):
+        try:
+            rota()
+        except ErroRequisicao as e:
+            cabecalhos = {'Retry-After': '1'} if e.status == 503 else None
+            self._responder_json(e.status, {'erro': str(e)}, cabecalhos)
+        except Exception as e:
+            logger.error("Erro em %s %s: %s", self.command, self.path, e)
+            self._responder_json(500, {'erro': str(e) or type(e).__name__})
+
+    def do_GET(self):
+        self._tratar(self._get)
+
+    def do_POST(self):
+        self._tratar(self._post)
+
+    def _get(self):
+        servico = self.server.servico
+        partes = [parte for parte in urlsplit(self.path).path.split('/') if parte]
+        if partes == ['modelos']:
+            self._responder_json(200, {'modelos': servico.modelos()})
+        elif partes == ['saude']:
+            self._responder_json(200, servico.saude())
+        elif len(partes) == 2 and partes[0] == 'trabalhos':
+            self._responder_json(200, servico.trabalho(partes[1]).como_dict())
+        elif len(partes) == 3 and partes[0] == 'trabalhos' and partes[2] in TIPOS_ARQUIVO:
+            trabalho = servico.trabalho(partes[1])
+            self._responder_arquivo(trabalho.xlsx if partes[2] == 'xlsx' else trabalho.pdf, partes[2])
+        else:
+            raise ErroRequisicao(404, f"Rota não encontrada: {self.path}")
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroRequisicao(413, f"Corpo maior que {TAMANHO_MAXIMO_CORPO} bytes")
+        try:
+            dados = json.loads(self.rfile.read(tamanho) or b'{}')
+        except ValueError as e:
+            raise ErroRequisicao(400, f"JSON inválido: {e}") from None
+        if not isinstance(dados, dict):
+            raise ErroRequisicao(400, "O corpo deve ser um objeto JSON")
+        return dados
+
+    def _post(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') != '/orcamentos':
+            raise ErroRequisicao(404, f"Rota não encontrada: {self.path}")
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        retorno = parametros.get('retorno', 'json')
+        if retorno not in ('json',) + tuple(TIPOS_ARQUIVO):
+            raise ErroRequisicao(400, f"retorno inválido: {retorno} (use json, xlsx ou pdf)")
+        dados = self._ler_json()
+        com_pdf = bool(dados.get('pdf', True)) or retorno == 'pdf'
+        trabalho = self.server.servico.submeter(dados.get('modelo'), dados.get('orcamento'), com_pdf)
+        if parametros.get('assincrono', '').lower() in ('1', 'true', 'sim'):
+            self._responder_json(202, trabalho.como_dict(), {'Location': f"/trabalhos/{trabalho.id}"})
+            return
+        if not trabalho.pronto.wait(ESPERA_MAXIMA):  # demorou demais: segue como assíncrono
+            self._responder_json(202, trabalho.como_dict(), {'Location': f"/trabalhos/{trabalho.id}"})
+            return
+        if trabalho.erro:
+            self._responder_json(500, trabalho.como_dict())
+        elif retorno == 'json':
+            self._responder_json(200 if trabalho.reaproveitado else 201, trabalho.como_dict(),
+                                 {'Location': f"/trabalhos/{trabalho.id}"})
+        else:
+            self._responder_arquivo(trabalho.xlsx if retorno == 'xlsx' else trabalho.pdf, retorno)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de geração de orçamentos.")
+    parser.add_argument('--modelos', required=True, help="Pasta com os modelos .xlsx (ID = nome sem extensão)")
+    parser.add_argument('--saida', required=True, help="Pasta onde os orçamentos gerados são gravados")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço de escuta (padrão: só local)")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processos de renderização")
+    parser.add_argument('--fila', type=int, default=None,
+                        help="Trabalhos aguardando além dos em execução (padrão: 4 por worker); cheia → 503")
+    parser.add_argument('--config', default='config.json', help="config.json com proximo_numero")
+    parser.add_argument('--banco', default=ARQUIVO_PADRAO,
+                        help="Banco SQLite onde os orçamentos gerados são registrados (vazio = não registra)")
+    parser.add_argument('--cache', default=PASTA_PADRAO,
+                        help="Pasta do cache de saídas: pedido idêntico reaproveita os arquivos (vazio = sem cache)")
+    parser.add_argument('--cache-mb', type=float, default=LIMITE_PADRAO_MB, help="Tamanho máximo do cache (LRU)")
+    args = parser.parse_args(argv)
+
+    servico = ServicoOrcamentos(args.modelos, args.saida, args.workers, args.fila, args.config,
+                                BancoOrcamentos(args.banco) if args.banco else None, args.cache, args.cache_mb)
+    servidor = ThreadingHTTPServer((args.host, args.porta), ManipuladorHTTP)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    # SIGTERM (systemd, kill) encerra como o Ctrl+C: para de aceitar e espera os trabalhos em andamento
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.shutdown, daemon=True).start())
+    logger.info("Serviço em http://%s:%d (%d worker(s), até %d pendente(s), %d modelo(s)).",
+                args.host, servidor.server_address[1], servico.workers, servico.capacidade, len(servico.modelos()))
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Encerrando (aguardando trabalhos em andamento)...")
+    finally:
+        servidor.server_close()
+        servico.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
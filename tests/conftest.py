@@ -0,0 +1,26 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+PASTA_ORCAMENTOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Orcamentos')
+sys.path.insert(0, PASTA_ORCAMENTOS)
+
+MODELO_EXEMPLO = os.path.join(PASTA_ORCAMENTOS, 'dist', '06_exemplo.xlsx')
+
+
+@pytest.fixture
+def modelo(tmp_path):
+    """Cópia do modelo de exemplo numa pasta temporária (itens 13-34, total F35)."""
+    destino = tmp_path / 'modelo.xlsx'
+    shutil.copyfile(MODELO_EXEMPLO, destino)
+    return str(destino)
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _encerrar_log():
+    # A thread de escrita do log guarda o stdout capturado pelo pytest: esvazia antes de ele fechar
+    yield
+    import logs
+    logs.encerrar()
@@ -0,0 +1,44 @@
+import banco
+
+REGISTRO = {'cliente': "ACME Ltda", 'cnpj': "12.345.678/0001-90", 'prazo': "10 dias",
+            'itens': [{'item': '1', 'desc': "Parafuso", 'quant': '3', 'vlr_uni': '1,50'}]}
+
+
+def test_registrar_e_buscar(tmp_path):
+    dados = banco.BancoOrcamentos(str(tmp_path / 'orcamentos.db'))
+    dados.registrar(REGISTRO, 10, criado_em='2026-09-15T10:00:00')
+    dados.registrar(dict(REGISTRO, cnpj="99.999.999/0001-99"), 11, criado_em='2026-10-01T10:00:00')
+
+    encontrados = dados.buscar(cnpj="12345678000190", desde='2026-09-01', ate='2026-09-30')
+    assert [orcamento['numero'] for orcamento in encontrados] == [10]
+    assert encontrados[0]['total'] == '4.50'
+    registro = dados.registro(10)
+    assert registro['cliente'] == "ACME Ltda"
+    assert registro['itens'][0]['quant'] == '3'
+
+
+def test_reemitir_com_o_mesmo_numero_nao_duplica(modelo, tmp_path):
+    arquivo = str(tmp_path / 'orcamentos.db')
+    banco.BancoOrcamentos(arquivo).registrar(REGISTRO, 10)
+    argumentos = ['--banco', arquivo, 'reemitir', '10', modelo, '--saida', str(tmp_path / 'saida'), '--cache', '']
+
+    assert banco.main(argumentos) == 0
+    assert banco.main(argumentos) == 0
+
+    encontrados = banco.BancoOrcamentos(arquivo).buscar(numero=10)
+    assert len(encontrados) == 1
+    assert encontrados[0]['arquivo_xlsx'] == str(tmp_path / 'saida' / 'modelo_copia_10.xlsx')
+
+
+def test_reemitir_com_numero_novo_grava_outra_linha(modelo, tmp_path):
+    arquivo = str(tmp_path / 'orcamentos.db')
+    banco.BancoOrcamentos(arquivo).registrar(REGISTRO, 10)
+    config = tmp_path / 'config.json'
+    config.write_text('{"proximo_numero": 50}', encoding='utf-8')
+
+    assert banco.main(['--banco', arquivo, 'reemitir', '10', modelo, '--saida', str(tmp_path),
+                       '--novo-numero', '--config', str(config), '--cache', '']) == 0
+
+    dados = banco.BancoOrcamentos(arquivo)
+    assert len(dados.buscar(numero=10)) == 1
+    assert dados.buscar(numero=50)[0]['cliente'] == "ACME Ltda"
@@ -0,0 +1,64 @@
+import os
+
+import cache_saida
+import motor
+
+REGISTRO = {'cliente': "ACME", 'itens': [{'item': '1', 'desc': "Parafuso", 'quant': '2', 'vlr_uni': '1,50'}]}
+
+
+def _guardado(tmp_path, conteudo=b'saida gerada'):
+    cache = cache_saida.CacheSaida(str(tmp_path / 'cache'))
+    origem = tmp_path / 'origem.xlsx'
+    origem.write_bytes(conteudo)
+    cache.guardar('ab' * 32, 'xlsx', str(origem))
+    return cache, 'ab' * 32
+
+
+def test_acerto_entrega_copia_propria(tmp_path):
+    cache, chave = _guardado(tmp_path)
+    destino = tmp_path / 'destino.xlsx'
+    assert cache.obter(chave, 'xlsx', str(destino))
+    assert not os.path.samefile(destino, cache._arquivo(chave, 'xlsx'))
+
+    destino.write_bytes(b'editada pelo usuario')
+    outro = tmp_path / 'outro.xlsx'
+    assert cache.obter(chave, 'xlsx', str(outro))
+    assert outro.read_bytes() == b'saida gerada'
+    cache.fechar()
+
+
+def test_acerto_so_le_o_arquivo_se_tamanho_ou_mtime_mudarem(tmp_path, monkeypatch):
+    cache, chave = _guardado(tmp_path)
+    lidos = []
+    monkeypatch.setattr(cache_saida, 'sha256_arquivo',
+                        lambda caminho, original=cache_saida.sha256_arquivo: lidos.append(caminho) or original(caminho))
+    assert cache.obter(chave, 'xlsx', str(tmp_path / 'a.xlsx'))
+    assert lidos == []
+
+    arquivo = cache._arquivo(chave, 'xlsx')
+    os.utime(arquivo, ns=(0, 10 ** 18))  # só tocado: confere uma vez e passa a valer o mtime novo
+    assert cache.obter(chave, 'xlsx', str(tmp_path / 'b.xlsx'))
+    assert cache.obter(chave, 'xlsx', str(tmp_path / 'c.xlsx'))
+    assert lidos == [arquivo]
+    cache.fechar()
+
+
+def test_entrada_alterada_e_descartada(tmp_path):
+    cache, chave = _guardado(tmp_path)
+    with open(cache._arquivo(chave, 'xlsx'), 'r+b') as f:
+        f.write(b'SAIDA')
+    assert not cache.obter(chave, 'xlsx', str(tmp_path / 'destino.xlsx'))
+    assert cache.tamanho() == (0, 0)
+    cache.fechar()
+
+
+def test_gerar_orcamento_pelo_cache(modelo, tmp_path):
+    cache = cache_saida.CacheSaida(str(tmp_path / 'cache'))
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    primeiro = motor.gerar_orcamento(modelo, REGISTRO, 10, str(tmp_path / 'a'), cache=cache)
+    segundo = motor.gerar_orcamento(modelo, REGISTRO, 10, str(tmp_path / 'b'), cache=cache)
+    with open(primeiro, 'rb') as a, open(segundo, 'rb') as b:
+        assert a.read() == b.read()
+    assert cache.tamanho()[0] == 1
+    cache.fechar()
@@ -0,0 +1,46 @@
+import pytest
+
+import catalogo
+
+PRODUTOS = """codigo;descricao;und;valor
+PRF-0010;Parafuso sextavado inox 10mm;PC;1,50
+PRF-0012;Parafuso sextavado inox 12mm;PC;1,80
+ARR-0001;Arruela lisa zincada;PC;0,10
+CAB-2500;Cabo flexível 2,5mm azul;M;3.45
+"""
+
+
+@pytest.fixture
+def catalogo_exemplo(tmp_path):
+    arquivo = tmp_path / 'produtos.csv'
+    arquivo.write_text(PRODUTOS, encoding='utf-8')
+    dados = catalogo.Catalogo(str(tmp_path / 'catalogo.db'))
+    assert dados.importar(str(arquivo)) == 4
+    yield dados
+    dados.fechar()
+
+
+def test_busca_por_prefixo_e_por_palavras(catalogo_exemplo):
+    assert [p.codigo for p in catalogo_exemplo.buscar("parafuso sext")] == ['PRF-0010', 'PRF-0012']
+    assert [p.codigo for p in catalogo_exemplo.buscar("inox 12")] == ['PRF-0012']
+    assert [p.codigo for p in catalogo_exemplo.buscar("prf-0010")] == ['PRF-0010']
+    cabo = catalogo_exemplo.buscar("cabo")[0]
+    assert (cabo.und, cabo.preco) == ('M', '3,45')
+
+
+def test_busca_aproximada_corrige_erro_de_digitacao(catalogo_exemplo):
+    assert [p.codigo for p in catalogo_exemplo.buscar("aruela")] == ['ARR-0001']
+    assert [p.codigo for p in catalogo_exemplo.buscar("parafuzo 10")] == ['PRF-0010']
+
+
+def test_vocabulario_aproximado_sem_codigos_nem_numeros(catalogo_exemplo):
+    with catalogo_exemplo._consulta() as conexao:
+        vocabulario = {termo for (termo,) in conexao.execute("SELECT termo FROM vocabulario")}
+    assert {'PARAFUSO', 'SEXTAVADO', 'ARRUELA', 'FLEXIVEL'} <= vocabulario
+    assert not any(any(c.isdigit() for c in termo) for termo in vocabulario)
+    assert catalogo_exemplo.buscar("prf-0011") == []
+
+
+def test_tamanhos_compativeis_cobrem_o_corte_do_difflib():
+    assert catalogo.CORTE_APROXIMADO == 0.75
+    assert catalogo._tamanhos_compativeis(8) == list(range(5, 14))
@@ -0,0 +1,45 @@
+import banco
+from clientes import CadastroClientes, normalizar_nome
+
+
+def _cadastro(tmp_path):
+    dados = banco.BancoOrcamentos(str(tmp_path / 'orcamentos.db'))
+    dados.registrar({'cliente': "Padaria São João", 'cnpj': "12.345.678/0001-90"}, 1)
+    dados.registrar({'cliente': "Padaria Santa Rita", 'cnpj': "12.399.000/0001-10"}, 2)
+    dados.registrar({'cliente': "Mercado Central"}, 3)
+    cadastro = CadastroClientes(dados)
+    assert cadastro.carregar() == 3
+    return cadastro
+
+
+def test_sugestoes_por_prefixo_de_nome_e_cnpj(tmp_path):
+    cadastro = _cadastro(tmp_path)
+    assert normalizar_nome(" padaria  são ") == "PADARIA SAO"
+    assert [c.cliente for c in cadastro.sugestoes("padaria s")] == ["Padaria Santa Rita", "Padaria São João"]
+    assert [c.cliente for c in cadastro.sugestoes("Padaria São")] == ["Padaria São João"]
+    assert [c.cliente for c in cadastro.sugestoes("12.3", campo='cnpj')] == ["Padaria São João",
+                                                                          "Padaria Santa Rita"]
+    assert [c.cliente for c in cadastro.sugestoes("123456", campo='cnpj')] == ["Padaria São João"]
+    assert cadastro.sugestoes("xyz") == [] and cadastro.sugestoes("", campo='cnpj') == []
+
+
+def test_aprender_substitui_o_cliente_da_mesma_chave(tmp_path):
+    cadastro = _cadastro(tmp_path)
+    cadastro.aprender({'cliente': "Panificadora São João", 'cnpj': "12345678000190", 'telefone': "1234"})
+    assert len(cadastro) == 3
+    assert [c.cliente for c in cadastro.sugestoes("padaria")] == ["Padaria Santa Rita"]
+    assert cadastro.sugestoes("panif")[0].telefone == "1234"
+    assert [c.cliente for c in cadastro.sugestoes("12345678", campo='cnpj')] == ["Panificadora São João"]
+
+
+def test_aprendido_durante_o_carregar_nao_se_perde():
+    class BancoLento:
+        def clientes(self):
+            # Um orçamento gerado enquanto o banco é lido: a foto não inclui esse cliente
+            cadastro.aprender({'cliente': "Cliente Novo", 'cnpj': "11.111.111/0001-11"})
+            return [("Cliente Antigo", "", "22.222.222/0001-22", "", "22222222000122")]
+
+    cadastro = CadastroClientes(BancoLento())
+    assert cadastro.carregar() == 2
+    assert [c.cliente for c in cadastro.sugestoes("cliente")] == ["Cliente Antigo", "Cliente Novo"]
+    assert cadastro._aprendidos is None
@@ -0,0 +1,28 @@
+import zipfile
+
+import escritor_xml
+import motor
+
+
+def _registro(quantidade):
+    return {'cliente': "ACME", 'itens': [{'item': str(n), 'desc': f"Produto {n}", 'quant': '1', 'vlr_uni': '2,00'}
+                                         for n in range(1, quantidade + 1)]}
+
+
+def _conteudos(caminho):
+    with zipfile.ZipFile(caminho) as zf:
+        assert zf.testzip() is None
+        return {nome: zf.read(nome) for nome in zf.namelist()}
+
+
+def test_copia_bruta_e_alternativa_gravam_o_mesmo_conteudo(modelo, tmp_path, monkeypatch):
+    (tmp_path / 'bruta').mkdir()
+    (tmp_path / 'alternativa').mkdir()
+    assert escritor_xml.copia_bruta_disponivel()
+    bruta = motor.gerar_orcamento(modelo, _registro(3), 8, str(tmp_path / 'bruta'))
+
+    monkeypatch.setattr(escritor_xml, 'copia_bruta_disponivel', lambda: False)
+    monkeypatch.setattr(motor, '_modelos', {})  # relê o modelo pelo caminho alternativo
+    alternativa = motor.gerar_orcamento(modelo, _registro(3), 8, str(tmp_path / 'alternativa'))
+
+    assert _conteudos(bruta) == _conteudos(alternativa)
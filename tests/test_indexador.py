@@ -0,0 +1,39 @@
+import os
+
+import indexador
+import motor
+from banco import BancoOrcamentos
+
+
+def _gerar_copias(modelo, pasta):
+    os.makedirs(pasta)
+    for numero, cliente in ((7, "ACME Ltda"), (8, "Padaria Central")):
+        registro = {'cliente': cliente, 'itens': [{'item': '1', 'desc': "Parafuso", 'quant': '2', 'vlr_uni': '1,50'}]}
+        motor.gerar_orcamento(modelo, registro, numero, pasta)
+
+
+def test_segunda_execucao_pula_arquivos_inalterados(modelo, tmp_path):
+    pasta = str(tmp_path / 'saida')
+    _gerar_copias(modelo, pasta)
+    banco = BancoOrcamentos(str(tmp_path / 'orcamentos.db'))
+
+    assert indexador.indexar(pasta, banco) == (2, 0, 0)
+    assert indexador.indexar(pasta, banco) == (0, 0, 2)
+    orcamento = banco.buscar(numero=7)[0]
+    assert orcamento['cliente'] == "ACME Ltda" and orcamento['total'] == '3.00'
+
+    copia = os.path.join(pasta, 'modelo_copia_8.xlsx')
+    info = os.stat(copia)
+    os.utime(copia, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    assert indexador.indexar(pasta, banco) == (1, 0, 1)
+
+
+def test_forcar_rele_todos_os_arquivos(modelo, tmp_path):
+    pasta = str(tmp_path / 'saida')
+    _gerar_copias(modelo, pasta)
+    arquivo = str(tmp_path / 'orcamentos.db')
+    assert indexador.main([pasta, '--banco', arquivo, '--workers', '1']) == 0
+
+    banco = BancoOrcamentos(arquivo)
+    assert indexador.indexar(pasta, banco, forcar=True) == (2, 0, 0)
+    assert [orcamento['numero'] for orcamento in banco.buscar(numero=8)] == [8]
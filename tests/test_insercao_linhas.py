@@ -0,0 +1,25 @@
+from openpyxl import load_workbook
+
+import escritor_xml
+import motor
+
+
+def _registro(quantidade):
+    return {'cliente': "ACME", 'itens': [{'item': str(n), 'desc': f"Produto {n}", 'quant': '1', 'vlr_uni': '2,00'}
+                                         for n in range(1, quantidade + 1)]}
+
+
+def test_deslocar_referencias_como_o_excel():
+    assert escritor_xml.deslocar_referencias("SUM(F13:F34)", 35, 3, expandir=True) == "SUM(F13:F37)"
+    assert escritor_xml.deslocar_referencias("SUM(F13:F34)", 35, 3) == "SUM(F13:F34)"
+    assert escritor_xml.deslocar_referencias('B36&"A40"', 35, 3) == 'B39&"A40"'
+
+
+def test_itens_alem_do_bloco_inserem_linhas(modelo, tmp_path):
+    caminho = motor.gerar_orcamento(modelo, _registro(25), 7, str(tmp_path))
+
+    ws = load_workbook(caminho).active
+    assert ws['B37'].value == "Produto 25"
+    assert float(ws['F37'].value) == 2.0
+    assert float(ws['F38'].value) == 50.0  # total F35 desceu 3 linhas
+    assert ws['A5'].value == motor.texto_numero(7)
@@ -0,0 +1,54 @@
+import re
+import zipfile
+
+import escritor_xml
+import leitor_modelo
+import motor
+
+
+def _reescrever_planilha(caminho, trocar):
+    """Regrava o modelo com sheet1.xml passado por trocar(xml)."""
+    with zipfile.ZipFile(caminho) as zf:
+        membros = [(info, zf.read(info)) for info in zf.infolist()]
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for info, dados in membros:
+            if info.filename == 'xl/worksheets/sheet1.xml':
+                dados = trocar(dados.decode('utf-8')).encode('utf-8')
+            zout.writestr(info, dados)
+
+
+def _com_formula_compartilhada(xml):
+    celulas = {
+        'F14': '<c r="F14" s="58"><f t="shared" ref="F14:F16" si="0">C14*E14</f><v>48</v></c>',
+        'F15': '<c r="F15" s="58"><f t="shared" si="0"/><v>30</v></c>',
+        'F16': '<c r="F16" s="58"><f t="shared" si="0"/><v>7</v></c>',
+    }
+    for ref, nova in celulas.items():
+        xml = re.sub(rf'<c r="{ref}"[^>]*?(?:/>|>.*?</c>)', nova, xml, count=1)
+    return xml
+
+
+def test_linhas_do_modelo_em_streaming(modelo):
+    linhas = dict(leitor_modelo.iterar_linhas(modelo, ate_linha=14))
+    assert max(linhas) == 14
+    assert linhas[13][2] == "MÃO DE OBRA"
+    assert linhas[14][3] == '4'  # o modelo guarda a quantidade como texto
+
+
+def test_traduzir_formula_compartilhada():
+    assert escritor_xml.traduzir_formula("C13*E13", 1, 0) == "C14*E14"
+    assert escritor_xml.traduzir_formula("$C$13*E13+B$2", 2, 1) == "$C$13*F15+C$2"
+
+
+def test_celulas_de_formula_compartilhada_saem_como_formula(modelo):
+    _reescrever_planilha(modelo, _com_formula_compartilhada)
+    linhas = dict(leitor_modelo.iterar_linhas(modelo))
+    assert linhas[14][6] == '=C14*E14'
+    assert linhas[15][6] == '=C15*E15'
+    assert linhas[16][6] == '=C16*E16'
+
+
+def test_inspecao_nao_trata_formula_compartilhada_como_valor(modelo):
+    _reescrever_planilha(modelo, _com_formula_compartilhada)
+    _, valores = motor.inspecionar_modelo(modelo)
+    assert valores['F15'] == '=C15*E15'
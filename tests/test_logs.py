@@ -0,0 +1,46 @@
+import json
+import logging
+
+import pytest
+
+import logs
+
+
+@pytest.fixture
+def arquivo_log(tmp_path):
+    arquivo = tmp_path / 'orcamento.log'
+    yield arquivo
+    logs.configurar()  # volta ao terminal para os outros testes
+
+
+def test_nivel_filtra_antes_de_montar_a_mensagem(arquivo_log):
+    class Caro:
+        formatado = False
+
+        def __str__(self):
+            Caro.formatado = True
+            return "caro"
+
+    logs.configurar(nivel='WARNING', arquivo=str(arquivo_log))
+    logger = logs.obter_logger('teste')
+    assert not logger.isEnabledFor(logs.TRACE) and not logger.isEnabledFor(logging.INFO)
+    logger.info("Ignorado: %s", Caro())
+    logger.warning("Aviso %d", 1)
+    logs.encerrar()
+
+    assert not Caro.formatado
+    linhas = arquivo_log.read_text(encoding='utf-8').splitlines()
+    assert len(linhas) == 1 and linhas[0].endswith("WARNING: Aviso 1")
+
+
+def test_encerrar_esvazia_fila_e_buffer(arquivo_log):
+    logs.configurar(nivel='INFO', json_saida=True, arquivo=str(arquivo_log))
+    logger = logs.obter_logger('teste')
+    for numero in range(10):
+        logger.info("Orçamento %d", numero, extra={'campos': {'numero': numero}})
+    assert arquivo_log.read_text(encoding='utf-8') == ""  # abaixo da capacidade: ainda no buffer
+
+    logs.encerrar()
+    eventos = [json.loads(linha) for linha in arquivo_log.read_text(encoding='utf-8').splitlines()]
+    assert [evento['numero'] for evento in eventos] == list(range(10))
+    assert eventos[0]['msg'] == "Orçamento 0" and eventos[0]['logger'] == 'orcamento.teste'
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import lote
+
+
+def test_sequenciais_pulam_numeros_explicitos():
+    registros = [{}, {'numero': 11}, {}, {'numero': '13'}, {}]
+    numeros, proximo = lote.atribuir_numeros(registros, 10)
+    assert numeros == [10, 11, 12, 13, 14]
+    assert proximo == 15
+
+
+def test_explicito_acima_do_bloco_avanca_o_proximo():
+    numeros, proximo = lote.atribuir_numeros([{}, {'numero': 50}], 10)
+    assert numeros == [10, 50]
+    assert proximo == 51
+
+
+def test_numero_explicito_repetido_e_rejeitado():
+    with pytest.raises(ValueError, match="Número 7 repetido nos registros 1 e 3"):
+        lote.atribuir_numeros([{'numero': 7}, {}, {'numero': '7'}], 1)
+
+
+def test_lote_nao_sobrescreve_orcamento_com_numero_explicito(modelo, tmp_path):
+    registros = [{'cliente': f"Cliente {n}", 'numero': n} if n == 2 else {'cliente': f"Cliente {n}"}
+                 for n in range(1, 5)]
+    gerados, falhas, proximo = lote.gerar_lote(modelo, registros, str(tmp_path), 1)
+    assert not falhas
+    assert [os.path.basename(caminho) for caminho in gerados] == [
+        'modelo_copia_1.xlsx', 'modelo_copia_2.xlsx', 'modelo_copia_3.xlsx', 'modelo_copia_4.xlsx']
+    assert proximo == 5
+
+
+def test_main_recusa_numeros_repetidos(modelo, tmp_path):
+    registros = tmp_path / 'registros.jsonl'
+    registros.write_text('{"numero": 3}\n{"numero": 3}\n', encoding='utf-8')
+    config = tmp_path / 'config.json'
+    assert lote.main([modelo, str(registros), '--saida', str(tmp_path / 'saida'), '--config', str(config),
+                      '--banco', '', '--workers', '1']) == 1
+    assert not config.exists()
+
+
+def test_main_recusa_config_corrompido(modelo, tmp_path):
+    registros = tmp_path / 'registros.jsonl'
+    registros.write_text('{"cliente": "A"}\n', encoding='utf-8')
+    config = tmp_path / 'config.json'
+    config.write_text('{"proximo_numero": ', encoding='utf-8')
+    saida = tmp_path / 'saida'
+    assert lote.main([modelo, str(registros), '--saida', str(saida), '--config', str(config),
+                      '--banco', '', '--workers', '1']) == 1
+    assert not saida.exists() or not os.listdir(saida)
+
+
+def test_lote_nao_reemite_numero_ja_emitido(modelo, tmp_path):
+    from openpyxl import load_workbook
+
+    from banco import BancoOrcamentos
+
+    saida, config = tmp_path / 'saida', tmp_path / 'config.json'
+    argumentos = ['--saida', str(saida), '--config', str(config), '--banco', str(tmp_path / 'orcamentos.db'),
+                  '--workers', '1']
+    primeiro = tmp_path / 'primeiro.jsonl'
+    primeiro.write_text('{"cliente": "A"}\n{"cliente": "B"}\n', encoding='utf-8')
+    assert lote.main([modelo, str(primeiro)] + argumentos) == 0
+
+    segundo = tmp_path / 'segundo.jsonl'
+    segundo.write_text('{"cliente": "C", "numero": 1}\n{"cliente": "D"}\n', encoding='utf-8')
+    assert lote.main([modelo, str(segundo)] + argumentos) == 1
+
+    assert load_workbook(saida / 'modelo_copia_1.xlsx').active['B6'].value == "A"
+    assert load_workbook(saida / 'modelo_copia_3.xlsx').active['B6'].value == "D"
+    assert [orcamento['cliente'] for orcamento in BancoOrcamentos(str(tmp_path / 'orcamentos.db')).buscar(numero=1)] == ["A"]
+
+
+def test_falha_informa_o_numero_reservado(modelo, tmp_path):
+    (tmp_path / 'modelo_copia_2.xlsx').write_bytes(b'')
+    gerados, falhas, _ = lote.gerar_lote(modelo, [{}, {}, {}], str(tmp_path), 1)
+    assert len(gerados) == 2
+    assert [(idx, numero) for idx, numero, _ in falhas] == [(2, 2)]
@@ -0,0 +1,55 @@
+import json
+import re
+import zlib
+
+from openpyxl import load_workbook
+
+import mapa_celulas
+import motor
+
+
+def _textos_pdf(conteudo):
+    """Content streams do PDF, descomprimidos."""
+    return b''.join(zlib.decompress(dados) for dados in re.findall(rb'stream\n(.*?)\nendstream', conteudo, re.S)
+                    if dados[:1] == b'x')
+
+
+def _gravar_mapa(modelo, dados):
+    with open(mapa_celulas.caminho_mapa(modelo), 'w', encoding='utf-8') as f:
+        json.dump(dados, f)
+
+
+def test_mapa_compilado_em_posicoes():
+    mapa = motor.MAPA_PADRAO
+    assert mapa.posicoes['F35'] == (35, 6)
+    assert mapa.linhas_itens(2)[:2] == [('A13', 'B13', 'C13', 'D13', 'E13', 'F13'),
+                                       ('A14', 'B14', 'C14', 'D14', 'E14', 'F14')]
+    assert mapa.limites == (39, 6)
+    assert 'E13' in mapa.celulas_moeda and 'F35' in mapa.celulas_moeda and 'C13' not in mapa.celulas_moeda
+
+
+def test_mapa_json_completa_com_o_padrao(modelo):
+    _gravar_mapa(modelo, {'total': 'F40', 'adicionais': {'prazo': 'B41'}})
+    mapa = motor.obter_mapa(modelo)
+    assert mapa.celula_total == 'F40'
+    assert mapa.celula('prazo') == 'B41'
+    assert mapa.celula('cliente') == 'B6'
+    assert mapa.limites == (41, 6)
+
+
+def test_mapa_alem_da_linha_39_chega_ao_xlsx_e_ao_pdf(modelo, tmp_path):
+    _gravar_mapa(modelo, {'total': 'F40', 'adicionais': {'prazo': 'B41'}})
+    registro = {'cliente': "Cliente Mapa", 'prazo': "PRAZO NA LINHA 41",
+                'itens': [{'item': '1', 'desc': "Parafuso", 'quant': '2', 'vlr_uni': '10,50'}]}
+
+    caminho = motor.gerar_orcamento(modelo, registro, 42, str(tmp_path), pdf_nativo=True)
+
+    ws = load_workbook(caminho).active
+    assert float(ws['F40'].value) == 21.0
+    assert ws['B41'].value == "PRAZO NA LINHA 41"
+    modelo_pdf = motor.obter_pdf_nativo(modelo)
+    assert modelo_pdf.ultima_linha >= 41
+    with open(caminho[:-len('.xlsx')] + '.pdf', 'rb') as f:
+        textos = _textos_pdf(f.read())
+    assert b'(PRAZO NA LINHA 41)' in textos
+    assert b'(21,00)' in textos
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from numeracao import AlocadorNumeros
+
+
+def test_reservas_concorrentes_nunca_repetem(tmp_path):
+    config = str(tmp_path / 'config.json')
+    reservas = []
+
+    def reservar():
+        alocador = AlocadorNumeros(config)  # uma instância por thread, como processos diferentes
+        for _ in range(20):
+            reservas.extend(alocador.reservar(2))
+
+    threads = [threading.Thread(target=reservar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(reservas) == list(range(1, 161))
+    assert AlocadorNumeros(config).ler() == 161
+
+
+def test_minimo_e_garantir_minimo(tmp_path):
+    alocador = AlocadorNumeros(str(tmp_path / 'config.json'))
+    assert alocador.reservar(1, minimo=100) == range(100, 101)
+    assert alocador.garantir_minimo(50) == 101
+    assert alocador.garantir_minimo(200) == 200
+    assert alocador.reservar(1) == range(200, 201)
+
+
+def test_reserva_pula_numeros_explicitos(tmp_path):
+    alocador = AlocadorNumeros(str(tmp_path / 'config.json'))
+    reserva = alocador.reservar(3, pular={1, 2, 9})
+    assert reserva == range(1, 6)
+    assert alocador.ler() == 6
+    assert alocador.reservar(1) == range(6, 7)
+
+
+def test_config_corrompido_nao_volta_o_contador(tmp_path):
+    config = tmp_path / 'config.json'
+    config.write_text('{"proximo_numero": 42', encoding='utf-8')
+    alocador = AlocadorNumeros(str(config))
+    with pytest.raises(ValueError, match="inválido"):
+        alocador.reservar(1)
+    with pytest.raises(ValueError):
+        alocador.garantir_minimo(10)
+    assert config.read_text(encoding='utf-8') == '{"proximo_numero": 42'
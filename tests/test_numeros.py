@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+import numeros
+
+
+def test_converter_br():
+    assert numeros.converter_br("1.234,56") == Decimal('1234.56')
+    assert numeros.converter_br("R$ 2.000,00") == Decimal('2000.00')
+    assert numeros.converter_br("3") == Decimal('3')
+    assert numeros.converter_br("") is None
+    assert numeros.converter_br("abc") is None
+    assert numeros.converter_br("NaN") is None
+
+
+def test_converter_br_nao_mistura_tipos_no_cache():
+    assert numeros.converter_br(1) == Decimal(1)
+    assert numeros.converter_br(True) is None
+    assert numeros.converter_br(False) is None
+    assert str(numeros.converter_br(1.0)) == '1.0'
+    assert str(numeros.converter_br(Decimal('1.00'))) == '1.00'
+    assert str(numeros.converter_br(1)) == '1'
+
+
+def test_arredondamento_em_centavos_meio_para_cima():
+    assert numeros.arredondar(Decimal('2.675')) == Decimal('2.68')
+    assert numeros.arredondar(Decimal('-2.675')) == Decimal('-2.68')
+    assert numeros.formatar_br(Decimal('1234567.005')) == '1.234.567,01'
+    assert numeros.formatar_br(0.1 + 0.2) == '0,30'
+
+
+def test_total_da_linha_e_soma():
+    colunas = numeros.ColunasItens([
+        {'quant': '3', 'vlr_uni': '0,335'},
+        {'quant': '', 'vlr_uni': '', 'total': '10,00'},
+        {'quant': 'dois', 'vlr_uni': '5,00'},
+    ])
+    assert colunas.total == [Decimal('1.01'), Decimal('10.00'), None]
+    assert colunas.soma() == Decimal('11.01')
+    assert colunas.invalidos == [(2, 'quant', 'dois')]
+
+
+def test_soma_incremental_acompanha_a_soma_completa():
+    itens = [{'quant': '2', 'vlr_uni': '1,50'}, {'quant': '1', 'vlr_uni': '0,10'}]
+    soma = numeros.SomaIncremental(itens)
+    itens[1] = {'quant': '3', 'vlr_uni': '0,10'}
+    assert soma.atualizar(1, itens[1]) == Decimal('0.20')
+    assert soma.atualizar(4, {'total': '7'}) == Decimal('7.00')
+    assert soma.soma() == numeros.ColunasItens(itens + [{}, {}, {'total': '7'}]).soma() == Decimal('10.30')
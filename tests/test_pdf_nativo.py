@@ -0,0 +1,64 @@
+import io
+import re
+import zlib
+
+import motor
+import pdf_nativo
+
+
+def _streams(conteudo):
+    """Content streams do PDF, descomprimidos, por número de objeto."""
+    return {int(numero): zlib.decompress(dados)
+            for numero, dados in re.findall(rb'(\d+) 0 obj\n<< /Length \d+ /Filter /FlateDecode >>\nstream\n(.*?)\nendstream',
+                                            conteudo, re.S)}
+
+
+def _paginas(conteudo):
+    """Texto desenhado em cada página (streams listados em /Contents, na ordem)."""
+    streams = _streams(conteudo)
+    return [b''.join(streams[int(n)] for n in re.findall(rb'(\d+) 0 R', contents))
+            for contents in re.findall(rb'/Type /Page .*?/Contents \[(.*?)\]', conteudo)]
+
+
+def _gerar(modelo, registro):
+    saida = io.BytesIO()
+    mapa = motor.obter_mapa(modelo)
+    celulas = motor.celulas_do_registro(registro, 1, mapa)
+    motor.obter_pdf_nativo(modelo).renderizar(celulas, saida, mapa.insercao(len(registro.get('itens') or [])))
+    return saida.getvalue()
+
+
+def test_pdf_desenha_textos_fixos_abaixo_do_mapa(modelo):
+    paginas = _paginas(_gerar(modelo, {'cliente': "X"}))
+    assert len(paginas) == 1
+    assert b'ASSINATURA DO RESPONS' in paginas[0]
+
+
+def test_rodape_so_na_ultima_pagina(modelo):
+    itens = [{'item': str(n), 'desc': f"Produto {n}", 'quant': '1', 'vlr_uni': '1,00'} for n in range(1, 31)]
+    paginas = _paginas(_gerar(modelo, {'cliente': "X", 'itens': itens}))
+    assert len(paginas) == 2
+    assert b'ASSINATURA DO RESPONS' not in paginas[0]
+    assert b'ASSINATURA DO RESPONS' in paginas[1]
+    assert all(b'(X) Tj' in pagina for pagina in paginas)  # cabeçalho em todas
+
+
+def test_texto_longo_cortado_dentro_da_celula(modelo):
+    descricao = "Parafuso sextavado " * 12
+    pagina = _paginas(_gerar(modelo, {'itens': [{'item': '1', 'desc': descricao, 'quant': '1'}]}))[0]
+    desenho = re.search(rb'([\d.-]+) ([\d.-]+) Td \((Parafuso[^)]*)\) Tj', pagina)
+    assert desenho is not None
+    x, texto = float(desenho.group(1)), desenho.group(3)
+    assert texto.endswith(b'\x85') and len(texto) < len(descricao)
+
+    modelo_pdf = motor.obter_pdf_nativo(modelo)
+    x0, x1, _, _ = modelo_pdf.coordenadas['B13']
+    tamanho = modelo_pdf.estilos['B13'].tamanho * modelo_pdf.escala
+    largura = pdf_nativo.largura_texto(texto.decode('cp1252'), tamanho, modelo_pdf.estilos['B13'].negrito)
+    assert x0 <= x and x + largura <= x1
+
+
+def test_encurtar_mantem_texto_que_cabe():
+    assert pdf_nativo.ModeloPDF._encurtar("curto", 100, 10, False) == "curto"
+    cortado = pdf_nativo.ModeloPDF._encurtar("texto bem comprido demais", 50, 10, False)
+    assert cortado.endswith('…') and pdf_nativo.largura_texto(cortado, 10) <= 50
@@ -0,0 +1,38 @@
+import json
+import time
+from types import SimpleNamespace
+
+import perfil as modulo_perfil
+from perfil import Perfil
+
+
+def test_etapa_repetida_acumula(monkeypatch):
+    relogio = iter([0.0, 0.010, 1.0, 1.005, 2.0, 2.030])
+    monkeypatch.setattr(modulo_perfil, 'time', SimpleNamespace(perf_counter=lambda: next(relogio),
+                                                              thread_time=time.thread_time))
+    perfil = Perfil('orcamento', ferramentas=())
+    for nome in ('modelo', 'salvar', 'modelo'):
+        with perfil.etapa(nome):
+            pass
+
+    assert list(perfil.etapas) == ['modelo', 'salvar']
+    assert round(perfil.etapas['modelo']['ms'], 6) == 40.0
+    assert round(perfil.etapas['salvar']['ms'], 6) == 5.0
+    assert perfil.resumo() == "modelo 40 ms | salvar 5,0 ms | total 45 ms"
+
+
+def test_salvar_acrescenta_uma_linha_json(tmp_path):
+    arquivo = str(tmp_path / 'metricas.jsonl')
+    for numero in (7, 8):
+        perfil = Perfil('orcamento', ferramentas=())
+        with perfil:
+            with perfil.etapa('modelo'):
+                pass
+        assert perfil.salvar(arquivo, numero=numero, situacao='ok') == arquivo
+
+    linhas = [json.loads(linha) for linha in open(arquivo, encoding='utf-8')]
+    assert [linha['numero'] for linha in linhas] == [7, 8]
+    assert linhas[0]['operacao'] == 'orcamento' and linhas[0]['situacao'] == 'ok'
+    assert set(linhas[0]['etapas']['modelo']) == {'ms', 'cpu_ms', 'blocos'}
+    assert linhas[0]['total_ms'] >= linhas[0]['etapas']['modelo']['ms']
+    assert 'perfis' not in linhas[0]
@@ -0,0 +1,68 @@
+import shutil
+
+import pytest
+
+import servico
+from banco import BancoOrcamentos
+from conftest import MODELO_EXEMPLO
+
+REGISTRO = {'cliente': "ACME", 'itens': [{'item': '1', 'desc': "Parafuso", 'quant': '2', 'vlr_uni': '1,50'}]}
+
+
+@pytest.fixture
+def servico_local(tmp_path):
+    modelos = tmp_path / 'modelos'
+    modelos.mkdir()
+    shutil.copyfile(MODELO_EXEMPLO, modelos / '06_exemplo.xlsx')
+    banco = BancoOrcamentos(str(tmp_path / 'orcamentos.db'))
+    local = servico.ServicoOrcamentos(str(modelos), str(tmp_path / 'saida'), workers=1,
+                                      config=str(tmp_path / 'config.json'), banco=banco, pasta_cache=None)
+    yield local
+    local.fechar()
+
+
+def test_numero_explicito_repetido_recebe_409(servico_local):
+    trabalho = servico_local.submeter('06_exemplo', dict(REGISTRO, numero=500), com_pdf=False)
+    with pytest.raises(servico.ErroRequisicao) as em_geracao:
+        servico_local.submeter('06_exemplo', dict(REGISTRO, numero=500), com_pdf=False)
+    assert em_geracao.value.status == 409
+
+    assert trabalho.pronto.wait(60) and trabalho.erro is None
+    with pytest.raises(servico.ErroRequisicao) as emitido:
+        servico_local.submeter('06_exemplo', dict(REGISTRO, numero=500), com_pdf=False)
+    assert emitido.value.status == 409
+    assert servico_local.pendentes() == 0
+
+
+def test_numero_reservado_nao_repete_o_explicito(servico_local):
+    explicito = servico_local.submeter('06_exemplo', dict(REGISTRO, numero=700), com_pdf=False)
+    automatico = servico_local.submeter('06_exemplo', dict(REGISTRO), com_pdf=False)
+    assert automatico.numero == 701
+    for trabalho in (explicito, automatico):
+        assert trabalho.pronto.wait(60) and trabalho.erro is None
+    assert servico_local._em_geracao == set()
+
+
+def test_reenvio_identico_vem_do_cache(tmp_path):
+    modelos = tmp_path / 'modelos'
+    modelos.mkdir()
+    shutil.copyfile(MODELO_EXEMPLO, modelos / '06_exemplo.xlsx')
+    local = servico.ServicoOrcamentos(str(modelos), str(tmp_path / 'saida'), workers=1,
+                                      config=str(tmp_path / 'config.json'), pasta_cache=str(tmp_path / 'cache'))
+    try:
+        primeiro = local.submeter('06_exemplo', dict(REGISTRO, numero=900))
+        assert primeiro.pronto.wait(60) and primeiro.erro is None
+        with open(primeiro.pdf, 'wb') as f:  # saída apagada/estragada depois de emitida
+            f.write(b'')
+
+        reenvio = local.submeter('06_exemplo', dict(REGISTRO, numero=900))
+        assert reenvio.reaproveitado and reenvio.situacao() == 'concluido'
+        assert reenvio.como_dict()['cache'] is True
+        assert open(reenvio.pdf, 'rb').read(5) == b'%PDF-'
+
+        with pytest.raises(servico.ErroRequisicao) as outro:
+            local.submeter('06_exemplo', dict(REGISTRO, numero=900, cliente="Outro"))
+        assert outro.value.status == 409
+        assert local.pendentes() == 0
+    finally:
+        local.fechar()